@@ -0,0 +1,478 @@
+"""
+Benchmarks of the stages of the videohash pipeline on synthetic videos.
+
+The videos are generated with the testsrc source of FFmpeg, every stage is
+timed separately in a fresh process. The memory of a stage is the increase
+of the peak RSS of that process during the timed runs, the memory of the
+untimed setup, e.g. the decoded frames, is reported apart. The results are
+written as JSON, pass the JSON of an older release to --compare to see the
+regressions.
+
+    python benchmarks/benchmark.py --output results.json
+    python benchmarks/benchmark.py --compare baseline.json --output results.json
+
+Only the standard library, videohash and FFmpeg are needed.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from queue import Empty
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+import videohash  # noqa: E402
+from videohash import VideoHash  # noqa: E402
+from videohash.collagemaker import MakeCollage  # noqa: E402
+from videohash.framesextractor import (  # noqa: E402
+    FramesExtractor,
+    check_ffmpeg,
+    stream_frames,
+)
+from videohash.hammingdistance import hamming_distances  # noqa: E402
+from videohash.tilemaker import (  # noqa: E402
+    concatenate_frames_horizontally,
+    dominant_colors_of_frames,
+    dominant_colors_of_tiles,
+)
+from videohash.videoduration import video_duration  # noqa: E402
+from videohash.videoprobe import _probe  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+# A stage is set up, untimed, by its setup function which returns the timed
+# callable and the directory the callable writes its files to.
+Stage = Callable[[str, str], Tuple[Callable[[], Any], Optional[str]]]
+
+# Number of hash values of the catalogue of the hamming distance stage.
+CATALOGUE_SIZE = 1_000_000
+
+# Number of queries of the hamming distance stage, compared to every hash
+# value of the catalogue.
+QUERIES = 10
+
+# Seconds a stage may run, its process is terminated afterwards.
+STAGE_TIMEOUT = 3600
+
+
+def generate_video(path: str, duration: int, size: str, ffmpeg_path: str) -> None:
+    """Generate a video of the testsrc pattern with a letterbox."""
+    width, height = (int(value) for value in size.split("x"))
+    subprocess.run(
+        [
+            ffmpeg_path,
+            "-v",
+            "error",
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc=duration={duration}:size={size}:rate=25",
+            "-vf",
+            f"pad={width}:{height + height // 4}:0:{height // 8}",
+            "-pix_fmt",
+            "yuv420p",
+            path,
+        ],
+        check=True,
+    )
+
+
+def _extracted_frames(video: str, workdir: str) -> str:
+    frames_dir = os.path.join(workdir, "frames") + os.path.sep
+    os.makedirs(frames_dir)
+    FramesExtractor(video, frames_dir, interval=1)
+    return frames_dir
+
+
+def _output_dir(workdir: str) -> str:
+    output_dir = os.path.join(workdir, "output") + os.path.sep
+    os.makedirs(output_dir)
+    return output_dir
+
+
+def setup_video_duration(video: str, workdir: str) -> Tuple[Callable, Optional[str]]:
+    def run() -> float:
+        # the metadata are cached, time ffprobe and not the cache
+        _probe.cache_clear()
+        return video_duration(video)
+
+    return run, None
+
+
+def setup_detect_crop(video: str, workdir: str) -> Tuple[Callable, Optional[str]]:
+    ffmpeg_path = check_ffmpeg()
+
+    def run() -> str:
+        return FramesExtractor.detect_crop(
+            video_path=video, frames=3, ffmpeg_path=ffmpeg_path
+        )
+
+    return run, None
+
+
+def setup_frames_extractor(video: str, workdir: str) -> Tuple[Callable, Optional[str]]:
+    output_dir = _output_dir(workdir)
+
+    def run() -> None:
+        FramesExtractor(video, output_dir, interval=1)
+
+    return run, output_dir
+
+
+def setup_stream_frames(video: str, workdir: str) -> Tuple[Callable, Optional[str]]:
+    def run() -> int:
+        return sum(1 for _ in stream_frames(video, interval=1))
+
+    return run, None
+
+
+def setup_make_collage(video: str, workdir: str) -> Tuple[Callable, Optional[str]]:
+    frames_dir = _extracted_frames(video, workdir)
+    frames = [os.path.join(frames_dir, name) for name in sorted(os.listdir(frames_dir))]
+
+    def run() -> None:
+        MakeCollage(frames)
+
+    return run, None
+
+
+def setup_dominant_colors_of_frames(
+    video: str, workdir: str
+) -> Tuple[Callable, Optional[str]]:
+    frames_dir = _extracted_frames(video, workdir)
+
+    def run() -> List[str]:
+        return dominant_colors_of_frames(frames_dir)
+
+    return run, None
+
+
+def setup_dominant_colors(video: str, workdir: str) -> Tuple[Callable, Optional[str]]:
+    frames_dir = _extracted_frames(video, workdir)
+
+    def run() -> List[str]:
+        return dominant_colors_of_tiles(concatenate_frames_horizontally(frames_dir))
+
+    return run, None
+
+
+def setup_calc_hash(video: str, workdir: str) -> Tuple[Callable, Optional[str]]:
+    frames = list(stream_frames(video, interval=1))
+    instance = VideoHash.from_frames(frames, storage_path=workdir + os.path.sep)
+    image = instance.image
+    colors = dominant_colors_of_tiles(concatenate_frames_horizontally(frames))
+
+    def run() -> None:
+        instance._calc_hash(image, colors)
+
+    return run, None
+
+
+def setup_hamming(video: str, workdir: str) -> Tuple[Callable, Optional[str]]:
+    generator = random.Random(0)
+    catalogue = np.array(
+        [generator.getrandbits(64) for _ in range(CATALOGUE_SIZE)], dtype=np.uint64
+    )
+    queries = catalogue[:QUERIES]
+
+    def run() -> np.ndarray:
+        return hamming_distances(queries, catalogue)
+
+    return run, None
+
+
+def setup_videohash(video: str, workdir: str) -> Tuple[Callable, Optional[str]]:
+    output_dir = _output_dir(workdir)
+
+    def run() -> None:
+        VideoHash(path=video, storage_path=output_dir)
+
+    return run, output_dir
+
+
+STAGES: Dict[str, Stage] = {
+    "video_duration": setup_video_duration,
+    "detect_crop": setup_detect_crop,
+    "FramesExtractor": setup_frames_extractor,
+    "stream_frames": setup_stream_frames,
+    "MakeCollage": setup_make_collage,
+    "dominant_colors_of_frames": setup_dominant_colors_of_frames,
+    "dominant_colors_of_tiles": setup_dominant_colors,
+    "_calc_hash": setup_calc_hash,
+    "hamming_distances": setup_hamming,
+    "VideoHash": setup_videohash,
+}
+
+# Stages that do not depend on the video, run once.
+VIDEO_INDEPENDENT_STAGES = {"hamming_distances"}
+
+
+def _max_rss(who: int) -> Optional[int]:
+    """Peak RSS in bytes, ru_maxrss is in KiB on Linux and bytes on macOS."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(who).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _proc_status(field: str) -> Optional[int]:
+    """A memory field of /proc/self/status in bytes, e.g. 'VmHWM', Linux only."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> Optional[int]:
+    """
+    Reset the peak RSS of the process to its current RSS, Linux only.
+
+    :return: The current RSS in bytes, None if the peak can not be reset.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return None
+    return _proc_status("VmRSS")
+
+
+def _files_written(directory: Optional[str]) -> Tuple[int, int]:
+    files = 0
+    size = 0
+    if directory:
+        for root, _, names in os.walk(directory):
+            for name in names:
+                files += 1
+                size += os.path.getsize(os.path.join(root, name))
+    return files, size
+
+
+def _run_stage(stage: str, video: str, repeats: int, queue: Any) -> None:
+    """Run a stage in the child process and put its measurements on the queue."""
+    workdir = tempfile.mkdtemp(prefix="videohash-benchmark-")
+    try:
+        run, output_dir = STAGES[stage](video, workdir)
+        # the peak of the runs is their increase over the RSS after the
+        # setup. ru_maxrss can not be reset, where the peak can not be reset
+        # either the increase of ru_maxrss is reported, which misses the
+        # memory freed by the setup and reused by the runs.
+        setup_rss = _max_rss(resource.RUSAGE_SELF) if resource else None
+        rss_after_setup = _reset_peak_rss()
+
+        timings = []
+        cpu_timings = []
+        for _ in range(repeats):
+            if output_dir:
+                # the files are counted for the last run only
+                shutil.rmtree(output_dir)
+                os.makedirs(output_dir)
+
+            start, cpu_start = time.perf_counter(), time.process_time()
+            run()
+            timings.append(time.perf_counter() - start)
+            cpu_timings.append(time.process_time() - cpu_start)
+
+        files, size = _files_written(output_dir)
+        peak_rss = _max_rss(resource.RUSAGE_SELF) if resource else None
+        if rss_after_setup is not None:
+            run_peak = _proc_status("VmHWM")
+            run_rss_increase = (run_peak or rss_after_setup) - rss_after_setup
+        elif peak_rss is not None:
+            run_rss_increase = peak_rss - (setup_rss or 0)
+        else:
+            run_rss_increase = None
+        queue.put(
+            {
+                "wall_min": min(timings),
+                "wall_median": statistics.median(timings),
+                "cpu_median": statistics.median(cpu_timings),
+                "setup_rss_bytes": setup_rss,
+                "peak_rss_bytes": peak_rss,
+                "run_rss_increase_bytes": run_rss_increase,
+                # the largest child process, of the setup too
+                "children_peak_rss_bytes": (
+                    _max_rss(resource.RUSAGE_CHILDREN) if resource else None
+                ),
+                "files_written": files,
+                "bytes_written": size,
+            }
+        )
+    except Exception as error:
+        queue.put({"error": repr(error)})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def measure(stage: str, video: str, repeats: int) -> Dict[str, Any]:
+    """
+    Measure a stage in a new process, spawned so that it inherits no memory.
+    If the process dies without a result, e.g. killed by the OOM killer, or
+    runs longer than STAGE_TIMEOUT the result is an error.
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_stage, args=(stage, video, repeats, queue))
+    process.start()
+
+    deadline = time.monotonic() + STAGE_TIMEOUT
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1)
+        except Empty:
+            if time.monotonic() > deadline:
+                process.terminate()
+                result = {"error": f"timed out after {STAGE_TIMEOUT}s"}
+            elif not process.is_alive():
+                try:
+                    # the result may have been put just before the exit
+                    result = queue.get(timeout=1)
+                except Empty:
+                    result = {"error": f"exited with code {process.exitcode}"}
+
+    process.join()
+    return result
+
+
+def ffmpeg_version(ffmpeg_path: str) -> str:
+    output = subprocess.run(
+        [ffmpeg_path, "-version"], stdout=subprocess.PIPE, check=True
+    ).stdout
+    return output.decode(errors="replace").splitlines()[0]
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Lines of the comparison of the median wall times with the baseline, the
+    ratio is the new time divided by the old one.
+    """
+    old = {
+        (result["stage"], result["video"]): result
+        for result in baseline["results"]
+        if "wall_median" in result
+    }
+    lines = []
+    for result in results["results"]:
+        key = (result["stage"], result["video"])
+        if key in old and "wall_median" in result:
+            ratio = result["wall_median"] / max(old[key]["wall_median"], 1e-9)
+            lines.append(
+                f"{result['stage']:<26} {result['video']:<22} "
+                + f"{old[key]['wall_median']:9.4f}s {result['wall_median']:9.4f}s "
+                + f"x{ratio:.2f}"
+            )
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--durations",
+        default="10,60",
+        help="comma separated durations of the videos in seconds",
+    )
+    parser.add_argument(
+        "--sizes",
+        default="320x240,1280x720",
+        help="comma separated resolutions of the videos",
+    )
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help="comma separated stages to run",
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args(argv)
+
+    stages = args.stages.split(",")
+    for stage in stages:
+        if stage not in STAGES:
+            parser.error(f"unknown stage '{stage}', choose from {', '.join(STAGES)}")
+
+    ffmpeg_path = check_ffmpeg()
+    videos_dir = tempfile.mkdtemp(prefix="videohash-benchmark-videos-")
+
+    results: Dict[str, Any] = {
+        "videohash_version": videohash.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ffmpeg": ffmpeg_version(ffmpeg_path),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "repeats": args.repeats,
+        "videos": [],
+        "results": [],
+    }
+
+    try:
+        videos = []
+        for duration in (int(value) for value in args.durations.split(",")):
+            for size in args.sizes.split(","):
+                name = f"testsrc_{duration}s_{size}"
+                path = os.path.join(videos_dir, f"{name}.mp4")
+                generate_video(path, duration, size, ffmpeg_path)
+                videos.append((name, path))
+                results["videos"].append(
+                    {
+                        "name": name,
+                        "duration": duration,
+                        "size": size,
+                        "bytes": os.path.getsize(path),
+                    }
+                )
+
+        for stage in stages:
+            stage_videos = videos[:1] if stage in VIDEO_INDEPENDENT_STAGES else videos
+            for name, path in stage_videos:
+                result = {"stage": stage, "video": name}
+                result.update(measure(stage, path, args.repeats))
+                results["results"].append(result)
+
+                if "error" in result:
+                    print(f"{stage:<26} {name:<22} error: {result['error']}")
+                else:
+                    print(
+                        f"{stage:<26} {name:<22} {result['wall_median']:9.4f}s "
+                        + f"rss +{(result['run_rss_increase_bytes'] or 0) / 2 ** 20:7.1f} MiB "
+                        + f"files {result['files_written']}"
+                    )
+    finally:
+        shutil.rmtree(videos_dir, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\ncompared with {baseline.get('videohash_version')}:")
+        print("\n".join(compare(results, baseline)))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
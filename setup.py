@@ -39,10 +39,18 @@ setup(
     install_requires=[
         "Pillow",
         "ImageHash",
-        "imagedominantcolor",
+        "numpy",
+        "PyWavelets",
         "yt-dlp",
     ],
-    python_requires=">=3.6",
+    extras_require={
+        "opencv": ["opencv-python-headless"],
+        "pyvips": ["pyvips"],
+    },
+    entry_points={
+        "console_scripts": ["videohash = videohash.cli:main"],
+    },
+    python_requires=">=3.7",
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Intended Audience :: Developers",
@@ -61,7 +69,6 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
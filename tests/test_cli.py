@@ -0,0 +1,56 @@
+import json
+import os
+import shutil
+
+from videohash.cli import expand_inputs, main, parse_size
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+rocket = os.path.join(this_dir, "../assets/rocket.mkv")
+
+
+def test_all(tmp_path, capsys):
+    output = str(tmp_path / "hashes.jsonl")
+    missing = str(tmp_path / "missing.mkv")
+
+    assert main([rocket, missing, "--jobs", "1", "--output", output]) == 1
+
+    with open(output) as f:
+        lines = {line["path"]: line for line in map(json.loads, f)}
+
+    assert set(lines) == {os.path.abspath(rocket), missing}
+    line = lines[os.path.abspath(rocket)]
+    assert line["error"] is None
+    assert line["hash"].startswith("0b") and line["hash_hex"].startswith("0x")
+    assert line["duration"] > 0
+    assert "collage" in line["timings"]
+    assert lines[missing]["hash"] is None and lines[missing]["error"]
+
+    # an interrupted run left a cut line, the hashed videos are skipped and
+    # the failed videos are retried
+    with open(output, "a") as f:
+        f.write('{"path": ')
+    arguments = [rocket, missing, "--jobs", "1", "--output", output, "--resume"]
+    assert main(arguments) == 1
+    shutil.copyfile(rocket, missing)
+    assert main(arguments) == 0
+    assert main(arguments) == 0
+
+    with open(output) as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 5
+    assert json.loads(lines[-1])["path"] == missing
+    assert json.loads(lines[-1])["hash_hex"] == line["hash_hex"]
+
+
+def test_inputs(tmp_path):
+    (tmp_path / "b").mkdir()
+    for name in ("a.mp4", "b/c.MKV", "b/notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+
+    sources = list(expand_inputs([str(tmp_path), "https://example.com/v"]))
+    assert sources == [
+        str(tmp_path / "a.mp4"),
+        str(tmp_path / "b" / "c.MKV"),
+        "https://example.com/v",
+    ]
+    assert parse_size("512M") == 512 * 1024**2
@@ -1,6 +1,8 @@
 import os
 
+import numpy as np
 import pytest
+from PIL import Image
 
 from videohash.collagemaker import MakeCollage
 from videohash.exceptions import CollageOfZeroFramesError
@@ -18,3 +20,38 @@ def test_all():
     image_list = ["img1", "img2", "img3"]
     with pytest.raises(FileNotFoundError):
         MakeCollage(image_list, output_path)
+
+
+def test_make(tmp_path):
+    frames = np.random.default_rng(0).integers(0, 256, (10, 144, 144, 3), np.uint8)
+
+    # 3 frames per row, the cells are 1024 / 3 pixels wide, the frames are
+    # not enlarged and are spaced out.
+    collage = MakeCollage(frames, collage_image_width=1024)
+    assert collage.image.size == (1024, 1366)
+    image = np.asarray(collage.image)
+    assert np.array_equal(image[:144, :144], frames[0])
+    assert np.array_equal(image[342:486, 342:486], frames[4])
+    assert not image[144:342].any()
+    assert not image[1026:, 342:].any()
+
+    # same collage from a list of arrays, an iterator and files
+    assert np.array_equal(np.asarray(MakeCollage(list(frames)).image), image)
+    assert np.array_equal(np.asarray(MakeCollage(iter(frames)).image), image)
+    paths = []
+    for index, frame in enumerate(frames):
+        paths.append(str(tmp_path / f"frame{index:02d}.png"))
+        Image.fromarray(frame).save(paths[-1])
+    assert np.array_equal(np.asarray(MakeCollage(paths).image), image)
+
+    # 3 frames per row of 100 pixels, the frames are downsized once
+    output_path = str(tmp_path / "collage.png")
+    small = MakeCollage(frames, output_path, collage_image_width=300)
+    assert small.image.size == (300, 400)
+    expected = np.asarray(Image.fromarray(frames[4]).resize((100, 100), Image.LANCZOS))
+    difference = np.abs(
+        np.asarray(small.image)[110:190, 110:190].astype(int)
+        - expected[10:90, 10:90].astype(int)
+    )
+    assert difference.max() == 0
+    assert np.array_equal(np.asarray(Image.open(output_path)), np.asarray(small.image))
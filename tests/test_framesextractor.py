@@ -1,9 +1,21 @@
 import os
+import sys
 
 import pytest
 
-from videohash.exceptions import FFmpegNotFound, FramesExtractorOutPutDirDoesNotExist
-from videohash.framesextractor import FramesExtractor
+from videohash.exceptions import (
+    DownloadFailed,
+    FFmpegNotFound,
+    FramesExtractorOutPutDirDoesNotExist,
+)
+from videohash.framesextractor import (
+    FramePipe,
+    FramesExtractor,
+    check_ffmpeg,
+    sample_frames,
+    sample_timestamps,
+    stream_frames,
+)
 from videohash.utils import create_and_return_temporary_directory
 
 script_path = os.path.dirname(os.path.realpath(__file__))
@@ -31,3 +43,85 @@ def test_all():
         video_path = os.path.join(script_path, "../assets/rocket.mkv")
         output_dir = os.path.join(script_path, "thisdirdoesnotexist/")
         FramesExtractor(video_path, output_dir, interval=1, ffmpeg_path=None)
+
+
+def test_stream_frames():
+    video_path = os.path.join(script_path, os.path.pardir, "assets", "rocket.mkv")
+    frames = list(stream_frames(video_path, interval=1))
+    assert len(frames) == 54
+    assert frames[0].shape == (144, 144, 3)
+
+    # the consumer may stop early, FFmpeg is killed.
+    first_frame = next(stream_frames(video_path, interval=1))
+    assert (first_frame == frames[0]).all()
+
+    with pytest.raises(FileNotFoundError):
+        next(stream_frames(os.path.join(script_path, "thisvideodoesnotexist.mp4")))
+
+
+def test_detect_crop():
+    video_path = os.path.join(script_path, os.path.pardir, "assets", "rocket.mkv")
+    ffmpeg_path = check_ffmpeg()
+
+    crop = FramesExtractor.detect_crop(video_path=video_path, ffmpeg_path=ffmpeg_path)
+    assert crop == " -vf crop=640:352:0:4 "
+
+    assert (
+        FramesExtractor.detect_crop(
+            video_path=video_path, ffmpeg_path=ffmpeg_path, duration=52.08
+        )
+        == crop
+    )
+    assert (
+        FramesExtractor.detect_crop(
+            video_path=video_path,
+            ffmpeg_path=ffmpeg_path,
+            duration=52.08,
+            single_pass=True,
+        )
+        == crop
+    )
+
+    # no offset to probe before the end of the video.
+    assert (
+        FramesExtractor.detect_crop(
+            video_path=video_path, ffmpeg_path=ffmpeg_path, duration=1.5
+        )
+        == " "
+    )
+
+
+def test_sample_frames():
+    video_path = os.path.join(script_path, os.path.pardir, "assets", "rocket.mkv")
+
+    assert sample_timestamps(52.08, 4) == ["6.510", "19.530", "32.550", "45.570"]
+
+    frames = sample_frames(video_path, frame_count=16)
+    assert len(frames) == 16
+    assert all(frame.shape == (144, 144, 3) for frame in frames)
+    again = sample_frames(video_path, frame_count=16)
+    assert all((a == b).all() for a, b in zip(frames, again))
+
+    keyframes = sample_frames(video_path, frame_count=16, keyframes_only=True)
+    assert 0 < len(keyframes) <= 16
+
+    with pytest.raises(ValueError):
+        sample_frames(video_path, frame_count=0)
+
+
+def test_frame_pipe():
+    video_path = os.path.join(script_path, os.path.pardir, "assets", "rocket.mkv")
+    source = [
+        sys.executable,
+        "-c",
+        "import shutil, sys; shutil.copyfileobj(open(sys.argv[1], 'rb'), sys.stdout.buffer)",
+        video_path,
+    ]
+
+    pipe = FramePipe(source, interval=1)
+    frames = list(pipe)
+    assert len(frames) == 54
+    assert abs(pipe.duration - 52.08) < 0.01
+
+    with pytest.raises(DownloadFailed):
+        list(FramePipe([sys.executable, "-c", "import sys; sys.exit(1)"]))
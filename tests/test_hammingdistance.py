@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from videohash.hammingdistance import (
+    bitlist_to_int,
+    find_similar,
+    hamming_distance,
+    hamming_distances,
+    popcount,
+    popcount64,
+    similarity_threshold,
+    to_uint64_array,
+)
+
+
+def test_all():
+    assert bitlist_to_int([]) == 0
+    assert bitlist_to_int([1, 0, 1, 1]) == 0b1011
+    assert bitlist_to_int([0] * 63 + [1]) == 1
+    assert bitlist_to_int([1] + [0] * 63) == 1 << 63
+
+    assert popcount(0) == 0
+    assert popcount(0xFFFFFFFFFFFFFFFF) == 64
+    assert popcount(1 << 127) == 1
+
+    assert hamming_distance(0xA9A9FFFB5EB10303, 0xA9A9FFFB5EB10303) == 0
+    assert hamming_distance(0b1011, 0b0110) == 3
+    assert hamming_distance(0, 0xFFFFFFFFFFFFFFFF) == 64
+
+
+def test_bulk(tmp_path):
+    rng = np.random.default_rng(3)
+    hashes = rng.integers(0, 2**64, size=1000, dtype=np.uint64)
+    queries = hashes[:5] ^ np.uint64(0b111)
+
+    distances = hamming_distances(queries, hashes, chunk_size=333)
+    assert distances.shape == (5, 1000)
+    assert distances.dtype == np.uint8
+    for i, query in enumerate(queries):
+        for j in (0, 1, 2, 999):
+            assert distances[i, j] == hamming_distance(int(query), int(hashes[j]))
+    assert (np.diagonal(distances) == 3).all()
+    assert (popcount64(hashes) == [popcount(int(value)) for value in hashes]).all()
+
+    single = hamming_distances("0x%x" % int(hashes[7]), hashes)
+    assert single.shape == (1000,)
+    assert single[7] == 0
+    assert (single == hamming_distances(int(hashes[7]), hashes, chunk_size=7)).all()
+
+    # the matrix of a large catalogue can be written to a file
+    out = np.memmap(tmp_path / "distances", dtype=np.uint8, mode="w+", shape=(5, 1000))
+    assert hamming_distances(queries, hashes, chunk_size=333, out=out) is out
+    assert (out == distances).all()
+    with pytest.raises(ValueError):
+        hamming_distances(queries, hashes, out=np.empty((5, 999), np.uint8))
+
+    assert similarity_threshold(15, 64) == 10
+    query_indices, hash_indices, similar_distances = find_similar(
+        queries, hashes, chunk_size=100
+    )
+    assert list(query_indices) == list(range(5))
+    assert list(hash_indices) == list(range(5))
+    assert list(similar_distances) == [3] * 5
+
+    assert to_uint64_array(["0b101", 3]).tolist() == [5, 3]
+    with pytest.raises(TypeError):
+        to_uint64_array(["101"])
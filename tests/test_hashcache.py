@@ -0,0 +1,73 @@
+import os
+import shutil
+
+from videohash import VideoHash
+from videohash.hashcache import HashCache, file_digest
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+
+
+def test_all(tmp_path):
+    video = str(tmp_path / "video.mkv")
+    shutil.copyfile(
+        os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv"), video
+    )
+    cache_path = str(tmp_path / "cache.sqlite")
+
+    videohash = VideoHash(path=video, frame_interval=3, cache=cache_path)
+    assert videohash.hash_hex == "0xa9a9fffb5eb10303"
+    videohash.delete_storage_path()
+
+    cached = VideoHash(path=video, frame_interval=3, cache=cache_path)
+    assert cached.image is None
+    assert os.listdir(cached.video_dir) == []
+    assert cached.hash == videohash.hash
+    assert cached.hash_hex == videohash.hash_hex
+    assert cached.bitlist == videohash.bitlist
+    assert cached.video_duration == videohash.video_duration
+    assert cached - videohash == 0
+    cached.delete_storage_path()
+
+    with HashCache(cache_path) as cache:
+        assert len(cache) == 1
+        digest = cache.digest(video)
+        assert digest == file_digest(video)
+        assert cache.get(digest, {"frame_interval": 1}) is None
+
+        # the file is not read again while its size and mtime are unchanged
+        stat = os.stat(video)
+        with open(video, "r+b") as f:
+            f.write(b"\0")
+        os.utime(video, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert cache.digest(video) == digest
+
+        os.utime(video, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        assert cache.digest(video) == file_digest(video) != digest
+
+
+def test_eviction(tmp_path):
+    cache = HashCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    for digest in "abc":
+        cache.put(digest, {}, "0b1", "0x1", 1.0)
+    assert len(cache) == 2
+    assert cache.get("a", {}) is None
+    assert cache.get("c", {}).video_duration == 1.0
+
+    cache.max_age = -1
+    assert cache.get("c", {}) is None
+    cache.evict()
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_max_bytes(tmp_path):
+    cache = HashCache(str(tmp_path / "cache.sqlite"), max_bytes=64 * 1024)
+    for index in range(2000):
+        cache.put(f"{index:064x}", {"frame_interval": 1}, "0b1" * 22, "0x1", 1.0)
+        assert cache.size() <= 64 * 1024
+
+    # the least recently used hash values were evicted
+    assert 0 < len(cache) < 2000
+    assert cache.get(f"{1999:064x}", {"frame_interval": 1}) is not None
+    assert cache.get(f"{0:064x}", {"frame_interval": 1}) is None
+    cache.close()
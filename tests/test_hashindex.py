@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from videohash.hammingdistance import hamming_distances
+from videohash.hashindex import HashIndex
+
+
+def brute_force(hashes, ids, query, radius=64, k=None):
+    distances = hamming_distances(query, hashes)
+    matches = sorted((int(d), int(i)) for d, i in zip(distances, ids) if d <= radius)
+    return [(i, d) for d, i in matches[:k]]
+
+
+def test_all(tmp_path):
+    rng = np.random.default_rng(3)
+    hashes = rng.integers(0, 2**63, 5000, dtype=np.uint64) * np.uint64(2)
+    # near duplicates of the first hash values
+    flips = np.uint64(1) << rng.integers(0, 64, (200, 3), dtype=np.uint64)
+    near = hashes[:200] ^ flips[:, 0] ^ flips[:, 1] ^ flips[:, 2]
+    hashes = np.concatenate([hashes, near])
+    ids = np.arange(len(hashes)) + 1000
+
+    index = HashIndex()
+    index.insert_many(hashes, ids)
+    assert len(index) == len(hashes)
+
+    for query in hashes[:20]:
+        assert index.radius_query(query, 10) == brute_force(hashes, ids, query, 10)
+        assert index.knn(query, 5) == brute_force(hashes, ids, query, k=5)
+
+    assert index.query_similar(hex(hashes[0])) == brute_force(
+        hashes, ids, hashes[0], 10
+    )
+
+    assert index.delete(1000) == 1
+    assert index.delete(1000) == 0
+    index.insert(hashes[0], 99)
+    index.insert("0x" + "f" * 16, 98)
+    assert index.radius_query(hashes[0], 0) == [(99, 0)]
+    assert index.knn(2**64 - 1, 1) == [(98, 0)]
+
+    index.save(str(tmp_path / "index"))
+    loaded = HashIndex.load(str(tmp_path / "index"))
+    assert isinstance(loaded._hashes, np.memmap)
+    assert len(loaded) == len(index) == len(hashes) + 1
+    assert loaded.radius_query(hashes[0], 0) == [(99, 0)]
+    assert loaded.knn(hashes[7], 3) == index.knn(hashes[7], 3)
+
+    assert loaded.delete(99) == 1
+    loaded.insert(hashes[0], 97)
+    assert loaded.radius_query(hashes[0], 0) == [(97, 0)]
+
+    with pytest.raises(ValueError):
+        HashIndex(bands=2)
+    with pytest.raises(ValueError):
+        index.insert(2**64, 1)
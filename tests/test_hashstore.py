@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pytest
+
+from videohash.hammingdistance import hamming_distances
+from videohash.hashindex import HashIndex
+from videohash.hashstore import HEADER_SIZE, HashStore
+from videohash.hashvalue import VideoHashValue
+
+
+def test_all(tmp_path):
+    path = str(tmp_path / "hashes.vhs")
+    store = HashStore.create(path)
+    assert len(store) == 0
+
+    values = [
+        VideoHashValue(0xA9A9FFFB5EB10303, video_duration=52.079),
+        VideoHashValue(0x7C57EFFB2EE90303),
+    ]
+    store.append(values, [1, 2])
+    assert len(store) == 2
+    assert store.value(0) == values[0]
+    assert store.value(0).video_duration == 52.079
+    assert store.value(1).video_duration is None
+
+    rng = np.random.default_rng(5)
+    hashes = rng.integers(0, 2**63, 1000, dtype=np.uint64) * np.uint64(2)
+    ids = np.arange(1000, dtype=np.uint64) + 100
+    store.append(hashes, ids, np.full(1000, 10.0))
+
+    # an interrupted append leaves an incomplete record, it is ignored
+    with open(path, "ab") as f:
+        f.write(b"\1" * 10)
+
+    opened = HashStore.open(path)
+    assert len(opened) == 1002
+    assert isinstance(opened.records, np.memmap)
+    assert np.shares_memory(opened.hashes, opened.records)
+    assert opened.hashes[0] == values[0].hash_int
+    assert np.array_equal(opened.hashes[2:], hashes)
+    assert np.array_equal(opened.ids[2:], ids)
+    assert np.array_equal(
+        hamming_distances(hashes[0], opened.hashes),
+        hamming_distances(hashes[0], [values[0].hash_int, values[1].hash_int, *hashes]),
+    )
+
+    opened.append(["0x" + "f" * 16], [7])
+    assert len(opened) == 1003
+    assert opened.value(1002).hash_int == 2**64 - 1
+    assert (os.path.getsize(path) - HEADER_SIZE) % 24 == 0
+
+    read = HashStore.open(path, mmap=False)
+    assert not isinstance(read.records, np.memmap)
+    assert np.array_equal(read.hashes, opened.hashes)
+    assert np.array_equal(read.ids, opened.ids)
+
+    index = HashIndex()
+    index.insert_many(read.hashes, read.ids)
+    assert index.radius_query(hashes[3], 0) == [(103, 0)]
+
+
+def test_errors(tmp_path):
+    path = str(tmp_path / "hashes.vhs")
+    store = HashStore.create(path, bits_in_hash=16, algorithm_version=1)
+
+    with pytest.raises(FileExistsError):
+        HashStore.create(path)
+    with pytest.raises(ValueError):
+        HashStore.create(str(tmp_path / "wide.vhs"), bits_in_hash=128)
+
+    with pytest.raises(ValueError):
+        store.append([2**16], [1])
+    with pytest.raises(ValueError):
+        store.append([1, 2], [1])
+
+    with pytest.raises(ValueError):
+        HashStore.open(path, algorithm_version=2)
+    assert HashStore.open(path, algorithm_version=None).bits_in_hash == 16
+
+    other = tmp_path / "other"
+    other.write_bytes(b"\0" * 100)
+    with pytest.raises(ValueError):
+        HashStore.open(str(other))
@@ -0,0 +1,67 @@
+import os
+import pickle
+
+import pytest
+
+from videohash import VideoHash, VideoHashValue
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+
+
+def test_all(tmp_path):
+    path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+
+    videohash = VideoHash(path=path, frame_interval=3)
+    value = videohash.to_value()
+    assert value.hash == videohash.hash
+    assert value.hash_hex == videohash.hash_hex == "0xa9a9fffb5eb10303"
+    assert value.bitlist == videohash.bitlist
+    assert value.video_duration == videohash.video_duration
+    assert value == videohash and videohash == value
+    assert value - videohash == 0 and videohash - value == 0
+    assert value.is_similar(videohash) and videohash.is_similar(value)
+    videohash.delete_storage_path()
+
+    released = VideoHash.hash_value(
+        path=path, frame_interval=3, storage_path=str(tmp_path) + os.path.sep
+    )
+    assert isinstance(released, VideoHashValue)
+    assert released == value
+    assert os.listdir(tmp_path) == []
+
+
+def test_value():
+    value = VideoHashValue.from_hex("0xa9a9fffb5eb10303", 52.079)
+    other = VideoHashValue(value.hash_int ^ 0b111, 10.0)
+
+    assert value - other == 3
+    assert value != other and value.is_similar(other)
+    assert value - "0xa9a9fffb5eb10304" == 3
+    assert value - value.bitlist == 0
+    assert value.matches(value.hash) and value.matches(value.hash_hex)
+    assert value.matches(value.bitlist) and not value.matches(other)
+    assert not value.matches(42) and not value.matches("0x1")
+    assert (value == 42) is False
+
+    # equal values have the same hash, a string is not equal to a value
+    assert value != value.hash_hex and value.hash_hex not in {value}
+
+    # hashable, equal values are the same key whatever the duration
+    assert {value: 1}[VideoHashValue(value.hash_int, 1.0)] == 1
+    assert len({value, other, VideoHashValue(other.hash_int)}) == 2
+
+    assert not hasattr(value, "__dict__")
+    with pytest.raises(AttributeError):
+        value.hash_int = 0
+
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    assert len(data) < 100
+    assert pickle.loads(data) == value
+    assert pickle.loads(data).video_duration == 52.079
+
+    with pytest.raises(ValueError):
+        VideoHashValue(1 << 64)
+    with pytest.raises(ValueError):
+        value - VideoHashValue(1, bits_in_hash=16)
+    with pytest.raises(TypeError):
+        value - 1.5
@@ -0,0 +1,74 @@
+import os
+
+import imagehash
+import numpy as np
+import pytest
+from PIL import Image
+
+from videohash import VideoHash, imagebackends
+from videohash.imagebackends import (
+    IMAGE_BACKENDS,
+    OpenCVBackend,
+    available_image_backends,
+    get_image_backend,
+    set_image_backend,
+    wavelet_hash,
+)
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+video_path = os.path.join(os.path.dirname(this_dir), "assets", "rocket.mkv")
+
+
+def test_all():
+    assert "pillow" in available_image_backends()
+    assert get_image_backend().name == "pillow"
+
+    with pytest.raises(ValueError):
+        set_image_backend("not_a_backend")
+
+    rng = np.random.default_rng(1)
+    for shape in ((1171, 1024, 3), (300, 500, 3), (64, 64, 3)):
+        image = rng.integers(0, 256, shape, np.uint8)
+        # smooth it, the hash of noise is not interesting
+        image = np.cumsum(image, axis=1, dtype=np.uint64).astype(np.uint8)
+        assert np.array_equal(
+            wavelet_hash(image), imagehash.whash(Image.fromarray(image)).hash
+        )
+
+
+# frame_interval 4 downsizes the frames of the collage
+@pytest.mark.parametrize("name", sorted(IMAGE_BACKENDS))
+def test_parity(name):
+    if name not in available_image_backends():
+        pytest.skip(f"the package of the image backend '{name}' is not installed")
+
+    reference = {
+        frame_interval: VideoHash(
+            path=video_path, frame_interval=frame_interval, in_memory=True
+        )
+        for frame_interval in (1, 4)
+    }
+
+    set_image_backend(name)
+    try:
+        for frame_interval, expected in reference.items():
+            videohash = VideoHash(
+                path=video_path, frame_interval=frame_interval, in_memory=True
+            )
+            assert videohash.hash_hex == expected.hash_hex
+            videohash.delete_storage_path()
+    finally:
+        set_image_backend("pillow")
+        for videohash in reference.values():
+            videohash.delete_storage_path()
+
+
+def test_cache_key(monkeypatch):
+    frames = [np.zeros((144, 144, 3), np.uint8)] * 4
+    videohash = VideoHash.from_frames(frames)
+    assert "image_backend" not in videohash._hash_parameters()
+
+    # the hash values of another backend are cached separately
+    monkeypatch.setattr(imagebackends, "_image_backend", OpenCVBackend())
+    assert videohash._hash_parameters()["image_backend"] == "opencv"
+    videohash.delete_storage_path()
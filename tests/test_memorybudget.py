@@ -0,0 +1,74 @@
+import os
+import tracemalloc
+
+import pytest
+
+from videohash import VideoHash
+from videohash.memorybudget import (
+    BASE_MEMORY,
+    MEMORY_PER_FRAME,
+    FrameDecimator,
+    MemoryTracker,
+    budget_frame_count,
+    frames_within_budget,
+)
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+video_path = os.path.join(os.path.dirname(this_dir), "assets", "rocket.mkv")
+
+
+def test_all():
+    budget = BASE_MEMORY + 20 * MEMORY_PER_FRAME
+    assert frames_within_budget(budget) == 20
+    with pytest.raises(ValueError):
+        frames_within_budget(BASE_MEMORY)
+    with pytest.raises(ValueError):
+        VideoHash(path=video_path, max_memory=1024)
+
+    assert budget_frame_count(None, 3600, 1) is None
+    assert budget_frame_count(budget, 10, 1) is None
+    assert budget_frame_count(budget, 3600, 1) == 20
+    assert budget_frame_count(budget, 3600, 1, frame_count=8) == 8
+
+    decimator = FrameDecimator(10)
+    frames = decimator.add_frames(range(100))
+    assert len(frames) <= 10
+    assert frames == list(range(0, 100, decimator.stride))
+    assert FrameDecimator().add_frames(range(100)) == list(range(100))
+
+    # 54 frames at the frame_interval do not fit, 20 frames are sampled
+    videohash = VideoHash(path=video_path, max_memory=budget)
+    assert 0 < videohash.peak_memory <= budget
+    sampled = VideoHash(path=video_path, frame_count=20)
+    assert videohash.hash_hex == sampled.hash_hex
+    assert sampled.peak_memory is None
+
+    again = VideoHash(path=video_path, max_memory=budget, in_memory=True)
+    assert again.hash_hex == videohash.hash_hex
+
+    # the frames fit, the hash value is the same as without budget
+    large = VideoHash(path=video_path, max_memory=BASE_MEMORY + 100 * MEMORY_PER_FRAME)
+    assert large.hash_hex == VideoHash(path=video_path).hash_hex
+    assert large.peak_memory > 0
+
+    for instance in (videohash, sampled, again, large):
+        instance.delete_storage_path()
+
+
+def test_overlapping_trackers():
+    assert not tracemalloc.is_tracing()
+
+    # the trackers of concurrent tasks enter and exit in any order
+    outer = MemoryTracker().__enter__()
+    first = bytearray(4 * 1024 * 1024)
+    inner = MemoryTracker().__enter__()
+    second = bytearray(2 * 1024 * 1024)
+    del first
+    outer.__exit__(None, None, None)
+    assert tracemalloc.is_tracing()
+    inner.__exit__(None, None, None)
+    del second
+
+    assert not tracemalloc.is_tracing()
+    assert outer.peak >= 6 * 10**6
+    assert inner.peak >= 2 * 10**6
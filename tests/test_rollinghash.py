@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from videohash import RollingVideoHash, VideoHash
+from videohash.exceptions import CollageOfZeroFramesError
+from videohash.framesextractor import stream_frames
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+
+
+def test_all():
+    path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+    frames = list(stream_frames(path, interval=1))
+
+    rolling = RollingVideoHash(frame_interval=1)
+    with pytest.raises(CollageOfZeroFramesError):
+        rolling.provisional_hash()
+
+    rolling.add_frames(frames[:10])
+    provisional = rolling.provisional_hash()
+    assert rolling.provisional_hash() is provisional
+    assert provisional.video_duration == 10
+    assert provisional.hash == VideoHash.from_frames(frames[:10]).hash
+    assert not os.path.exists(provisional.storage_path)
+
+    # raw bytes in chunks that do not end on frame boundaries
+    data = b"".join(frame.tobytes() for frame in frames[10:])
+    for start in range(0, len(data), 10000):
+        rolling.add_chunk(data[start : start + 10000])
+    assert len(rolling) == len(frames)
+
+    final = rolling.finalize(video_duration=52.079)
+    expected = VideoHash(path=path, in_memory=True)
+    assert final.hash == expected.hash
+    assert final.video_duration == expected.video_duration
+
+    with pytest.raises(ValueError):
+        rolling.add_frame(frames[0])
+
+    final.delete_storage_path()
+    expected.delete_storage_path()
@@ -0,0 +1,43 @@
+import os
+
+from videohash import VideoHash
+from videohash.framesextractor import stream_frames
+from videohash.segmenthash import (
+    match_segments,
+    segment_hashes,
+    segment_hashes_of_frames,
+)
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+
+
+def test_all():
+    path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+
+    reference = segment_hashes(path, window=10, step=1)
+    assert len(reference) == 45
+    assert reference[3].start == 3 and reference[3].end == 13
+
+    frames = list(stream_frames(path))
+    assert reference[3].hash_int == VideoHash.from_frames(frames[3:13]).hash_int
+
+    # a clip of the frames 20 to 49 of the video
+    query = segment_hashes_of_frames(frames[20:50], window=10)
+    assert [segment.start for segment in query] == [0, 10, 20]
+
+    best = match_segments(query, reference, stride=10)[0]
+    assert best.query_start == 0
+    assert best.reference_start == 20
+    assert best.length == 3
+    assert best.distance == 0
+
+
+def test_match_segments():
+    reference = [0x0, 0xFFFF, 0xFF00FF, 0xFFFF0000, 0xFFFFFFFF0000, 0xF0F0F0]
+    query = [0xFF00FF, 0xFFFF0001, 0xFFFFFFFF0000]
+
+    matches = match_segments(query, reference, max_distance=1)
+    assert matches[0] == (0, 2, 3, 1 / 3)
+
+    assert match_segments(query, reference, max_distance=1, min_length=4) == []
+    assert match_segments([], reference) == []
@@ -0,0 +1,47 @@
+import os
+
+from videohash import VideoHash, add_timing_hook, remove_timing_hook
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+
+
+def test_all():
+    path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+
+    received = []
+    process_wide = []
+
+    def failing_hook(timing):
+        raise RuntimeError("the hash value is still computed")
+
+    add_timing_hook(process_wide.append)
+    add_timing_hook(failing_hook)
+    try:
+        videohash = VideoHash(path=path, frame_interval=3, timing_hook=received.append)
+    finally:
+        remove_timing_hook(process_wide.append)
+        remove_timing_hook(failing_hook)
+
+    assert videohash.hash_hex == "0xa9a9fffb5eb10303"
+    assert list(videohash.timings) == [
+        "copy",
+        "probe",
+        "crop_detection",
+        "extraction",
+        "collage",
+        "dominant_colors",
+        "hash",
+    ]
+    assert received == list(videohash.timings.values())
+    assert process_wide == received
+
+    timings = videohash.timings
+    assert timings["crop_detection"].subprocesses >= 1
+    assert timings["extraction"].subprocesses >= 1
+    assert timings["collage"].subprocesses == 0
+    for timing in timings.values():
+        assert timing.wall_time >= 0 and timing.cpu_time >= 0
+    if os.path.exists("/proc/self/io"):
+        assert timings["extraction"].bytes_read is not None
+
+    videohash.delete_storage_path()
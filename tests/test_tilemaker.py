@@ -0,0 +1,83 @@
+import os
+from collections import Counter
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from videohash.tilemaker import (
+    concatenate_frames_horizontally,
+    dominant_colors_of_frames,
+    dominant_colors_of_tiles,
+)
+
+
+def dominant_color_of_tile(tile):
+    # reference implementation, the algorithm of imagedominantcolor's DominantColor
+    resized = Image.fromarray(tile).resize((16, 16), Image.Resampling.LANCZOS)
+    counter = Counter()
+    for r, g, b in resized.getdata():
+        if r > g and r > b:
+            counter["r"] += 1
+        elif g > b and g > r:
+            counter["g"] += 1
+        elif b > r and b > g:
+            counter["b"] += 1
+        else:
+            counter["l"] += 1
+
+    if counter["l"] >= max(counter["r"], counter["g"], counter["b"]):
+        return "l"
+    mpd = int(256 * 0.1)
+    for color, others in (("r", "gb"), ("g", "br"), ("b", "rg")):
+        if all(counter[color] - mpd > counter[other] for other in others):
+            return color
+    return "n"
+
+
+def test_dominant_colors_of_tiles():
+    rng = np.random.default_rng(7)
+    frames = [
+        np.kron(rng.integers(0, 256, (6, 6, 3)), np.ones((24, 24, 1))).astype(np.uint8)
+        for _ in range(11)
+    ]
+    strip = concatenate_frames_horizontally(frames)
+    assert strip.shape == (144, 144 * 11, 3)
+
+    tile_w, tile_h = strip.shape[1] // 8, strip.shape[0] // 8
+    expected = [
+        dominant_color_of_tile(strip[y : y + tile_h, x : x + tile_w].copy(order="C"))
+        for y in range(0, 8 * tile_h, tile_h)
+        for x in range(0, 8 * tile_w, tile_w)
+    ]
+    assert dominant_colors_of_tiles(strip) == expected
+
+    red_frames = [np.full((144, 144, 3), (200, 10, 10), dtype=np.uint8)] * 3
+    assert (
+        dominant_colors_of_tiles(concatenate_frames_horizontally(red_frames))
+        == ["r"] * 64
+    )
+
+    with pytest.raises(ValueError):
+        dominant_colors_of_tiles(strip, number_tiles=1)
+
+
+def test_dominant_colors_of_frames(tmp_path):
+    rng = np.random.default_rng(11)
+    # 13 frames, the borders of the tiles are inside the frames
+    frames = [
+        np.kron(rng.integers(0, 256, (6, 6, 3)), np.ones((24, 24, 1))).astype(np.uint8)
+        for _ in range(13)
+    ]
+    expected = dominant_colors_of_tiles(concatenate_frames_horizontally(frames))
+    assert dominant_colors_of_frames(frames) == expected
+
+    for index, frame in enumerate(frames):
+        Image.fromarray(frame).save(tmp_path / f"frame{index:02d}.png")
+    assert dominant_colors_of_frames(str(tmp_path) + os.path.sep) == expected
+
+    # many frames, a tile spans several frames
+    frames = [frames[index % 13] for index in range(300)]
+    assert dominant_colors_of_frames(frames) == dominant_colors_of_tiles(
+        concatenate_frames_horizontally(frames)
+    )
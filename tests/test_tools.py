@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from videohash.exceptions import FFmpegError, FFmpegNotFound
+from videohash.framesextractor import check_ffmpeg
+from videohash.tools import ToolRegistry, get_tool, refresh_tools, set_tool_path
+from videohash.utils import subprocess_count
+
+
+def test_all():
+    refresh_tools()
+    ffmpeg = get_tool("ffmpeg")
+    assert ffmpeg.version.startswith("ffmpeg version")
+    assert ffmpeg.has_filter("cropdetect")
+    assert ffmpeg.has_filter("scale")
+    assert not ffmpeg.has_filter("not_a_filter")
+    assert isinstance(ffmpeg.hwaccels, tuple)
+
+    # checked once per process
+    count = subprocess_count()
+    assert get_tool("ffmpeg") is ffmpeg
+    assert check_ffmpeg() == ffmpeg.path
+    assert check_ffmpeg(ffmpeg.path) == ffmpeg.path
+    assert subprocess_count() == count
+
+    refresh_tools("ffmpeg")
+    assert get_tool("ffmpeg") is not ffmpeg
+    assert subprocess_count() == count + 1
+
+    assert get_tool("ffprobe").version.startswith("ffprobe version")
+
+
+@pytest.mark.skipif(os.name != "posix", reason="the fake programs are shell scripts")
+def test_overrides(tmp_path, monkeypatch):
+    registry = ToolRegistry()
+
+    fake = tmp_path / "ffmpeg"
+    fake.write_text("#!/bin/sh\necho 'not ffmpeg'\n")
+    fake.chmod(0o755)
+
+    registry.set_path("ffmpeg", str(fake))
+    assert registry.locate("ffmpeg") == str(fake)
+    with pytest.raises(FFmpegError):
+        registry.get("ffmpeg")
+    registry.set_path("ffmpeg", None)
+    assert registry.locate("ffmpeg") != str(fake)
+
+    with pytest.raises(FFmpegNotFound):
+        registry.get("ffmpeg", str(tmp_path / "missing"))
+
+    # the lookups in the system path depend on PATH
+    monkeypatch.setenv("PATH", str(tmp_path))
+    with pytest.raises(FFmpegNotFound):
+        registry.locate("yt-dlp")
+    yt_dlp = tmp_path / "yt-dlp"
+    yt_dlp.write_text("#!/bin/sh\necho 2024.01.01\n")
+    yt_dlp.chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path) + os.pathsep)
+    assert registry.get("yt-dlp").version == "2024.01.01"
+    assert registry.get("yt-dlp").filters == frozenset()
+
+    # set_tool_path overrides the path for every module
+    set_tool_path("ffmpeg", str(fake))
+    try:
+        with pytest.raises(FFmpegError):
+            check_ffmpeg()
+    finally:
+        set_tool_path("ffmpeg", None)
@@ -1,4 +1,6 @@
+import asyncio
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 import pytest
 
@@ -142,3 +144,200 @@ def test_all():
             create_and_return_temporary_directory(), "file_extension_less_video"
         )
         VideoHash(path=path)
+
+
+def test_in_memory():
+    path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+    videohash = VideoHash(path=path, frame_interval=3, in_memory=True)
+    assert videohash.hash_hex == "0xa9a9fffb5eb10303"
+    assert videohash.hash_int == 0xA9A9FFFB5EB10303
+    assert videohash - "0xa9a9fffb5eb10302" == 1
+    assert videohash - ("0b" + "0" * 64) == 36
+    assert videohash == videohash.bitlist
+    assert videohash.is_similar("0xa9a9fffb5eb1030c")
+    assert not videohash.is_similar("0x0")
+
+    with pytest.raises(ValueError):
+        _ = videohash - "0x1a9a9fffb5eb10303"
+    assert os.listdir(videohash.frames_dir) == []
+    videohash.delete_storage_path()
+
+
+def test_hash_many():
+    path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+    missing_path = os.path.join(this_dir, "thisvideodoesnotexist.mkv")
+    sources = [path, missing_path, path]
+
+    results = list(
+        VideoHash.hash_many(sources, workers=2, ffmpeg_workers=1, frame_interval=3)
+    )
+    assert [result.source for result in results] == sources
+    assert results[0].hash_hex == results[2].hash_hex == "0xa9a9fffb5eb10303"
+    assert results[0].error is None
+    assert isinstance(results[1].error, FileNotFoundError)
+    assert results[1].hash is None
+
+    results = list(VideoHash.hash_many(sources, workers=2, ordered=False))
+    assert sorted(result.position for result in results) == [0, 1, 2]
+
+
+def test_hash_many_lazy(tmp_path):
+    missing_path = os.path.join(this_dir, "thisvideodoesnotexist.mkv")
+    consumed = []
+
+    def sources():
+        while True:
+            consumed.append(missing_path)
+            yield missing_path
+
+    # the sources are consumed as needed, closing the generator stops the batch
+    storage_path = str(tmp_path) + os.path.sep
+    for result in VideoHash.hash_many(sources(), workers=1, storage_path=storage_path):
+        assert isinstance(result.error, FileNotFoundError)
+        break
+    assert len(consumed) <= 3
+
+    # the directories of the failed instances are deleted
+    assert os.listdir(storage_path) == []
+
+
+def test_input_mode(tmp_path):
+    path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+
+    videohash = VideoHash(path=path, frame_interval=3, input_mode="in_place")
+    assert videohash.video_path == os.path.abspath(path)
+    assert os.listdir(videohash.video_dir) == []
+    assert videohash.hash_hex == "0xa9a9fffb5eb10303"
+    videohash.delete_storage_path()
+    assert os.path.isfile(path)
+
+    storage_path = str(tmp_path) + os.path.sep
+    videohash = VideoHash(
+        path=path, storage_path=storage_path, frame_interval=3, input_mode="link"
+    )
+    assert os.path.samefile(videohash.video_path, path) == (
+        os.stat(path).st_dev == os.stat(storage_path).st_dev
+    )
+    assert videohash.hash_hex == "0xa9a9fffb5eb10303"
+    videohash.delete_storage_path()
+    assert os.path.isfile(path)
+
+    with pytest.raises(ValueError):
+        VideoHash(path=path, input_mode="move")
+    with pytest.raises(FileNotFoundError):
+        VideoHash(path=path + ".missing.mkv", input_mode="in_place")
+
+
+def test_frame_count():
+    path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+
+    videohash = VideoHash(path=path, frame_count=32)
+    assert os.listdir(videohash.frames_dir) == []
+    again = VideoHash(path=path, frame_count=32)
+    assert videohash.hash == again.hash
+
+    async_videohash = asyncio.run(VideoHash.create_async(path=path, frame_count=32))
+    assert async_videohash.hash == videohash.hash
+
+    for instance in (videohash, again, async_videohash):
+        instance.delete_storage_path()
+
+
+def child_processes():
+    children = []
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # the name may contain spaces, the ppid follows its ')'
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == os.getpid():
+            children.append(int(pid))
+    return children
+
+
+def test_create_async(tmp_path):
+    path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+
+    async def hash_both():
+        semaphore = asyncio.Semaphore(2)
+        return await asyncio.gather(
+            VideoHash.create_async(path=path, frame_interval=3, semaphore=semaphore),
+            VideoHash.create_async(
+                path=path,
+                frame_interval=3,
+                in_memory=True,
+                semaphore=semaphore,
+                cache=str(tmp_path / "cache.sqlite"),
+            ),
+        )
+
+    for videohash in asyncio.run(hash_both()):
+        assert videohash.hash_hex == "0xa9a9fffb5eb10303"
+        assert abs(videohash.video_duration - 52.08) < 0.01
+        videohash.delete_storage_path()
+
+    cached = asyncio.run(
+        VideoHash.create_async(
+            path=path,
+            frame_interval=3,
+            in_memory=True,
+            cache=str(tmp_path / "cache.sqlite"),
+        )
+    )
+    assert cached.image is None
+    assert cached.hash_hex == "0xa9a9fffb5eb10303"
+    cached.delete_storage_path()
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(VideoHash.create_async(path=path + ".missing.mkv"))
+
+    # the work updates the instance, a copy in another process would not
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(TypeError):
+            asyncio.run(VideoHash.create_async(path=path, executor=executor))
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+def test_create_async_cancel():
+    path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+
+    async def cancel():
+        task = asyncio.ensure_future(
+            VideoHash.create_async(path=path, frame_interval=30)
+        )
+        while not child_processes():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel())
+    assert child_processes() == []
+
+
+@pytest.mark.skipif(os.name != "posix", reason="the fake yt-dlp is a shell script")
+def test_streaming(tmp_path, monkeypatch):
+    path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+
+    # a yt-dlp that writes the video to its stdout, whatever the url
+    yt_dlp = tmp_path / "yt-dlp"
+    yt_dlp.write_text(f'#!/bin/sh\nexec cat "{os.path.abspath(path)}"\n')
+    yt_dlp.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+    url = "https://example.com/rocket.mkv"
+    videohash = VideoHash(url=url, frame_interval=3, streaming=True)
+    assert os.listdir(videohash.video_dir) == []
+    assert os.listdir(videohash.video_download_dir) == []
+    assert abs(videohash.video_duration - 52.08) < 0.01
+    assert videohash.is_similar(VideoHash(path=path, frame_interval=3))
+
+    async_videohash = asyncio.run(
+        VideoHash.create_async(url=url, frame_interval=3, streaming=True)
+    )
+    assert async_videohash.hash == videohash.hash
+
+    with pytest.raises(ValueError):
+        VideoHash(url=url, streaming=True, frame_count=8)
@@ -0,0 +1,55 @@
+import json
+import os
+
+import pytest
+
+from videohash.exceptions import FFmpegError
+from videohash.videoprobe import parse_ffprobe_output, probe_video
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+
+
+def test_probe_video():
+    video_path = os.path.join(this_dir, os.path.pardir, "assets", "rocket.mkv")
+
+    metadata = probe_video(video_path)
+    assert abs(metadata.duration - 52.08) < 0.01
+    assert abs(metadata.fps - 19001 / 317) < 1e-9
+    assert (metadata.width, metadata.height) == (640, 360)
+    assert metadata.codec == "vp9"
+    assert metadata.rotation == 0
+    assert metadata.frame_count == round(metadata.duration * metadata.fps)
+    assert probe_video(video_path) is metadata
+
+    with pytest.raises(FileNotFoundError):
+        probe_video(os.path.join(this_dir, "thisvideodoesnotexist.mkv"))
+
+    with pytest.raises(FFmpegError):
+        probe_video(os.path.realpath(__file__))
+
+
+def test_parse_ffprobe_output():
+    output = {
+        "streams": [
+            {
+                "codec_type": "video",
+                "codec_name": "h264",
+                "width": 1920,
+                "height": 1080,
+                "avg_frame_rate": "0/0",
+                "r_frame_rate": "30000/1001",
+                "nb_frames": "107892000",
+                "side_data_list": [{"rotation": -90}],
+            }
+        ],
+        # longer than 999 hours
+        "format": {"duration": "3600000.000000"},
+    }
+    metadata = parse_ffprobe_output(json.dumps(output))
+    assert metadata.duration == 3600000
+    assert abs(metadata.fps - 29.97) < 0.01
+    assert metadata.rotation == 90
+    assert metadata.frame_count == 107892000
+
+    with pytest.raises(FFmpegError):
+        parse_ffprobe_output(json.dumps({"format": {}}))
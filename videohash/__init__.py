@@ -95,5 +95,19 @@ from .exceptions import (
     StoragePathDoesNotExist,
     VideoHashError,
 )
+from .hashcache import HashCache
+from .hashindex import HashIndex
+from .hashstore import HashStore
+from .hashvalue import VideoHashValue
+from .imagebackends import (
+    available_image_backends,
+    get_image_backend,
+    set_image_backend,
+)
+from .rollinghash import RollingVideoHash
+from .segmenthash import SegmentHash, SegmentMatch, match_segments, segment_hashes
+from .stagetimings import StageTiming, add_timing_hook, remove_timing_hook
+from .tools import ToolInfo, get_tool, refresh_tools, set_tool_path, tool_path
 from .videoduration import video_duration
-from .videohash import VideoHash
+from .videohash import VideoHash, VideoHashResult
+from .videoprobe import VideoMetadata, probe_video
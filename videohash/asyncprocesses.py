@@ -0,0 +1,489 @@
+import asyncio
+import os
+from subprocess import PIPE
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .downloader import download_command, find_yt_dlp, streaming_download_command
+from .exceptions import DownloadFailed, FFmpegError, FFmpegFailedToExtractFrames
+from .framesextractor import (
+    DEFAULT_SAMPLE_FRAMES,
+    FRAME_SIZE,
+    crop_argument,
+    crop_detect_offsets,
+    cropdetect_command,
+    extract_command,
+    parse_crops,
+    parse_duration,
+    pipe_command,
+    sample_command,
+    sample_timestamps,
+    stream_command,
+)
+from .tools import tool_path
+from .memorybudget import FrameDecimator
+from .utils import count_subprocess, get_list_of_all_files_in_dir
+from .videoprobe import VideoMetadata, ffprobe_command, parse_ffprobe_output
+
+# asyncio versions of the FFmpeg, ffprobe and yt-dlp runs of the
+# framesextractor, videoprobe and downloader modules, used by
+# VideoHash.create_async. They run the same commands with
+# asyncio.create_subprocess_exec instead of blocking on Popen.communicate.
+#
+# Every function accepts an optional asyncio.Semaphore, every child process
+# holds a slot of the semaphore while it runs. Without a semaphore the
+# crop detection and the sampling run at most 4 FFmpeg processes at the same
+# time, as the thread pools of framesextractor. If the calling task is
+# cancelled the child processes are killed.
+
+
+def find_tool(name: str, path: Optional[str] = None) -> str:
+    """
+    Path of an executable, from the path argument or the system path. Does
+    not run the executable, so that it does not block the event loop. The
+    lookups are shared with the other modules, see tools.tool_path.
+
+    :param name: Name of the executable, e.g. 'ffmpeg'.
+
+    :param path: Path of the executable if not in path.
+
+    :return: The path of the executable.
+
+    :rtype: str
+
+    :raises FFmpegNotFound: If the executable is not found.
+    """
+    return tool_path(name, path)
+
+
+class _Slot:
+    """
+    Async context manager holding a slot of the semaphore, if any.
+    """
+
+    def __init__(self, semaphore: Optional[asyncio.Semaphore]) -> None:
+        self.semaphore = semaphore
+
+    async def __aenter__(self) -> None:
+        if self.semaphore is not None:
+            await self.semaphore.acquire()
+
+    async def __aexit__(self, *args: object) -> None:
+        if self.semaphore is not None:
+            self.semaphore.release()
+
+
+async def _kill(process: asyncio.subprocess.Process) -> None:
+    """
+    Kill the process if it is still running and reap it.
+    """
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+    await process.wait()
+
+
+async def _spawn(command: Sequence[str], **kwargs: Any) -> asyncio.subprocess.Process:
+    """
+    Start a child process with asyncio.create_subprocess_exec. If the task is
+    cancelled while the process is being started, the start is awaited
+    anyway and the process is killed and reaped before the cancellation is
+    raised, no child is left running.
+    """
+    spawn = asyncio.ensure_future(asyncio.create_subprocess_exec(*command, **kwargs))
+    try:
+        process = await asyncio.shield(spawn)
+    except asyncio.CancelledError:
+        while not spawn.done():
+            try:
+                await asyncio.shield(spawn)
+            except asyncio.CancelledError:
+                continue
+            except Exception:
+                break
+        if not spawn.cancelled() and spawn.exception() is None:
+            await asyncio.shield(_kill(spawn.result()))
+        raise
+
+    count_subprocess()
+    return process
+
+
+async def run_process(
+    command: Sequence[str], semaphore: Optional[asyncio.Semaphore] = None
+) -> Tuple[int, bytes, bytes]:
+    """
+    Run a command and collect its output. The process is killed if the task
+    is cancelled.
+
+    :param command: The executable and its arguments.
+
+    :param semaphore: Limits the number of child processes running at the
+                      same time.
+
+    :return: The return code, the stdout and the stderr of the process.
+
+    :rtype: Tuple[int, bytes, bytes]
+    """
+    async with _Slot(semaphore):
+        process = await _spawn(command, stdout=PIPE, stderr=PIPE)
+        try:
+            output, error = await process.communicate()
+        finally:
+            await _kill(process)
+
+    return int(process.returncode or 0), output, error
+
+
+async def probe_video_async(
+    video_path: str,
+    ffprobe_path: Optional[str] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> VideoMetadata:
+    """
+    Read the metadata of a video with ffprobe, see videoprobe.probe_video.
+
+    :rtype: VideoMetadata
+
+    :raises FileNotFoundError: If no file is found at video_path.
+
+    :raises FFmpegError: If ffprobe could not read the video.
+    """
+    if not os.path.isfile(video_path):
+        raise FileNotFoundError(f"No video found at '{video_path}'.")
+
+    returncode, output, error = await run_process(
+        ffprobe_command(video_path, find_tool("ffprobe", ffprobe_path)), semaphore
+    )
+    if returncode != 0:
+        raise FFmpegError(
+            f"ffprobe failed to read '{video_path}'.\n{error.decode(errors='replace')}"
+        )
+
+    return parse_ffprobe_output(output.decode(errors="replace"))
+
+
+async def detect_crop_async(
+    video_path: str,
+    frames: int = 3,
+    ffmpeg_path: Optional[str] = None,
+    duration: Optional[float] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    workers: int = 4,
+) -> str:
+    """
+    Detect the crop that removes the black bars, see
+    FramesExtractor.detect_crop. The offsets are probed concurrently.
+
+    :param workers: Number of FFmpeg processes probing the offsets at the
+                    same time if no semaphore is passed.
+
+    :return: FFmpeg argument -vf filter and confromable crop parameter.
+
+    :rtype: str
+    """
+    ffmpeg_path = find_tool("ffmpeg", ffmpeg_path)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(workers)
+
+    async def cropdetect(start_time: int) -> List[str]:
+        _, output, error = await run_process(
+            cropdetect_command(video_path, start_time, frames, ffmpeg_path),
+            semaphore,
+        )
+        return parse_crops(output.decode() + error.decode())
+
+    # gather keeps the order of the start times, the mode of the crops is
+    # the same as if they were probed one by one.
+    crops = await asyncio.gather(
+        *(cropdetect(start_time) for start_time in crop_detect_offsets(duration))
+    )
+
+    return crop_argument([match for matches in crops for match in matches])
+
+
+async def extract_frames_async(
+    video_path: str,
+    output_dir: str,
+    interval: Union[int, float] = 1,
+    ffmpeg_path: Optional[str] = None,
+    duration: Optional[float] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> None:
+    """
+    Save the frames as JPEG files in output_dir, see FramesExtractor.
+
+    :return: None
+
+    :rtype: NoneType
+
+    :raises FFmpegFailedToExtractFrames: If FFmpeg could not extract any frame.
+    """
+    ffmpeg_path = find_tool("ffmpeg", ffmpeg_path)
+    crop = await detect_crop_async(
+        video_path, ffmpeg_path=ffmpeg_path, duration=duration, semaphore=semaphore
+    )
+
+    command = extract_command(video_path, output_dir, crop, interval, ffmpeg_path)
+    _, output, error = await run_process(command, semaphore)
+
+    if len(os.listdir(output_dir)) == 0:
+        raise FFmpegFailedToExtractFrames(
+            f"FFmpeg could not extract any frames.\n{command}\n"
+            + f"{output.decode(errors='replace')}\n{error.decode(errors='replace')}"
+        )
+
+
+async def stream_frames_async(
+    video_path: str,
+    interval: Union[int, float] = 1,
+    ffmpeg_path: Optional[str] = None,
+    duration: Optional[float] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> List[np.ndarray]:
+    """
+    Read the frames as raw RGB pixels from the stdout of FFmpeg, see
+    framesextractor.stream_frames.
+
+    :return: The frames, arrays of shape (144, 144, 3) and dtype uint8.
+
+    :rtype: List[numpy.ndarray]
+
+    :raises FFmpegFailedToExtractFrames: If FFmpeg could not extract any frame.
+    """
+    if not os.path.isfile(video_path):
+        raise FileNotFoundError(
+            f"No video found at '{video_path}' for frame extraction."
+        )
+
+    ffmpeg_path = find_tool("ffmpeg", ffmpeg_path)
+    crop = await detect_crop_async(
+        video_path, ffmpeg_path=ffmpeg_path, duration=duration, semaphore=semaphore
+    )
+    command = stream_command(video_path, crop, interval, ffmpeg_path)
+
+    frame_bytes = FRAME_SIZE * FRAME_SIZE * 3
+    frames: List[np.ndarray] = []
+
+    async with _Slot(semaphore):
+        process = await _spawn(command, stdout=PIPE, stderr=PIPE)
+        # keeps the stderr pipe of FFmpeg from filling up
+        stderr_reader = asyncio.ensure_future(process.stderr.read())  # type: ignore
+        try:
+            while True:
+                try:
+                    buffer = await process.stdout.readexactly(  # type: ignore
+                        frame_bytes
+                    )
+                except asyncio.IncompleteReadError:
+                    break
+
+                frames.append(
+                    np.frombuffer(buffer, dtype=np.uint8).reshape(
+                        FRAME_SIZE, FRAME_SIZE, 3
+                    )
+                )
+        finally:
+            await _kill(process)
+            # the pipe is closed once FFmpeg exits
+            error = await stderr_reader
+
+    if not frames:
+        raise FFmpegFailedToExtractFrames(
+            "FFmpeg could not extract any frames.\n"
+            + f"{command}\n{error.decode(errors='replace')}"
+        )
+
+    return frames
+
+
+async def sample_frames_async(
+    video_path: str,
+    frame_count: int = DEFAULT_SAMPLE_FRAMES,
+    ffmpeg_path: Optional[str] = None,
+    duration: Optional[float] = None,
+    keyframes_only: bool = False,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    workers: int = 4,
+) -> List[np.ndarray]:
+    """
+    Take frame_count frames spread evenly over the video by seeking, see
+    framesextractor.sample_frames.
+
+    :param workers: Number of FFmpeg processes running at the same time if
+                    no semaphore is passed.
+
+    :return: The frames, arrays of shape (144, 144, 3) and dtype uint8.
+
+    :rtype: List[numpy.ndarray]
+
+    :raises FFmpegFailedToExtractFrames: If FFmpeg could not extract any frame.
+    """
+    if frame_count < 1:
+        raise ValueError("frame_count must be a positive integer.")
+
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(workers)
+
+    if duration is None:
+        duration = (await probe_video_async(video_path, semaphore=semaphore)).duration
+
+    ffmpeg_path = find_tool("ffmpeg", ffmpeg_path)
+    crop = await detect_crop_async(
+        video_path, ffmpeg_path=ffmpeg_path, duration=duration, semaphore=semaphore
+    )
+
+    commands = [
+        sample_command(video_path, timestamp, crop, ffmpeg_path, keyframes_only)
+        for timestamp in sample_timestamps(duration, frame_count)
+    ]
+    outputs = await asyncio.gather(
+        *(run_process(command, semaphore) for command in commands)
+    )
+
+    frame_bytes = FRAME_SIZE * FRAME_SIZE * 3
+    frames = [
+        np.frombuffer(output[:frame_bytes], dtype=np.uint8).reshape(
+            FRAME_SIZE, FRAME_SIZE, 3
+        )
+        for _, output, _ in outputs
+        if len(output) >= frame_bytes
+    ]
+
+    if not frames:
+        raise FFmpegFailedToExtractFrames(
+            f"FFmpeg could not extract any frames.\n{commands[0]}"
+        )
+
+    return frames
+
+
+async def stream_url_frames_async(
+    url: str,
+    interval: Union[int, float] = 1,
+    worst: bool = True,
+    yt_dlp_path: Optional[str] = None,
+    ffmpeg_path: Optional[str] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    max_frames: Optional[int] = None,
+) -> Tuple[List[np.ndarray], float]:
+    """
+    Read the frames of the video at url while yt-dlp downloads it, yt-dlp
+    writes the video to the stdin of FFmpeg. See framesextractor.FramePipe,
+    the frames are not cropped.
+
+    :param max_frames: Maximum number of frames kept, see
+                       memorybudget.FrameDecimator. None for no limit.
+
+    :return: The frames, arrays of shape (144, 144, 3) and dtype uint8, and
+             the duration of the video in seconds.
+
+    :rtype: Tuple[List[numpy.ndarray], float]
+
+    :raises DownloadFailed: If yt-dlp failed and FFmpeg got no frame.
+
+    :raises FFmpegFailedToExtractFrames: If FFmpeg could not extract any frame.
+    """
+    source_command = streaming_download_command(
+        find_yt_dlp(yt_dlp_path), url, worst=worst
+    )
+    command = pipe_command(interval, find_tool("ffmpeg", ffmpeg_path))
+
+    frame_bytes = FRAME_SIZE * FRAME_SIZE * 3
+    decimator = FrameDecimator(max_frames)
+
+    async with _Slot(semaphore):
+        read_end, write_end = os.pipe()
+        try:
+            try:
+                source = await _spawn(source_command, stdout=write_end, stderr=PIPE)
+            except FileNotFoundError:
+                raise DownloadFailed(
+                    f"yt-dlp not found, can not download the video at '{url}'."
+                )
+            try:
+                process = await _spawn(
+                    command, stdin=read_end, stdout=PIPE, stderr=PIPE
+                )
+            except BaseException:
+                await _kill(source)
+                raise
+        finally:
+            # the children hold their own copies of the pipe
+            os.close(read_end)
+            os.close(write_end)
+
+        source_reader = asyncio.ensure_future(source.stderr.read())  # type: ignore
+        ffmpeg_reader = asyncio.ensure_future(process.stderr.read())  # type: ignore
+        try:
+            while True:
+                try:
+                    buffer = await process.stdout.readexactly(  # type: ignore
+                        frame_bytes
+                    )
+                except asyncio.IncompleteReadError:
+                    break
+
+                decimator.add(
+                    np.frombuffer(buffer, dtype=np.uint8).reshape(
+                        FRAME_SIZE, FRAME_SIZE, 3
+                    )
+                )
+        finally:
+            await _kill(process)
+            await _kill(source)
+            source_error = await source_reader
+            ffmpeg_output = (await ffmpeg_reader).decode(errors="replace")
+
+    frames = decimator.frames
+    if not frames:
+        if source.returncode != 0:
+            raise DownloadFailed(
+                f"{source_command} failed.\n{source_error.decode(errors='replace')}"
+            )
+        raise FFmpegFailedToExtractFrames(
+            f"FFmpeg could not extract any frames.\n{command}\n{ffmpeg_output}"
+        )
+
+    duration = parse_duration(ffmpeg_output)
+    if duration is None:
+        duration = decimator.count / float(interval)
+
+    return frames, duration
+
+
+async def download_async(
+    url: str,
+    output_dir: str,
+    worst: bool = True,
+    yt_dlp_path: Optional[str] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> None:
+    """
+    Download the video at url to output_dir with yt-dlp, see Download.
+
+    :return: None
+
+    :rtype: NoneType
+
+    :raises DownloadFailed: If yt-dlp could not download the video.
+    """
+    yt_dlp_path = find_yt_dlp(yt_dlp_path)
+
+    try:
+        _, output, error = await run_process(
+            download_command(yt_dlp_path, url, output_dir, worst=worst), semaphore
+        )
+    except FileNotFoundError:
+        raise DownloadFailed(
+            f"yt-dlp not found at '{yt_dlp_path}', can not download the video at '{url}'."
+        )
+
+    if len(get_list_of_all_files_in_dir(output_dir)) == 0:
+        raise DownloadFailed(
+            f"'{yt_dlp_path}' failed to download the video at"
+            + f" '{url}'.\n{output.decode()}\n{error.decode()}"
+        )
@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import re
+import sys
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from .__version__ import __version__
+from .videohash import VideoHash, VideoHashResult
+
+# Command-line interface of the package, the videohash console script.
+#
+# The inputs are video files, directories, which are searched recursively
+# for videos, and '-' for the paths and URLs read from stdin, one per line.
+# The videos are hashed by a pool of worker processes, see
+# VideoHash.hash_many, and a JSON line is written for every video as soon as
+# it is hashed. With --resume the inputs already hashed without error in the
+# output file are skipped, so an interrupted batch can be run again and the
+# failed videos are retried.
+
+# Extensions of the files taken from the directories, the files given on the
+# command line are always hashed.
+VIDEO_EXTENSIONS = (
+    ".3gp",
+    ".avi",
+    ".flv",
+    ".m2ts",
+    ".m4v",
+    ".mkv",
+    ".mov",
+    ".mp4",
+    ".mpeg",
+    ".mpg",
+    ".mts",
+    ".ogv",
+    ".ts",
+    ".webm",
+    ".wmv",
+)
+
+
+def is_url(source: str) -> bool:
+    """
+    True if the source starts with a scheme such as 'https://', as
+    VideoHash.hash_many decides it.
+
+    :rtype: bool
+    """
+    return bool(re.match(r"^[a-zA-Z][a-zA-Z0-9+.-]*://", source))
+
+
+def expand_inputs(
+    inputs: Iterable[str],
+    stdin: Optional[IO[str]] = None,
+    extensions: Iterable[str] = VIDEO_EXTENSIONS,
+) -> Iterator[str]:
+    """
+    The sources of the inputs: the files, the videos of the directories in
+    the order of their paths, and the lines of stdin for '-'. The paths are
+    made absolute, the URLs are kept as they are.
+
+    :param inputs: Paths of files and directories, URLs and '-'.
+
+    :param stdin: The stream read for '-', default is sys.stdin.
+
+    :param extensions: Extensions of the videos of the directories.
+
+    :return: Generator of the sources, without duplicates.
+
+    :rtype: Iterator[str]
+    """
+    suffixes = tuple(extension.lower() for extension in extensions)
+    seen: Set[str] = set()
+
+    def sources() -> Iterator[str]:
+        for item in inputs:
+            if item == "-":
+                for line in stdin or sys.stdin:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        yield line if is_url(line) else os.path.abspath(line)
+
+            elif is_url(item):
+                yield item
+
+            elif os.path.isdir(item):
+                for directory, subdirectories, files in os.walk(item):
+                    subdirectories.sort()
+                    for name in sorted(files):
+                        if name.lower().endswith(suffixes):
+                            yield os.path.abspath(os.path.join(directory, name))
+
+            else:
+                yield os.path.abspath(item)
+
+    for source in sources():
+        if source not in seen:
+            seen.add(source)
+            yield source
+
+
+def result_line(result: VideoHashResult) -> Dict[str, Any]:
+    """
+    The JSON object written for a result.
+
+    :rtype: Dict[str, Any]
+    """
+    return {
+        "path": result.source,
+        "hash": result.hash,
+        "hash_hex": result.hash_hex,
+        "duration": result.video_duration,
+        "timings": {
+            stage: timing._asdict() for stage, timing in (result.timings or {}).items()
+        },
+        "error": (
+            None
+            if result.error is None
+            else f"{type(result.error).__name__}: {result.error}"
+        ),
+    }
+
+
+def done_sources(output_path: str) -> Set[str]:
+    """
+    Sources of the videos hashed without error in an output file. The lines
+    of failed videos are ignored, the videos are hashed again and their new
+    results appended, as are the lines that are not valid JSON, such as a
+    line cut by an interrupted run.
+
+    :rtype: Set[str]
+    """
+    done: Set[str] = set()
+    if not os.path.isfile(output_path):
+        return done
+
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+                if result["error"] is None:
+                    done.add(result["path"])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+
+def parse_size(size: str) -> int:
+    """
+    Number of bytes of a size such as '512M' or '2G', powers of 1024.
+
+    :rtype: int
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kKmMgGtT]?)[bB]?\s*", size)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size '{size}'")
+    exponent = " KMGT".index(match.group(2).upper() or " ")
+    return int(float(match.group(1)) * 1024**exponent)
+
+
+def parser() -> argparse.ArgumentParser:
+    """
+    The parser of the arguments of the videohash command.
+
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="videohash",
+        description="Compute the 64 bit hash values of videos, one JSON line per video.",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="video files, directories searched recursively, URLs, or '-' to "
+        + "read paths and URLs from stdin, one per line",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of worker processes, default is the number of CPUs",
+    )
+    parser.add_argument(
+        "--ffmpeg-jobs",
+        type=int,
+        default=None,
+        help="maximum number of FFmpeg processes running at the same time",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="append the JSON lines to this file instead of writing them to stdout",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip the inputs already hashed without error in the output file",
+    )
+    parser.add_argument(
+        "--frame-interval",
+        type=float,
+        default=1,
+        help="frames extracted per second, default 1",
+    )
+    parser.add_argument(
+        "--frame-count", type=int, help="sample this many frames evenly instead"
+    )
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="pipe the frames from FFmpeg instead of writing them to files",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=parse_size,
+        help="memory budget of every video, e.g. 512M",
+    )
+    parser.add_argument("--cache", help="hash cache database file")
+    parser.add_argument(
+        "--download-worst",
+        action="store_true",
+        help="download the worst quality of the URLs",
+    )
+    parser.add_argument(
+        "--extensions",
+        default=",".join(extension[1:] for extension in VIDEO_EXTENSIONS),
+        help="comma separated extensions of the videos of the directories",
+    )
+    parser.add_argument("--version", action="version", version=__version__)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the videohash command.
+
+    :param argv: The arguments, default is sys.argv[1:].
+
+    :return: The exit status, 0 if every video was hashed, else 1.
+
+    :rtype: int
+    """
+    args = parser().parse_args(argv)
+
+    if args.resume and not args.output:
+        parser().error("--resume needs --output")
+
+    kwargs: Dict[str, Any] = {
+        "frame_interval": args.frame_interval,
+        "in_memory": args.in_memory,
+        "download_worst": args.download_worst,
+    }
+    for name in ("frame_count", "max_memory", "cache"):
+        if getattr(args, name) is not None:
+            kwargs[name] = getattr(args, name)
+
+    extensions = [
+        "." + extension.strip().lstrip(".")
+        for extension in args.extensions.split(",")
+        if extension.strip()
+    ]
+    sources: Iterable[str] = expand_inputs(args.inputs, extensions=extensions)
+
+    if args.resume:
+        done = done_sources(args.output)
+        sources = (source for source in sources if source not in done)
+
+    output: IO[str] = sys.stdout
+    if args.output:
+        output = open(args.output, "a+", encoding="utf-8")
+        # a line cut by an interrupted run is ended, the next line is valid
+        output.seek(0, os.SEEK_END)
+        if output.tell() > 0:
+            output.seek(output.tell() - 1)
+            if output.read(1) != "\n":
+                output.write("\n")
+
+    failed = False
+    try:
+        for result in VideoHash.hash_many(
+            sources,
+            workers=args.jobs,
+            ffmpeg_workers=args.ffmpeg_jobs,
+            ordered=False,
+            **kwargs,
+        ):
+            failed = failed or result.error is not None
+            output.write(json.dumps(result_line(result)) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    return 1 if failed else 0
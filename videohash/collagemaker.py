@@ -1,10 +1,12 @@
 import os
 from math import ceil, sqrt
-from typing import List
+from typing import Iterable, Optional, Sequence, Union
 
+import numpy as np
 from PIL import Image
 
 from .exceptions import CollageOfZeroFramesError
+from .imagebackends import get_image_backend
 from .utils import does_path_exists
 
 # Module to create collage from list of images, the
@@ -62,8 +64,8 @@ class MakeCollage:
 
     def __init__(
         self,
-        image_list: List[str],
-        output_path: str,
+        image_list: Union[Iterable[Union[str, np.ndarray]], np.ndarray],
+        output_path: Optional[str] = None,
         collage_image_width: int = 1024,
     ) -> None:
         """
@@ -75,10 +77,15 @@ class MakeCollage:
         :param image_list: A python list containing the list of absolute
                            path of images that are to be added in the collage.
                            The order of images is kept intact and is very important.
+                           The list may also contain the frames themselves as
+                           RGB NumPy arrays, as yielded by stream_frames, or
+                           be a stacked array of shape (N, H, W, 3).
 
         :param output_path: Absolute path of the collage including
                             the image name. (This is where the collage is saved.)
                             Example: '/home/username/projects/collage.jpeg'.
+                            If None the collage is not saved, it is only kept
+                            in the image attribute.
 
         :param collage_image_width: An integer specifying the image width of the
                                     output collage. Default value is 1024 pixels.
@@ -87,6 +94,9 @@ class MakeCollage:
 
         :rtype: NoneType
         """
+        if not isinstance(image_list, (np.ndarray, Sequence)):
+            image_list = list(image_list)
+
         self.image_list = image_list
         self.number_of_images = len(self.image_list)
         self.output_path = output_path
@@ -97,11 +107,12 @@ class MakeCollage:
         if self.number_of_images == 0:
             raise CollageOfZeroFramesError("Can not make a collage of zero images.")
 
-        output_path_dir = os.path.dirname(self.output_path) + "/"
-        if not does_path_exists(output_path_dir):
-            raise FileNotFoundError(
-                "Directory at which output collage is to be saved does not exists."
-            )
+        if self.output_path is not None:
+            output_path_dir = os.path.dirname(self.output_path) + "/"
+            if not does_path_exists(output_path_dir):
+                raise FileNotFoundError(
+                    "Directory at which output collage is to be saved does not exists."
+                )
 
         self.make()
 
@@ -121,99 +132,117 @@ class MakeCollage:
         on it.
         The frame images are scaled to fit the collage base image such
         that the shape of collage is as close to the shape of a square.
+        The frames are never enlarged, if the scale is larger than 1 they
+        keep their size and are spaced out on the collage.
+
+        The frames are arranged in a grid with NumPy and the grid is resized
+        at once, the collage is kept in the image attribute and saved only if
+        the output_path is not None.
 
         :return: None
 
         :rtype: NoneType
         """
-
-        # arbitrarily selecting the first image from the list, index 0
-        with Image.open(self.image_list[0]) as first_frame_image_in_list:
-
-            # Find the width and height of the first image of the list.
-            # Assuming all the images have same size.
-            frame_image_width, frame_image_height = first_frame_image_in_list.size
+        frames = MakeCollage._stack_frames(self.image_list)
+        _, frame_image_height, frame_image_width, _ = frames.shape
+        images_per_row = self.images_per_row_in_collage
 
         # scale is the ratio of collage_image_width and product of
         # images_per_row_in_collage with frame_image_width.
+        scale = (self.collage_image_width) / (images_per_row * frame_image_width)
 
-        # The scale will always lie between 0 and 1, which implies that
-        # the images are always going to get downsized.
-        scale = (self.collage_image_width) / (
-            self.images_per_row_in_collage * frame_image_width
-        )
-
-        # Calculating the scaled height and width for the frame image.
+        # Calculating the scaled height and width for the frame image, the
+        # distance between the top left corners of two neighbouring frames.
         scaled_frame_image_width = ceil(frame_image_width * scale)
         scaled_frame_image_height = ceil(frame_image_height * scale)
 
         # Divide the number of images by images_per_row_in_collage. The later
         # was calculated by taking the square root of total number of images.
-        number_of_rows = ceil(self.number_of_images / self.images_per_row_in_collage)
+        number_of_rows = ceil(self.number_of_images / images_per_row)
 
         # Multiplying the height of one downsized image with number of rows.
-        # Height of 1 downsized image is product of scale and frame_image_height
-        # Total height is number of rows times the height of one downsized image.
         self.collage_image_height = ceil(scale * frame_image_height * number_of_rows)
 
-        # Create an image of passed collage_image_width and calculated collage_image_height.
-        # The downsized images will be pasted on this new base image.
-        # The image is 0,0,0 RGB(black).
-        collage_image = Image.new(
-            "RGB", (self.collage_image_width, self.collage_image_height)
+        # Size of the frames on the collage, the frames are downsized but
+        # never enlarged.
+        tile_width = min(frame_image_width, scaled_frame_image_width)
+        tile_height = min(frame_image_height, scaled_frame_image_height)
+
+        # the frames in rows of images_per_row frames, the missing frames of
+        # the last row are black.
+        grid = np.zeros(
+            (number_of_rows * images_per_row,) + frames.shape[1:], dtype=np.uint8
+        )
+        grid[: self.number_of_images] = frames
+        grid = grid.reshape(
+            number_of_rows, images_per_row, frame_image_height, frame_image_width, 3
         )
 
-        # keep track of the x and y coordinates of the resized frame images
-        i, j = (0, 0)
+        if (tile_width, tile_height) != (frame_image_width, frame_image_height):
+            # a single resampling of all the frames, the grid of the frames is
+            # resized as one image by the image backend of the process.
+            resized = get_image_backend().resize(
+                grid.transpose(0, 2, 1, 3, 4).reshape(
+                    number_of_rows * frame_image_height,
+                    images_per_row * frame_image_width,
+                    3,
+                ),
+                images_per_row * tile_width,
+                number_of_rows * tile_height,
+            )
+            grid = resized.reshape(
+                number_of_rows, tile_height, images_per_row, tile_width, 3
+            ).transpose(0, 2, 1, 3, 4)
+
+        # place the frames every scaled_frame_image_width pixels of a row and
+        # every scaled_frame_image_height pixels of a column on the black base.
+        cells = np.zeros(
+            (
+                number_of_rows,
+                scaled_frame_image_height,
+                images_per_row,
+                scaled_frame_image_width,
+                3,
+            ),
+            dtype=np.uint8,
+        )
+        cells[:, :tile_height, :, :tile_width] = grid.transpose(0, 2, 1, 3, 4)
+        cells = cells.reshape(
+            number_of_rows * scaled_frame_image_height,
+            images_per_row * scaled_frame_image_width,
+            3,
+        )
 
-        # iterate the frames and paste them on their position on the collage_image
-        for count, frame_path in enumerate(self.image_list):
+        collage = np.zeros(
+            (self.collage_image_height, self.collage_image_width, 3), dtype=np.uint8
+        )
+        height = min(self.collage_image_height, cells.shape[0])
+        width = min(self.collage_image_width, cells.shape[1])
+        collage[:height, :width] = cells[:height, :width]
 
-            # Set the x coordinate to zero if we are on the first column
-            # If self.images_per_row_in_collage is 4
-            # then 0,4,8 and so on should have their x coordinate as 0
-            if (count % self.images_per_row_in_collage) == 0:
-                i = 0
+        self.image = Image.fromarray(collage)
 
-            # open the frame image, must open it to resize it using the thumbnail method
-            frame = Image.open(frame_path)
+        if self.output_path is not None:
+            self.image.save(self.output_path)
 
-            # scale the opened frame images
-            frame.thumbnail(
-                (scaled_frame_image_width, scaled_frame_image_height), Image.ANTIALIAS
-            )
+    @staticmethod
+    def _stack_frames(
+        image_list: Union[Sequence[Union[str, np.ndarray]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        The frames as one array of shape (N, H, W, 3), the frames are either
+        the paths of image files or decoded RGB frames as NumPy arrays.
 
-            # set the value of x to that of i's value.
-            # i is set to 0 if we are on the first column.
-            x = i
-
-            # It ensures that y coordinate stays the same for any given row.
-            # The floor of a real number is the largest integer that is less
-            # than or equal to the number. floor division is used because of
-            # the zero based indexing, the floor of the division stays same
-            # for an entier row as the decimal values are negled by the floor.
-            # for the first row the result of floor division is always zero and
-            # the product of 0 with scaled_frame_image_height is also zero, they
-            # y coordinate for the first row is 0.
-            # For the second row the result of floor division is one and the prodcut
-            # with scaled_frame_image_height ensures that the y coordinate is
-            # scaled_frame_image_height below the first row.
-            y = (j // self.images_per_row_in_collage) * scaled_frame_image_height
-
-            # paste the frame image on the newly created base image(base image is black)
-            collage_image.paste(frame, (x, y))
-            frame.close()
-
-            # increase the x coordinate by scaled_frame_image_width
-            # to get the x coordinate of the next frame. unless the next image
-            # will be on the very first column this will be the x coordinate.
-            i = i + scaled_frame_image_width
-
-            # increase the value of j by 1, this is to calculate the y coordinate of
-            # next image. The increased number will be floor divided by images_per_row_in_collage
-            # therefore the y coordinate stays the same for any given row.
-            j += 1
-
-        # save the base image with all the scaled frame images embeded on it.
-        collage_image.save(self.output_path)
-        collage_image.close()
+        :rtype: numpy.ndarray
+        """
+        if isinstance(image_list, np.ndarray):
+            return image_list.astype(np.uint8, copy=False)
+
+        frames = []
+        for frame in image_list:
+            if isinstance(frame, np.ndarray):
+                frames.append(frame)
+            else:
+                with Image.open(frame) as image:
+                    frames.append(np.asarray(image.convert("RGB")))
+        return np.stack(frames)
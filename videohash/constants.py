@@ -0,0 +1,7 @@
+# Constants shared by the modules that must not import the VideoHash module,
+# e.g. the hash store, which only needs NumPy.
+
+# Version of the hashing algorithm, part of the key of the cached hash values
+# and stored in the header of the hash store files. Bump it whenever a change
+# of the algorithm changes the hash values.
+HASH_ALGORITHM_VERSION = 2
@@ -1,13 +1,62 @@
-from shutil import which
 from subprocess import PIPE, Popen
+from typing import List, Optional
 
-from .exceptions import DownloadFailed, DownloadOutPutDirDoesNotExist
-from .utils import does_path_exists, get_list_of_all_files_in_dir
+from .exceptions import DownloadFailed, DownloadOutPutDirDoesNotExist, FFmpegNotFound
+from .tools import tool_path
+from .utils import (
+    count_subprocess,
+    does_path_exists,
+    get_list_of_all_files_in_dir,
+)
 
 # Python module to download the video from the input URL.
 # Uses yt-dlp to download the video.
 
 
+def find_yt_dlp(yt_dlp_path: Optional[str] = None) -> str:
+    """
+    Path of yt-dlp, see tools.tool_path. If yt-dlp is not found the name is
+    returned, running it fails with DownloadFailed.
+
+    :param yt_dlp_path: Path of yt-dlp if not in path.
+
+    :rtype: str
+    """
+    try:
+        return tool_path("yt-dlp", yt_dlp_path)
+    except FFmpegNotFound:
+        return "yt-dlp"
+
+
+def download_command(
+    yt_dlp_path: str, url: str, output_dir: str, worst: bool = True
+) -> List[str]:
+    """
+    yt-dlp command that downloads the video at url to output_dir.
+
+    :rtype: List[str]
+    """
+    command = [yt_dlp_path]
+    if worst:
+        command += ["-f", "worst"]
+    return command + [url, "-o", output_dir + "video_file.%(ext)s"]
+
+
+def streaming_download_command(
+    yt_dlp_path: str, url: str, worst: bool = True
+) -> List[str]:
+    """
+    yt-dlp command that writes the video at url to its stdout instead of a
+    file.
+
+    :rtype: List[str]
+    """
+    command = [yt_dlp_path, "--quiet", "--no-part"]
+    if worst:
+        command += ["-f", "worst"]
+    return command + [url, "-o", "-"]
+
+
 class Download:
 
     """
@@ -47,7 +96,7 @@ class Download:
                 f"No directory found at '{self.output_dir}' for storing the downloaded video. Can not download the video."
             )
 
-        self.yt_dlp_path = str(which("yt-dlp"))
+        self.yt_dlp_path = find_yt_dlp()
         self.download_video()
 
     def download_video(self) -> None:
@@ -58,25 +107,18 @@ class Download:
         :rtype: NoneType
 
         """
-        worst = " "
-        if self.worst:
-            worst = " -f worst "
-
-        command = (
-            f'"{self.yt_dlp_path}"'
-            + worst
-            + " "
-            + '"'
-            + self.url
-            + '"'
-            + " -o "
-            + '"'
-            + self.output_dir
-            + "video_file.%(ext)s"
-            + '"'
+        command = download_command(
+            self.yt_dlp_path, self.url, self.output_dir, worst=self.worst
         )
 
-        process = Popen(command, shell=True, stdout=PIPE, stderr=PIPE)
+        try:
+            process = Popen(command, stdout=PIPE, stderr=PIPE)
+            count_subprocess()
+        except FileNotFoundError:
+            raise DownloadFailed(
+                f"yt-dlp not found at '{self.yt_dlp_path}', can not download the"
+                + f" video at '{self.url}'."
+            )
         output, error = process.communicate()
         yt_dlp_output = output.decode()
         yt_dlp_error = error.decode()
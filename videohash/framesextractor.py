@@ -1,21 +1,248 @@
 import os
 import re
 import shlex
-from shutil import which
-from subprocess import PIPE, Popen, check_output
-from typing import Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from subprocess import PIPE, Popen
+from threading import Thread
+from typing import IO, Iterator, List, Optional, Union
+
+import numpy as np
 
 from .exceptions import (
+    DownloadFailed,
     FFmpegError,
     FFmpegFailedToExtractFrames,
-    FFmpegNotFound,
     FramesExtractorOutPutDirDoesNotExist,
 )
-from .utils import does_path_exists
+from .tools import get_tool
+from .utils import count_subprocess, does_path_exists, ffmpeg_slot
+from .videoprobe import probe_video
 
 # python module to extract the frames from the input video.
 # Uses the FFmpeg Software to extract the frames.
 
+# Width and height of the extracted frames, in pixels.
+FRAME_SIZE = 144
+
+# Offsets in seconds at which FramesExtractor.detect_crop probes the video.
+CROP_DETECT_OFFSETS = (2, 5, 10, 20, 40, 100, 300, 600, 1200, 2400, 7200, 14400)
+
+# Default number of frames taken by sample_frames.
+DEFAULT_SAMPLE_FRAMES = 64
+
+
+def check_ffmpeg(ffmpeg_path: Optional[str] = None) -> str:
+    """
+    Resolves the ffmpeg path and runs 'ffmpeg -version' to verify that the
+    software, ffmpeg is found and works. The check is done once per process
+    and path, see tools.get_tool.
+
+    :param ffmpeg_path: path of the ffmpeg software if not in path.
+
+    :return: Path of the verified ffmpeg executable.
+
+    :rtype: str
+    """
+    return get_tool("ffmpeg", ffmpeg_path).path
+
+
+def crop_detect_offsets(duration: Optional[float] = None) -> List[int]:
+    """
+    Offsets in seconds at which the crop is detected, the offsets past the end
+    of the video are skipped.
+
+    :param duration: Duration of the video in seconds, if known.
+
+    :rtype: List[int]
+    """
+    return [
+        start_time
+        for start_time in CROP_DETECT_OFFSETS
+        if duration is None or start_time < duration
+    ]
+
+
+def cropdetect_command(
+    video_path: str, start_time: int, frames: int, ffmpeg_path: str
+) -> List[str]:
+    """
+    FFmpeg command that runs cropdetect on the first frames after start_time.
+
+    :rtype: List[str]
+    """
+    return [
+        ffmpeg_path,
+        "-ss",
+        str(start_time),
+        "-i",
+        video_path,
+        "-vframes",
+        str(frames),
+        "-vf",
+        "cropdetect",
+        "-f",
+        "null",
+        "-",
+    ]
+
+
+def parse_crops(output: str) -> List[str]:
+    """
+    The crops detected by cropdetect, in the order of the frames.
+
+    :param output: The output of FFmpeg.
+
+    :rtype: List[str]
+    """
+    return re.findall(r"crop\=[0-9]{1,4}:[0-9]{1,4}:[0-9]{1,4}:[0-9]{1,4}", output)
+
+
+def crop_argument(crop_list: List[str]) -> str:
+    """
+    FFmpeg argument of the most frequent of the detected crops.
+
+    :return: FFmpeg argument -vf filter and confromable crop parameter, or a
+             space if no crop was detected.
+
+    :rtype: str
+    """
+    mode = None
+    if len(crop_list) > 0:
+        mode = max(crop_list, key=crop_list.count)
+
+    crop = " "
+    if mode:
+        crop = f" -vf {mode} "
+
+    return crop
+
+
+def extract_command(
+    video_path: str,
+    output_dir: str,
+    crop: str,
+    interval: Union[int, float],
+    ffmpeg_path: str,
+) -> List[str]:
+    """
+    FFmpeg command that saves the frames as JPEG files in output_dir.
+
+    :rtype: List[str]
+    """
+    return (
+        [ffmpeg_path, "-i", video_path]
+        + shlex.split(crop)
+        + ["-s", f"{FRAME_SIZE}x{FRAME_SIZE}", "-r", str(interval)]
+        + [output_dir + "video_frame_%07d.jpeg"]
+    )
+
+
+def stream_command(
+    video_path: str, crop: str, interval: Union[int, float], ffmpeg_path: str
+) -> List[str]:
+    """
+    FFmpeg command that writes the frames as raw RGB pixels to its stdout.
+
+    :rtype: List[str]
+    """
+    return (
+        [ffmpeg_path, "-loglevel", "error", "-i", video_path]
+        + shlex.split(crop)
+        + ["-s", f"{FRAME_SIZE}x{FRAME_SIZE}", "-r", str(interval)]
+        + ["-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+    )
+
+
+def pipe_command(interval: Union[int, float], ffmpeg_path: str) -> List[str]:
+    """
+    FFmpeg command that reads the video from its stdin and writes the frames
+    as raw RGB pixels to its stdout. The input is not seekable, the frames
+    are not cropped.
+
+    :rtype: List[str]
+    """
+    return [ffmpeg_path, "-hide_banner", "-nostats", "-i", "pipe:0"] + [
+        "-s",
+        f"{FRAME_SIZE}x{FRAME_SIZE}",
+        "-r",
+        str(interval),
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgb24",
+        "-",
+    ]
+
+
+def parse_duration(output: str) -> Optional[float]:
+    """
+    Duration of the input in seconds from the 'Duration:' line that FFmpeg
+    prints, None if FFmpeg does not know it.
+
+    :param output: The stderr of FFmpeg.
+
+    :rtype: Optional[float]
+    """
+    match = re.search(r"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)", output)
+    if not match:
+        return None
+
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def sample_timestamps(duration: float, frame_count: int) -> List[str]:
+    """
+    Timestamps of the frames taken by sample_frames, the middles of
+    frame_count equal parts of the video. The timestamps are rounded to the
+    millisecond, the same duration and frame_count always give the same
+    timestamps.
+
+    :param duration: Duration of the video in seconds.
+
+    :param frame_count: Number of timestamps.
+
+    :return: The timestamps in seconds, formatted for the FFmpeg -ss option.
+
+    :rtype: List[str]
+    """
+    return [
+        f"{duration * (2 * number + 1) / (2 * frame_count):.3f}"
+        for number in range(frame_count)
+    ]
+
+
+def sample_command(
+    video_path: str,
+    timestamp: str,
+    crop: str,
+    ffmpeg_path: str,
+    keyframes_only: bool = False,
+) -> List[str]:
+    """
+    FFmpeg command that seeks to the timestamp before opening the video and
+    writes one frame as raw RGB pixels to its stdout.
+
+    If keyframes_only is True, only the keyframes are decoded and the frame is
+    the first keyframe at or after the timestamp, else the frame is the frame
+    at the timestamp and the frames since the previous keyframe are decoded.
+
+    :rtype: List[str]
+    """
+    seek = ["-ss", timestamp]
+    if keyframes_only:
+        seek = ["-skip_frame", "nokey"] + seek
+
+    return (
+        [ffmpeg_path, "-loglevel", "error"]
+        + seek
+        + ["-i", video_path]
+        + shlex.split(crop)
+        + ["-frames:v", "1", "-s", f"{FRAME_SIZE}x{FRAME_SIZE}"]
+        + ["-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+    )
+
 
 class FramesExtractor:
 
@@ -29,6 +256,8 @@ class FramesExtractor:
         output_dir: str,
         interval: Union[int, float] = 1,
         ffmpeg_path: Optional[str] = None,
+        duration: Optional[float] = None,
+        crop: Optional[str] = None,
     ) -> None:
         """
         Raises Exeception if video_path does not exists.
@@ -51,10 +280,18 @@ class FramesExtractor:
 
         :param ffmpeg_path: path of the ffmpeg software if not in path.
 
+        :param duration: duration of the video in seconds if known, used
+                         to skip the crop detection past the end of the video.
+
+        :param crop: The crop argument of FFmpeg if already detected by
+                     detect_crop, else the crop is detected.
+
         """
         self.video_path = video_path
         self.output_dir = output_dir
         self.interval = interval
+        self.duration = duration
+        self.crop = crop
         self.ffmpeg_path = ""
         if ffmpeg_path:
             self.ffmpeg_path = ffmpeg_path
@@ -82,39 +319,16 @@ class FramesExtractor:
 
         :rtype: NoneType
         """
-
-        if not self.ffmpeg_path:
-
-            if not which("ffmpeg"):
-
-                raise FFmpegNotFound(
-                    "FFmpeg is not on the system path. Install FFmpeg and add it to the path."
-                    + "Or you can also pass the path via the 'ffmpeg_path' parameter."
-                )
-            else:
-
-                self.ffmpeg_path = str(which("ffmpeg"))
-
-        # Check the ffmpeg
-        try:
-            # check_output will raise FileNotFoundError if it does not finds the ffmpeg
-            output = check_output([str(self.ffmpeg_path), "-version"]).decode()
-
-        except FileNotFoundError:
-            raise FFmpegNotFound(f"FFmpeg not found at '{self.ffmpeg_path}'.")
-
-        else:
-
-            if "ffmpeg version" not in output:
-                raise FFmpegError(
-                    f"ffmpeg at '{self.ffmpeg_path}' is not really ffmpeg. Output of ffmpeg -version is \n'{output}'."
-                )
+        self.ffmpeg_path = check_ffmpeg(self.ffmpeg_path)
 
     @staticmethod
     def detect_crop(
         video_path: Optional[str] = None,
         frames: int = 3,
         ffmpeg_path: Optional[str] = None,
+        duration: Optional[float] = None,
+        single_pass: bool = False,
+        workers: int = 4,
     ) -> str:
         """
         Detects the the amount of cropping to remove black bars.
@@ -124,55 +338,137 @@ class FramesExtractor:
 
         The mode of the detected crops is selected as the crop required.
 
+        :param duration: Duration of the video in seconds, if known. Offsets
+                         that are past the end of the video are not probed.
+                         If not known it is read by ffprobe, see
+                         videoprobe.probe_video.
+
+        :param single_pass: If True, all the offsets are probed by one FFmpeg
+                            process instead of one process per offset.
+
+        :param workers: Number of FFmpeg processes probing the offsets at
+                        the same time, unless single_pass is True.
+
         :return: FFmpeg argument -vf filter and confromable crop parameter.
 
         :rtype: str
         """
 
+        if duration is None and video_path and os.path.isfile(video_path):
+            try:
+                duration = probe_video(video_path, ffmpeg_path=ffmpeg_path).duration
+            except FFmpegError:
+                # probe every offset, as if the video were long enough
+                duration = None
+
+        if not ffmpeg_path:
+            ffmpeg_path = check_ffmpeg()
+
         # We look upto the 120th minute into the video to detect the most
-        # precise crop value
-        time_start_list = [
-            2,
-            5,
-            10,
-            20,
-            40,
-            100,
-            300,
-            600,
-            1200,
-            2400,
-            7200,
-            14400,
-        ]
+        # precise crop value, seeking past the end of the video is useless.
+        time_start_list = crop_detect_offsets(duration)
+
+        if not time_start_list or not video_path:
+            return " "
+
+        if single_pass:
+            crop_list = FramesExtractor._cropdetect_single_pass(
+                video_path, time_start_list, frames, ffmpeg_path
+            )
+
+        else:
+            probe = partial(
+                FramesExtractor._cropdetect,
+                video_path,
+                frames=frames,
+                ffmpeg_path=ffmpeg_path,
+            )
+            with ThreadPoolExecutor(
+                max_workers=min(workers, len(time_start_list))
+            ) as executor:
+                # map keeps the order of the start times, the mode of the
+                # crops is the same as if they were probed one by one.
+                crop_list = [
+                    match
+                    for matches in executor.map(probe, time_start_list)
+                    for match in matches
+                ]
+
+        return crop_argument(crop_list)
 
-        crop_list = []
+    @staticmethod
+    def _cropdetect(
+        video_path: str,
+        start_time: int,
+        frames: int,
+        ffmpeg_path: str,
+    ) -> List[str]:
+        """
+        Run cropdetect on the first frames after start_time.
 
-        for start_time in time_start_list:
+        :return: The detected crops, in the order of the frames.
 
-            command = f'"{ffmpeg_path}" -ss {start_time} -i "{video_path}" -vframes {frames} -vf cropdetect -f null -'
+        :rtype: List[str]
+        """
+        command = cropdetect_command(video_path, start_time, frames, ffmpeg_path)
 
-            process = Popen(command, shell=True, stdout=PIPE, stderr=PIPE)
+        with ffmpeg_slot():
+            process = Popen(command, stdout=PIPE, stderr=PIPE)
+            count_subprocess()
 
             output, error = process.communicate()
 
-            matches = re.findall(
-                r"crop\=[0-9]{1,4}:[0-9]{1,4}:[0-9]{1,4}:[0-9]{1,4}",
-                (output.decode() + error.decode()),
+        return parse_crops(output.decode() + error.decode())
+
+    @staticmethod
+    def _cropdetect_single_pass(
+        video_path: str,
+        time_start_list: List[int],
+        frames: int,
+        ffmpeg_path: str,
+    ) -> List[str]:
+        """
+        Run cropdetect on the first frames after every start time, using only
+        one FFmpeg process. The video is opened once per start time and every
+        input has its own named cropdetect filter, so that the crops can be
+        ordered as if the start times were probed one after another.
+
+        :return: The detected crops, in the order of the start times and frames.
+
+        :rtype: List[str]
+        """
+        inputs: List[str] = []
+        filters = []
+        maps: List[str] = []
+        for number, start_time in enumerate(time_start_list):
+            inputs += ["-ss", str(start_time), "-i", video_path]
+            filters.append(
+                f"[{number}:v]trim=end_frame={frames},cropdetect@p{number}[o{number}]"
             )
+            maps += ["-map", f"[o{number}]"]
 
-            for match in matches:
-                crop_list.append(match)
+        command = (
+            [ffmpeg_path]
+            + inputs
+            + ["-filter_complex", ";".join(filters)]
+            + maps
+            + ["-f", "null", "-"]
+        )
 
-        mode = None
-        if len(crop_list) > 0:
-            mode = max(crop_list, key=crop_list.count)
+        with ffmpeg_slot():
+            process = Popen(command, stdout=PIPE, stderr=PIPE)
+            count_subprocess()
+
+            output, error = process.communicate()
 
-        crop = " "
-        if mode:
-            crop = f" -vf {mode} "
+        crops_of_start_time: List[List[str]] = [[] for _ in time_start_list]
+        for number, match in re.findall(
+            r"\[cropdetect@p([0-9]+) @ [^\]]*\].*?(crop\=[0-9]{1,4}:[0-9]{1,4}:[0-9]{1,4}:[0-9]{1,4})",
+            (output.decode() + error.decode()),
+        ):
+            crops_of_start_time[int(number)].append(match)
 
-        return crop
+        return [match for matches in crops_of_start_time for match in matches]
 
     def extract(self) -> None:
         """
@@ -184,36 +480,23 @@ class FramesExtractor:
         :rtype: NoneType
         """
 
-        ffmpeg_path = self.ffmpeg_path
-        video_path = self.video_path
-        output_dir = self.output_dir
-
-        if os.name == "posix":
-            ffmpeg_path = shlex.quote(self.ffmpeg_path)
-            video_path = shlex.quote(self.video_path)
-            output_dir = shlex.quote(self.output_dir)
-
-        crop = FramesExtractor.detect_crop(
-            video_path=video_path, frames=3, ffmpeg_path=ffmpeg_path
-        )
+        crop = self.crop
+        if crop is None:
+            crop = FramesExtractor.detect_crop(
+                video_path=self.video_path,
+                frames=3,
+                ffmpeg_path=self.ffmpeg_path,
+                duration=self.duration,
+            )
 
-        command = (
-            f'"{ffmpeg_path}"'
-            + " -i "
-            + f'"{video_path}"'
-            + f"{crop}"
-            + " -s 144x144 "
-            + " -r "
-            + str(self.interval)
-            + " "
-            + '"'
-            + output_dir
-            + "video_frame_%07d.jpeg"
-            + '"'
+        command = extract_command(
+            self.video_path, self.output_dir, crop, self.interval, self.ffmpeg_path
         )
 
-        process = Popen(command, shell=True, stdout=PIPE, stderr=PIPE)
-        output, error = process.communicate()
+        with ffmpeg_slot():
+            process = Popen(command, stdout=PIPE, stderr=PIPE)
+            count_subprocess()
+            output, error = process.communicate()
 
         ffmpeg_output = output.decode()
         ffmpeg_error = error.decode()
@@ -223,3 +506,320 @@ class FramesExtractor:
             raise FFmpegFailedToExtractFrames(
                 f"FFmpeg could not extract any frames.\n{command}\n{ffmpeg_output}\n{ffmpeg_error}"
             )
+
+
+def _drain(stream: IO[bytes], chunks: List[bytes]) -> None:
+    """
+    Read the stream until EOF and collect its contents in chunks, keeps the
+    stderr pipe of FFmpeg from filling up while we read the frames.
+    """
+    for chunk in iter(lambda: stream.read(4096), b""):
+        chunks.append(chunk)
+
+
+def stream_frames(
+    video_path: str,
+    interval: Union[int, float] = 1,
+    ffmpeg_path: Optional[str] = None,
+    duration: Optional[float] = None,
+    crop: Optional[str] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Extract the frames at every n seconds, same as FramesExtractor.extract,
+    but instead of writing a JPEG file per frame FFmpeg writes raw RGB
+    pixels (rgb24) to a pipe and the frames are yielded as NumPy arrays of
+    shape (144, 144, 3) and dtype uint8.
+
+    Nothing is written to the disk and no frame is encoded or decoded
+    more than once.
+
+    :param video_path: absolute path of the video
+
+    :param interval: Number of frames extracted per unit time, same as the
+                     interval of FramesExtractor.
+
+    :param ffmpeg_path: path of the ffmpeg software if not in path.
+
+    :param duration: duration of the video in seconds if known, used
+                     to skip the crop detection past the end of the video.
+
+    :param crop: The crop argument of FFmpeg if already detected by
+                 FramesExtractor.detect_crop, else the crop is detected.
+
+    :return: Generator of the frames in the order of their timestamp.
+
+    :rtype: Iterator[numpy.ndarray]
+
+    :raises FileNotFoundError: If no video is found at video_path.
+
+    :raises FFmpegFailedToExtractFrames: If FFmpeg could not extract any frame.
+    """
+    if not does_path_exists(video_path):
+        raise FileNotFoundError(
+            f"No video found at '{video_path}' for frame extraction."
+        )
+
+    ffmpeg_path = check_ffmpeg(ffmpeg_path)
+
+    if crop is None:
+        crop = FramesExtractor.detect_crop(
+            video_path=video_path, frames=3, ffmpeg_path=ffmpeg_path, duration=duration
+        )
+
+    command = stream_command(video_path, crop, interval, ffmpeg_path)
+
+    frame_bytes = FRAME_SIZE * FRAME_SIZE * 3
+
+    total_frames = 0
+    with ffmpeg_slot():
+        process = Popen(command, stdout=PIPE, stderr=PIPE)
+        count_subprocess()
+
+        error_chunks: List[bytes] = []
+        stderr_reader = Thread(target=_drain, args=(process.stderr, error_chunks))
+        stderr_reader.daemon = True
+        stderr_reader.start()
+
+        try:
+            while True:
+                buffer = process.stdout.read(frame_bytes)  # type: ignore
+
+                if len(buffer) < frame_bytes:
+                    break
+
+                total_frames += 1
+                yield np.frombuffer(buffer, dtype=np.uint8).reshape(
+                    FRAME_SIZE, FRAME_SIZE, 3
+                )
+
+        finally:
+            # kill FFmpeg if the consumer stopped before the end of the video.
+            process.stdout.close()  # type: ignore
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            stderr_reader.join()
+            process.stderr.close()  # type: ignore
+
+    if total_frames == 0:
+        raise FFmpegFailedToExtractFrames(
+            "FFmpeg could not extract any frames.\n"
+            + f"{command}\n{b''.join(error_chunks).decode(errors='replace')}"
+        )
+
+
+def _sample_frame(command: List[str]) -> Optional[np.ndarray]:
+    """
+    Run a sample_command, None if FFmpeg wrote no frame.
+    """
+    with ffmpeg_slot():
+        process = Popen(command, stdout=PIPE, stderr=PIPE)
+        count_subprocess()
+        output, _ = process.communicate()
+
+    frame_bytes = FRAME_SIZE * FRAME_SIZE * 3
+    if len(output) < frame_bytes:
+        return None
+
+    return np.frombuffer(output[:frame_bytes], dtype=np.uint8).reshape(
+        FRAME_SIZE, FRAME_SIZE, 3
+    )
+
+
+def sample_frames(
+    video_path: str,
+    frame_count: int = DEFAULT_SAMPLE_FRAMES,
+    ffmpeg_path: Optional[str] = None,
+    duration: Optional[float] = None,
+    keyframes_only: bool = False,
+    workers: int = 4,
+    crop: Optional[str] = None,
+) -> List[np.ndarray]:
+    """
+    Take frame_count frames spread evenly over the video, see
+    sample_timestamps. FFmpeg seeks to every timestamp before opening the
+    video, so the cost does not depend on the length of the video, unlike
+    stream_frames and FramesExtractor that decode every frame.
+
+    :param video_path: absolute path of the video
+
+    :param frame_count: Number of frames.
+
+    :param ffmpeg_path: path of the ffmpeg software if not in path.
+
+    :param duration: duration of the video in seconds, read by ffprobe if
+                     not known.
+
+    :param keyframes_only: If True only keyframes are decoded, each frame is
+                           the first keyframe at or after its timestamp.
+                           Faster for videos with long groups of pictures,
+                           but the frames are further from the timestamps.
+
+    :param workers: Number of FFmpeg processes running at the same time.
+
+    :param crop: The crop argument of FFmpeg if already detected by
+                 FramesExtractor.detect_crop, else the crop is detected.
+
+    :return: The frames in the order of their timestamp, arrays of shape
+             (144, 144, 3) and dtype uint8. A timestamp at which FFmpeg
+             finds no frame is skipped.
+
+    :rtype: List[numpy.ndarray]
+
+    :raises FileNotFoundError: If no video is found at video_path.
+
+    :raises FFmpegFailedToExtractFrames: If FFmpeg could not extract any frame.
+    """
+    if not does_path_exists(video_path):
+        raise FileNotFoundError(
+            f"No video found at '{video_path}' for frame extraction."
+        )
+
+    if frame_count < 1:
+        raise ValueError("frame_count must be a positive integer.")
+
+    ffmpeg_path = check_ffmpeg(ffmpeg_path)
+    if duration is None:
+        duration = probe_video(video_path, ffmpeg_path=ffmpeg_path).duration
+
+    if crop is None:
+        crop = FramesExtractor.detect_crop(
+            video_path=video_path, frames=3, ffmpeg_path=ffmpeg_path, duration=duration
+        )
+
+    commands = [
+        sample_command(video_path, timestamp, crop, ffmpeg_path, keyframes_only)
+        for timestamp in sample_timestamps(duration, frame_count)
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        frames = [
+            frame
+            for frame in executor.map(_sample_frame, commands)
+            if frame is not None
+        ]
+
+    if not frames:
+        raise FFmpegFailedToExtractFrames(
+            f"FFmpeg could not extract any frames.\n{commands[0]}"
+        )
+
+    return frames
+
+
+class FramePipe:
+
+    """
+    Frames of a video that a source process, such as yt-dlp, writes to its
+    stdout. The stdout of the source is the stdin of FFmpeg, the video is
+    never written to the disk and the frames are decoded as the bytes arrive.
+
+    A pipe can not be seeked, so the black bars are not detected and the
+    frames are not cropped.
+    """
+
+    def __init__(
+        self,
+        source_command: List[str],
+        interval: Union[int, float] = 1,
+        ffmpeg_path: Optional[str] = None,
+    ) -> None:
+        """
+        :param source_command: Command of the source process, e.g. the
+                               downloader.streaming_download_command.
+
+        :param interval: Number of frames extracted per unit time, same as the
+                         interval of FramesExtractor.
+
+        :param ffmpeg_path: path of the ffmpeg software if not in path.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self.source_command = source_command
+        self.interval = interval
+        self.ffmpeg_path = check_ffmpeg(ffmpeg_path)
+
+        # known once the frames are read, from the output of FFmpeg or else
+        # from the number of frames.
+        self.duration: Optional[float] = None
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        """
+        Run the source and FFmpeg and yield the frames, arrays of shape
+        (144, 144, 3) and dtype uint8. Both processes are killed if the
+        consumer stops early.
+
+        :raises DownloadFailed: If the source failed and FFmpeg got no frame.
+
+        :raises FFmpegFailedToExtractFrames: If FFmpeg could not extract any
+                                             frame.
+        """
+        command = pipe_command(self.interval, self.ffmpeg_path)
+        frame_bytes = FRAME_SIZE * FRAME_SIZE * 3
+
+        total_frames = 0
+        with ffmpeg_slot():
+            read_end, write_end = os.pipe()
+            try:
+                source = Popen(self.source_command, stdout=write_end, stderr=PIPE)
+                count_subprocess()
+                try:
+                    process = Popen(command, stdin=read_end, stdout=PIPE, stderr=PIPE)
+                    count_subprocess()
+                except BaseException:
+                    source.kill()
+                    source.wait()
+                    raise
+            finally:
+                # the children hold their own copies of the pipe
+                os.close(read_end)
+                os.close(write_end)
+
+            source_errors: List[bytes] = []
+            ffmpeg_errors: List[bytes] = []
+            readers = [
+                Thread(target=_drain, args=(source.stderr, source_errors)),
+                Thread(target=_drain, args=(process.stderr, ffmpeg_errors)),
+            ]
+            for reader in readers:
+                reader.daemon = True
+                reader.start()
+
+            try:
+                while True:
+                    buffer = process.stdout.read(frame_bytes)  # type: ignore
+
+                    if len(buffer) < frame_bytes:
+                        break
+
+                    total_frames += 1
+                    yield np.frombuffer(buffer, dtype=np.uint8).reshape(
+                        FRAME_SIZE, FRAME_SIZE, 3
+                    )
+
+            finally:
+                process.stdout.close()  # type: ignore
+                for child in (process, source):
+                    if child.poll() is None:
+                        child.kill()
+                    child.wait()
+                for reader in readers:
+                    reader.join()
+                process.stderr.close()  # type: ignore
+                source.stderr.close()  # type: ignore
+
+        ffmpeg_output = b"".join(ffmpeg_errors).decode(errors="replace")
+        self.duration = parse_duration(ffmpeg_output)
+        if self.duration is None:
+            self.duration = total_frames / float(self.interval)
+
+        if total_frames == 0:
+            if source.returncode != 0:
+                raise DownloadFailed(
+                    f"{self.source_command} failed.\n"
+                    + b"".join(source_errors).decode(errors="replace")
+                )
+            raise FFmpegFailedToExtractFrames(
+                f"FFmpeg could not extract any frames.\n{command}\n{ffmpeg_output}"
+            )
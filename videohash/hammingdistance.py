@@ -0,0 +1,314 @@
+from math import ceil
+from typing import Any, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Module to compute the hamming distance of the packed hash values.
+# A hash value is packed in a python int, the most significant bit being
+# the first bit of the bitlist. The hamming distance of two packed hash values
+# is the number of set bits(popcount) of their bitwise XOR.
+#
+# Catalogues of 64 bit hash values are compared as NumPy arrays of dtype uint64.
+
+# Default number of distances computed at once by the bulk functions, bounds
+# the temporary uint64 arrays to 8 MiB.
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def bitlist_to_int(bitlist: Sequence[int]) -> int:
+    """
+    Pack a bitlist in an integer, the first bit of the list is the most
+    significant bit. Any truthy element is a set bit.
+
+    :param bitlist: List of the bits of the hash value.
+
+    :return: The packed hash value.
+
+    :rtype: int
+    """
+    if len(bitlist) == 0:
+        return 0
+
+    return int("".join("1" if bit else "0" for bit in bitlist), 2)
+
+
+if hasattr(int, "bit_count"):
+
+    def popcount(value: int) -> int:
+        """
+        Number of set bits of a non-negative integer.
+
+        :rtype: int
+        """
+        return value.bit_count()  # type: ignore
+
+else:  # python < 3.10
+
+    def popcount(value: int) -> int:
+        """
+        Number of set bits of a non-negative integer.
+
+        :rtype: int
+        """
+        return bin(value).count("1")
+
+
+def hamming_distance(hash_a: int, hash_b: int) -> int:
+    """
+    Hamming distance of two packed hash values, the number of bits that are
+    different.
+
+    :param hash_a: Packed hash value.
+
+    :param hash_b: Packed hash value.
+
+    :return: Hamming distance of the hash values.
+
+    :rtype: int
+    """
+    return popcount(hash_a ^ hash_b)
+
+
+def similarity_threshold(similar_percentage: float = 15, bits_in_hash: int = 64) -> int:
+    """
+    Maximum hamming distance of two similar hash values, the hash values are
+    similar if at most similar_percentage percent of their bits are different.
+
+    :return: The maximum distance of similar hash values.
+
+    :rtype: int
+    """
+    return ceil((similar_percentage / 100) * bits_in_hash)
+
+
+if hasattr(np, "bitwise_count"):
+
+    def popcount64(array: np.ndarray) -> np.ndarray:
+        """
+        Number of set bits of every element of an uint64 array.
+
+        :rtype: numpy.ndarray
+        """
+        return np.bitwise_count(array)
+
+else:  # numpy < 2.0
+
+    def popcount64(array: np.ndarray) -> np.ndarray:
+        """
+        Number of set bits of every element of an uint64 array.
+
+        :rtype: numpy.ndarray
+        """
+        array = array - ((array >> np.uint64(1)) & np.uint64(0x5555555555555555))
+        array = (array & np.uint64(0x3333333333333333)) + (
+            (array >> np.uint64(2)) & np.uint64(0x3333333333333333)
+        )
+        array = (array + (array >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+        return ((array * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(
+            np.uint8
+        )
+
+
+def hash_to_int(value: Any) -> int:
+    """
+    Packed value of a hash, which is either an int, a string prefixed with
+    '0x' or '0b' or an object with the hash_int attribute such as VideoHash.
+    """
+    if isinstance(value, str):
+        if value.lower().startswith("0x"):
+            return int(value, 16)
+        if value.lower().startswith("0b"):
+            return int(value, 2)
+        raise TypeError(
+            "Hash string must start with either '0x' for hexadecimal or '0b' for binary."
+        )
+
+    if hasattr(value, "hash_int"):
+        return value.hash_int
+
+    return int(value)
+
+
+def to_uint64_array(hashes: Union[np.ndarray, Iterable[Any]]) -> np.ndarray:
+    """
+    Pack 64 bit hash values in an uint64 array, the layout used by the bulk
+    distance functions. Arrays of dtype uint64 are returned as is.
+
+    :param hashes: Packed hash values, hexadecimal/binary strings or VideoHash
+                   instances.
+
+    :return: One dimensional array of the hash values.
+
+    :rtype: numpy.ndarray
+    """
+    if isinstance(hashes, np.ndarray) and hashes.dtype == np.uint64:
+        return hashes.reshape(-1)
+
+    return np.array([hash_to_int(value) for value in hashes], dtype=np.uint64)
+
+
+def iter_hamming_distances(
+    queries: Union[np.ndarray, Iterable[Any]],
+    hashes: Union[np.ndarray, Iterable[Any]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    Compute the hamming distances of every query to every hash value, block
+    by block. Every block has at most chunk_size distances, the full matrix
+    is never allocated.
+
+    :param queries: The hash values to look for.
+
+    :param hashes: The hash values of the catalogue.
+
+    :param chunk_size: Maximum number of distances in a block.
+
+    :return: Generator of (query offset, hash offset, distances), distances is
+             an uint8 array of shape (number of queries, number of hashes) of
+             the block.
+
+    :rtype: Iterator[Tuple[int, int, numpy.ndarray]]
+    """
+    queries = to_uint64_array(queries)
+    hashes = to_uint64_array(hashes)
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+
+    hashes_per_block = min(max(len(hashes), 1), chunk_size)
+    queries_per_block = max(1, chunk_size // hashes_per_block)
+
+    for query_offset in range(0, len(queries), queries_per_block):
+        query_block = queries[query_offset : query_offset + queries_per_block]
+
+        for hash_offset in range(0, len(hashes), hashes_per_block):
+            hash_block = hashes[hash_offset : hash_offset + hashes_per_block]
+
+            yield query_offset, hash_offset, popcount64(
+                np.bitwise_xor(query_block[:, np.newaxis], hash_block[np.newaxis, :])
+            ).astype(np.uint8)
+
+
+def hamming_distances(
+    query: Union[Any, np.ndarray, Iterable[Any]],
+    hashes: Union[np.ndarray, Iterable[Any]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Hamming distances of one query to every hash value, or of many queries
+    to every hash value.
+
+    The distances are computed chunk_size at a time but the result holds all
+    of them, a byte per pair. For large catalogues pass an out array mapped
+    to a file, e.g. a numpy.memmap, or use iter_hamming_distances or
+    find_similar, which never hold the whole matrix.
+
+    :param query: A hash value, or a list or an array of hash values.
+
+    :param hashes: The hash values of the catalogue.
+
+    :param chunk_size: Maximum number of distances computed at once.
+
+    :param out: uint8 array the distances are written to, of the shape of
+                the result. Default is a new array.
+
+    :return: uint8 array of the distances, of shape (number of hashes,) for a
+             single query and (number of queries, number of hashes) for many.
+             out if it is passed.
+
+    :rtype: numpy.ndarray
+
+    :raises ValueError: If out is not an uint8 array of the shape of the
+                        result.
+    """
+    single_query = isinstance(query, (str, int, np.integer)) or hasattr(
+        query, "hash_int"
+    )
+    queries = to_uint64_array([query] if single_query else query)
+    hashes = to_uint64_array(hashes)
+
+    shape = (len(queries), len(hashes))
+    if out is None:
+        distances = np.empty(shape, dtype=np.uint8)
+    else:
+        expected_shape = shape[1:] if single_query else shape
+        if out.dtype != np.uint8 or out.shape != expected_shape:
+            raise ValueError(
+                f"out must be an uint8 array of shape {expected_shape}, not "
+                + f"{out.dtype} of shape {out.shape}."
+            )
+        distances = out.reshape(shape)
+    for query_offset, hash_offset, block in iter_hamming_distances(
+        queries, hashes, chunk_size=chunk_size
+    ):
+        distances[
+            query_offset : query_offset + block.shape[0],
+            hash_offset : hash_offset + block.shape[1],
+        ] = block
+
+    if out is not None:
+        return out
+    if single_query:
+        return distances[0]
+    return distances
+
+
+def find_similar(
+    queries: Union[Any, np.ndarray, Iterable[Any]],
+    hashes: Union[np.ndarray, Iterable[Any]],
+    similar_percentage: float = 15,
+    bits_in_hash: int = 64,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the hash values that are similar to the queries, with the same
+    threshold as VideoHash.is_similar. Only the matches are kept in memory.
+
+    :param queries: A hash value, or a list or an array of hash values.
+
+    :param hashes: The hash values of the catalogue.
+
+    :param similar_percentage: Maximum percentage of different bits.
+
+    :param bits_in_hash: Number of bits of the hash values.
+
+    :param chunk_size: Maximum number of distances computed at once.
+
+    :return: The query indices, the hash indices and the distances of the
+             similar pairs, ordered by query and hash index.
+
+    :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+    """
+    if isinstance(queries, (str, int, np.integer)) or hasattr(queries, "hash_int"):
+        queries = [queries]
+
+    threshold = similarity_threshold(similar_percentage, bits_in_hash)
+
+    query_indices = []
+    hash_indices = []
+    distances = []
+    for query_offset, hash_offset, block in iter_hamming_distances(
+        queries, hashes, chunk_size=chunk_size
+    ):
+        rows, columns = np.nonzero(block <= threshold)
+        query_indices.append(rows + query_offset)
+        hash_indices.append(columns + hash_offset)
+        distances.append(block[rows, columns])
+
+    if not distances:
+        return (
+            np.empty(0, dtype=np.intp),
+            np.empty(0, dtype=np.intp),
+            np.empty(0, dtype=np.uint8),
+        )
+
+    query_index = np.concatenate(query_indices)
+    hash_index = np.concatenate(hash_indices)
+    order = np.lexsort((hash_index, query_index))
+
+    return (
+        query_index[order],
+        hash_index[order],
+        np.concatenate(distances)[order],
+    )
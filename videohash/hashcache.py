@@ -0,0 +1,307 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+# On-disk cache of the video hash values, keyed by the digest of the content
+# of the video file and the parameters of the hash. Hashing the same bytes
+# again with the same parameters returns the stored hash value, FFmpeg is not
+# started.
+#
+# Computing the digest reads the whole file, the (device, inode, size, mtime)
+# of the files already digested are stored too and if they did not change the
+# stored digest is used without reading the file.
+
+# Size of the blocks the video file is read in, when computing the digest.
+DIGEST_BLOCK_SIZE = 1 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    digest TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    hash_hex TEXT NOT NULL,
+    video_duration REAL NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (digest, parameters)
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+class CachedHash(NamedTuple):
+
+    """
+    Hash value of a video stored in the HashCache.
+    """
+
+    hash: str
+    hash_hex: str
+    video_duration: float
+
+    @property
+    def bitlist(self) -> list:
+        return [int(bit) for bit in self.hash[2:]]
+
+
+def file_digest(path: str) -> str:
+    """
+    Digest of the content of a file, BLAKE2b of 256 bits.
+
+    :param path: Path of the file.
+
+    :return: The hexadecimal digest.
+
+    :rtype: str
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(DIGEST_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class HashCache:
+
+    """
+    SQLite database of video hash values keyed by the content digest of the
+    videos and the hashing parameters.
+
+    The cache may be shared by many processes, pass the path of the database
+    to VideoHash.hash_many and every worker opens its own connection.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: Optional[int] = None,
+        max_age: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        :param path: Path of the database file, created if missing.
+
+        :param max_entries: Maximum number of stored hash values, the least
+                            recently used are evicted first. Default is no
+                            limit.
+
+        :param max_age: Maximum age in seconds of the stored hash values.
+                        Default is no limit.
+
+        :param max_bytes: Maximum size in bytes of the pages of the database
+                          in use, the least recently used hash values are
+                          evicted first. The pages they free are reused, the
+                          file does not grow much beyond max_bytes but is not
+                          truncated either. Default is no limit.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        return state
+
+    def __enter__(self) -> "HashCache":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(_SCHEMA)
+        return self._connection
+
+    def close(self) -> None:
+        """
+        Close the connection to the database, it is opened again if needed.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def digest(self, path: str) -> str:
+        """
+        Content digest of a video file. If the file was digested before and
+        its device, inode, size and mtime did not change the stored digest is
+        returned without reading the file.
+
+        :param path: Path of the video file.
+
+        :return: The hexadecimal digest.
+
+        :rtype: str
+        """
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        signature = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+        row = self.connection.execute(
+            "SELECT device, inode, size, mtime_ns, digest FROM files WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row is not None and tuple(row[:4]) == signature:
+            return row[4]
+
+        digest = file_digest(path)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                (path, *signature, digest),
+            )
+        return digest
+
+    @staticmethod
+    def _parameters_key(parameters: Dict[str, Any]) -> str:
+        return json.dumps(parameters, sort_keys=True)
+
+    def get(self, digest: str, parameters: Dict[str, Any]) -> Optional[CachedHash]:
+        """
+        Stored hash value of the content digest and hashing parameters.
+
+        :param digest: Content digest of the video, see digest.
+
+        :param parameters: Parameters of the hash such as the frame_interval
+                           and the algorithm version.
+
+        :return: The stored hash value or None if there is none.
+
+        :rtype: Optional[CachedHash]
+        """
+        key = (digest, self._parameters_key(parameters))
+        row = self.connection.execute(
+            "SELECT hash, hash_hex, video_duration, created FROM results "
+            "WHERE digest = ? AND parameters = ?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        if self.max_age is not None and now - row[3] > self.max_age:
+            return None
+
+        with self.connection:
+            self.connection.execute(
+                "UPDATE results SET accessed = ? WHERE digest = ? AND parameters = ?",
+                (now, *key),
+            )
+        return CachedHash(hash=row[0], hash_hex=row[1], video_duration=row[2])
+
+    def put(
+        self,
+        digest: str,
+        parameters: Dict[str, Any],
+        hash: str,
+        hash_hex: str,
+        video_duration: float,
+    ) -> None:
+        """
+        Store the hash value of the content digest and hashing parameters,
+        then evict the expired and least recently used hash values.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    digest,
+                    self._parameters_key(parameters),
+                    hash,
+                    hash_hex,
+                    video_duration,
+                    now,
+                    now,
+                ),
+            )
+        self.evict()
+
+    def size(self) -> int:
+        """
+        Size in bytes of the pages of the database in use, the free pages
+        left by the deleted rows are not counted.
+
+        :rtype: int
+        """
+        page_count, free_pages, page_size = (
+            self.connection.execute(f"PRAGMA {pragma}").fetchone()[0]
+            for pragma in ("page_count", "freelist_count", "page_size")
+        )
+        return (page_count - free_pages) * page_size
+
+    def evict(self) -> None:
+        """
+        Delete the hash values older than max_age and the least recently used
+        hash values above max_entries or max_bytes, and the digests of the
+        files that no longer have any hash value.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        with self.connection:
+            if self.max_age is not None:
+                self.connection.execute(
+                    "DELETE FROM results WHERE created < ?",
+                    (time.time() - self.max_age,),
+                )
+
+            if self.max_entries is not None:
+                self.connection.execute(
+                    "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results "
+                    "ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+            self._delete_orphan_files()
+
+            # a page is only freed once all its rows are deleted, a tenth of
+            # the hash values is evicted at a time
+            while self.max_bytes is not None and self.size() > self.max_bytes:
+                count = len(self)
+                if count == 0:
+                    break
+                self.connection.execute(
+                    "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results "
+                    "ORDER BY accessed LIMIT ?)",
+                    (max(1, count // 10),),
+                )
+                self._delete_orphan_files()
+
+    def _delete_orphan_files(self) -> None:
+        self.connection.execute(
+            "DELETE FROM files WHERE digest NOT IN (SELECT digest FROM results)"
+        )
@@ -0,0 +1,485 @@
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .hammingdistance import (
+    hash_to_int,
+    popcount64,
+    similarity_threshold,
+    to_uint64_array,
+)
+
+# Multi-index hashing of 64 bit hash values.
+#
+# The bits of the hash values are split in bands of band_bits bits. If the
+# hamming distance of two hash values is at most r, at least one of their
+# bands is at most r // bands bits apart(pigeonhole principle). A radius
+# query looks up the hash values whose band is within r // bands of the band
+# of the query, in every band, and only computes the distance of these
+# candidates.
+#
+# Each band is stored as its sorted keys and the positions of the hash values
+# in that order, the lookups are binary searches and every array can be
+# memory-mapped. Hash values inserted after the index was built or loaded are
+# kept in a small in-memory delta that is scanned, deleted hash values are
+# masked until the index is saved.
+
+HASH_INDEX_VERSION = 1
+
+# Number of hash values in the delta that triggers a rebuild of the bands.
+DEFAULT_MERGE_THRESHOLD = 1 << 16
+
+# A query scans every hash value if the bands yield more candidates than this
+# fraction of the index, the lookups would not save any work.
+LINEAR_SCAN_FRACTION = 0.25
+
+_ID_DTYPE = np.int64
+
+
+@lru_cache(maxsize=None)
+def _band_masks(band_bits: int, radius: int) -> np.ndarray:
+    """
+    Every band_bits bits value with at most radius set bits, the XOR masks of
+    the band keys within radius of a key.
+
+    :rtype: numpy.ndarray
+    """
+    values = np.arange(1 << band_bits, dtype=np.uint64)
+    masks = values[popcount64(values) <= radius]
+    masks.setflags(write=False)
+    return masks
+
+
+def _band_dtype(band_bits: int) -> Any:
+    if band_bits <= 8:
+        return np.uint8
+    return np.uint16
+
+
+def _ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """
+    Concatenation of the ranges [start, stop) as one array.
+
+    :rtype: numpy.ndarray
+    """
+    lengths = stops - starts
+    nonempty = lengths > 0
+    starts, lengths = starts[nonempty], lengths[nonempty]
+    if len(lengths) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(
+        lengths.sum()
+    )
+
+
+class HashIndex:
+    """
+    Index of 64 bit hash values for near-duplicate lookups under the hamming
+    distance, supports insert, delete, radius and k nearest neighbours
+    queries. Every hash value has an integer id, such as the row id of the
+    video in a database.
+
+    The index is saved in a directory of .npy files and loaded memory-mapped,
+    only the pages touched by the queries are read from the disk.
+    """
+
+    def __init__(
+        self,
+        bits_in_hash: int = 64,
+        bands: int = 4,
+        merge_threshold: int = DEFAULT_MERGE_THRESHOLD,
+    ) -> None:
+        """
+        :param bits_in_hash: Number of bits of the hash values, only 64 bit
+                             hash values are supported.
+
+        :param bands: Number of bands the hash values are split into, the
+                      bands must be at most 16 bits wide. More bands make
+                      the lookups of large radius cheaper and the buckets
+                      bigger.
+
+        :param merge_threshold: Number of inserted hash values that triggers
+                                a rebuild of the bands.
+
+        :raises ValueError: If bits_in_hash or bands is not supported.
+        """
+        if bits_in_hash != 64:
+            raise ValueError("HashIndex only supports 64 bit hash values.")
+
+        if bands < 1 or bits_in_hash % bands != 0 or bits_in_hash // bands > 16:
+            raise ValueError(
+                f"bands must split the {bits_in_hash} bits in bands of at most 16 bits, "
+                f"{bands} does not."
+            )
+
+        self.bits_in_hash = bits_in_hash
+        self.bands = bands
+        self.band_bits = bits_in_hash // bands
+        self.merge_threshold = merge_threshold
+
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._ids = np.empty(0, dtype=_ID_DTYPE)
+        self._id_order = np.empty(0, dtype=np.intp)
+        self._band_keys: List[np.ndarray] = []
+        self._band_positions: List[np.ndarray] = []
+        self._deleted: Optional[np.ndarray] = None
+        self._delta_hashes: List[int] = []
+        self._delta_ids: List[int] = []
+        self._build_bands()
+
+    def __len__(self) -> int:
+        deleted = 0 if self._deleted is None else int(self._deleted.sum())
+        return len(self._hashes) - deleted + len(self._delta_hashes)
+
+    def _band(self, hashes: np.ndarray, band: int) -> np.ndarray:
+        shift = np.uint64(self.bits_in_hash - (band + 1) * self.band_bits)
+        mask = np.uint64((1 << self.band_bits) - 1)
+        return ((hashes >> shift) & mask).astype(_band_dtype(self.band_bits))
+
+    def _build_bands(self) -> None:
+        position_dtype = np.uint32 if len(self._hashes) < (1 << 32) else np.uint64
+
+        self._band_keys = []
+        self._band_positions = []
+        for band in range(self.bands):
+            keys = self._band(self._hashes, band)
+            order = np.argsort(keys, kind="stable")
+            self._band_keys.append(keys[order])
+            self._band_positions.append(order.astype(position_dtype))
+
+        self._id_order = np.argsort(self._ids, kind="stable")
+
+    def _merge(self) -> None:
+        """
+        Move the delta and drop the deleted hash values, then rebuild the
+        bands. A memory-mapped index is copied into memory.
+        """
+        hashes = np.asarray(self._hashes)
+        ids = np.asarray(self._ids)
+        if self._deleted is not None:
+            hashes = hashes[~self._deleted]
+            ids = ids[~self._deleted]
+
+        self._hashes = np.concatenate(
+            [hashes, np.array(self._delta_hashes, dtype=np.uint64)]
+        )
+        self._ids = np.concatenate([ids, np.array(self._delta_ids, dtype=_ID_DTYPE)])
+        self._deleted = None
+        self._delta_hashes = []
+        self._delta_ids = []
+        self._build_bands()
+
+    def insert(self, hash_value: Any, id: int) -> None:
+        """
+        Add a hash value to the index.
+
+        :param hash_value: Packed hash value, hexadecimal/binary string or a
+                           VideoHash instance.
+
+        :param id: Integer id of the hash value, returned by the queries.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        value = hash_to_int(hash_value)
+        if not 0 <= value < (1 << self.bits_in_hash):
+            raise ValueError(
+                f"{hash_value} is not a {self.bits_in_hash} bit hash value."
+            )
+
+        self._delta_hashes.append(value)
+        self._delta_ids.append(int(id))
+
+        if len(self._delta_hashes) >= self.merge_threshold:
+            self._merge()
+
+    def insert_many(
+        self,
+        hashes: Union[np.ndarray, Iterable[Any]],
+        ids: Union[np.ndarray, Iterable[int]],
+    ) -> None:
+        """
+        Add many hash values to the index and rebuild the bands once, the
+        way to build the index of a catalogue.
+
+        :param hashes: The hash values, an uint64 array or a list of values
+                       accepted by insert.
+
+        :param ids: The ids of the hash values, in the same order.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        hashes = to_uint64_array(hashes)
+        ids = np.asarray(list(ids) if not isinstance(ids, np.ndarray) else ids)
+        if len(hashes) != len(ids):
+            raise ValueError(
+                f"Got {len(hashes)} hash values and {len(ids)} ids, they must be as many."
+            )
+
+        self._delta_hashes.extend(int(value) for value in hashes)
+        self._delta_ids.extend(int(id) for id in ids)
+        self._merge()
+
+    def delete(self, id: int) -> int:
+        """
+        Remove the hash values of an id from the index.
+
+        :param id: Id of the hash values to remove.
+
+        :return: Number of hash values removed.
+
+        :rtype: int
+        """
+        removed = 0
+
+        start = np.searchsorted(self._ids, id, side="left", sorter=self._id_order)
+        stop = np.searchsorted(self._ids, id, side="right", sorter=self._id_order)
+        if stop > start:
+            if self._deleted is None:
+                self._deleted = np.zeros(len(self._hashes), dtype=bool)
+            positions = self._id_order[start:stop]
+            removed += int((~self._deleted[positions]).sum())
+            self._deleted[positions] = True
+
+        kept = [
+            (value, delta_id)
+            for value, delta_id in zip(self._delta_hashes, self._delta_ids)
+            if delta_id != id
+        ]
+        removed += len(self._delta_hashes) - len(kept)
+        self._delta_hashes = [value for value, _ in kept]
+        self._delta_ids = [delta_id for _, delta_id in kept]
+
+        return removed
+
+    def _candidates(self, value: int, band_radius: int) -> Optional[np.ndarray]:
+        """
+        Positions of the hash values that have at least one band within
+        band_radius of the band of value, None if scanning the whole index is
+        cheaper.
+        """
+        masks = _band_masks(self.band_bits, band_radius)
+        query = np.array([value], dtype=np.uint64)
+
+        lookups = []
+        total = 0
+        for band in range(self.bands):
+            keys = self._band_keys[band]
+            neighbours = (masks ^ self._band(query, band).astype(np.uint64)).astype(
+                keys.dtype
+            )
+            starts = np.searchsorted(keys, neighbours, side="left")
+            stops = np.searchsorted(keys, neighbours, side="right")
+            total += int((stops - starts).sum())
+            if total > LINEAR_SCAN_FRACTION * len(self._hashes):
+                return None
+            lookups.append((band, starts, stops))
+
+        positions = [
+            self._band_positions[band][_ranges(starts, stops)]
+            for band, starts, stops in lookups
+        ]
+        return np.unique(np.concatenate(positions))
+
+    def _search(self, value: int, band_radius: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ids and distances of the candidates of band_radius, and of every hash
+        value of the delta. Every hash value within
+        bands * (band_radius + 1) - 1 of value is a candidate.
+        """
+        query = np.uint64(value)
+
+        positions = self._candidates(value, band_radius)
+        if positions is None:
+            hashes, ids = self._hashes, self._ids
+            deleted = self._deleted
+        else:
+            hashes, ids = self._hashes[positions], self._ids[positions]
+            deleted = None if self._deleted is None else self._deleted[positions]
+
+        distances = popcount64(np.bitwise_xor(hashes, query)).astype(np.uint8)
+        if deleted is not None:
+            distances, ids = distances[~deleted], ids[~deleted]
+
+        if self._delta_hashes:
+            delta_hashes = np.array(self._delta_hashes, dtype=np.uint64)
+            distances = np.concatenate(
+                [distances, popcount64(np.bitwise_xor(delta_hashes, query))]
+            ).astype(np.uint8)
+            ids = np.concatenate([ids, np.array(self._delta_ids, dtype=_ID_DTYPE)])
+
+        return ids, distances
+
+    @staticmethod
+    def _sorted_matches(
+        ids: np.ndarray, distances: np.ndarray, limit: Optional[int] = None
+    ) -> List[Tuple[int, int]]:
+        order = np.lexsort((ids, distances))[:limit]
+        return [(int(ids[i]), int(distances[i])) for i in order]
+
+    def radius_query(self, hash_value: Any, radius: int) -> List[Tuple[int, int]]:
+        """
+        Find the hash values within radius bits of a hash value.
+
+        :param hash_value: The hash value to look for.
+
+        :param radius: Maximum hamming distance of the matches.
+
+        :return: List of (id, distance) of the matches, nearest first and by
+                 id for equal distances.
+
+        :rtype: List[Tuple[int, int]]
+        """
+        if radius < 0:
+            return []
+
+        band_radius = min(radius // self.bands, self.band_bits)
+        ids, distances = self._search(hash_to_int(hash_value), band_radius)
+
+        within = distances <= radius
+        return self._sorted_matches(ids[within], distances[within])
+
+    def query_similar(
+        self, hash_value: Any, similar_percentage: float = 15
+    ) -> List[Tuple[int, int]]:
+        """
+        Find the hash values similar to a hash value, with the same threshold
+        as VideoHash.is_similar.
+
+        :return: List of (id, distance) of the similar hash values.
+
+        :rtype: List[Tuple[int, int]]
+        """
+        return self.radius_query(
+            hash_value, similarity_threshold(similar_percentage, self.bits_in_hash)
+        )
+
+    def knn(self, hash_value: Any, k: int) -> List[Tuple[int, int]]:
+        """
+        Find the k nearest hash values of a hash value. The band radius grows
+        until k hash values are within the radius that the lookups guarantee
+        to be complete.
+
+        :param hash_value: The hash value to look for.
+
+        :param k: Number of neighbours.
+
+        :return: List of (id, distance) of at most k neighbours, nearest first
+                 and by id for equal distances.
+
+        :rtype: List[Tuple[int, int]]
+        """
+        if k < 1:
+            return []
+
+        value = hash_to_int(hash_value)
+        for band_radius in range(self.band_bits + 1):
+            ids, distances = self._search(value, band_radius)
+
+            complete_radius = self.bands * (band_radius + 1) - 1
+            if (distances <= complete_radius).sum() >= k:
+                break
+
+        return self._sorted_matches(ids, distances, limit=k)
+
+    def save(self, directory: str) -> None:
+        """
+        Save the index in a directory, the delta and the deleted hash values
+        are merged first.
+
+        :param directory: Path of the directory, created if missing.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self._merge()
+        os.makedirs(directory, exist_ok=True)
+
+        arrays: Dict[str, np.ndarray] = {
+            "hashes": self._hashes,
+            "ids": self._ids,
+            "id_order": self._id_order,
+        }
+        for band in range(self.bands):
+            arrays[f"band_{band}_keys"] = self._band_keys[band]
+            arrays[f"band_{band}_positions"] = self._band_positions[band]
+
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump(
+                {
+                    "version": HASH_INDEX_VERSION,
+                    "bits_in_hash": self.bits_in_hash,
+                    "bands": self.bands,
+                    "size": len(self._hashes),
+                },
+                f,
+            )
+
+    @classmethod
+    def load(
+        cls,
+        directory: str,
+        mmap: bool = True,
+        merge_threshold: int = DEFAULT_MERGE_THRESHOLD,
+    ) -> "HashIndex":
+        """
+        Load an index saved by save.
+
+        :param directory: Path of the directory of the index.
+
+        :param mmap: Memory-map the arrays instead of reading them.
+
+        :param merge_threshold: Number of inserted hash values that triggers
+                                a rebuild of the bands, which reads the
+                                memory-mapped arrays in memory.
+
+        :return: The index.
+
+        :rtype: HashIndex
+
+        :raises ValueError: If the index was saved by an incompatible version.
+        """
+        with open(os.path.join(directory, "index.json")) as f:
+            header = json.load(f)
+
+        if header.get("version") != HASH_INDEX_VERSION:
+            raise ValueError(
+                f"Unsupported hash index version {header.get('version')} in {directory}."
+            )
+
+        index = cls(
+            bits_in_hash=header["bits_in_hash"],
+            bands=header["bands"],
+            merge_threshold=merge_threshold,
+        )
+
+        def load_array(name: str) -> np.ndarray:
+            return np.load(
+                os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None
+            )
+
+        index._hashes = load_array("hashes")
+        index._ids = load_array("ids")
+        index._id_order = load_array("id_order")
+        index._band_keys = [
+            load_array(f"band_{band}_keys") for band in range(index.bands)
+        ]
+        index._band_positions = [
+            load_array(f"band_{band}_positions") for band in range(index.bands)
+        ]
+
+        if len(index._hashes) != header["size"]:
+            raise ValueError(f"The hash index in {directory} is truncated.")
+
+        return index
@@ -0,0 +1,285 @@
+import os
+import struct
+from typing import Any, Iterable, Optional, Union
+
+import numpy as np
+
+from .constants import HASH_ALGORITHM_VERSION
+from .hammingdistance import to_uint64_array
+from .hashvalue import VideoHashValue
+
+# Binary file of a collection of 64 bit video hash values with their ids and
+# the durations of the videos.
+#
+# The file is a header of HEADER_SIZE bytes followed by fixed width records
+# of RECORD_DTYPE, little endian. The number of records is not stored, it is
+# the size of the file after the header divided by the size of a record, so
+# appending is writing records at the end of the file. An incomplete record
+# at the end of the file, e.g. of an interrupted append, is ignored and is
+# overwritten by the next append.
+#
+# The records are memory-mapped, opening a file does not read it and the
+# hashes, ids and durations are views of the mapping that the bulk distance
+# functions of the hammingdistance module accept without copying them.
+
+# First bytes of a hash store file.
+HASH_STORE_MAGIC = b"VHSTORE\0"
+
+# Version of the file format.
+HASH_STORE_VERSION = 1
+
+# magic, format version, bits_in_hash, algorithm version, padded to 64 bytes
+# so that the records are aligned.
+HEADER_FORMAT = "<8sHHI"
+HEADER_SIZE = 64
+
+RECORD_DTYPE = np.dtype([("hash", "<u8"), ("id", "<u8"), ("duration", "<f8")])
+
+
+class HashStore:
+    """
+    Binary on-disk collection of video hash values, ids and durations. Create
+    a file with HashStore.create, open it with HashStore.open and add the
+    hash values with append.
+
+    The durations of the videos are NaN if unknown.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        bits_in_hash: int = 64,
+        algorithm_version: int = HASH_ALGORITHM_VERSION,
+        mmap: bool = True,
+    ) -> None:
+        """
+        Use HashStore.create and HashStore.open instead.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self.path = path
+        self.bits_in_hash = bits_in_hash
+        self.algorithm_version = algorithm_version
+        self.mmap = mmap
+        self._load()
+
+    @classmethod
+    def create(
+        cls,
+        path: str,
+        bits_in_hash: int = 64,
+        algorithm_version: int = HASH_ALGORITHM_VERSION,
+    ) -> "HashStore":
+        """
+        Create an empty hash store file.
+
+        :param path: Path of the file, must not exist.
+
+        :param bits_in_hash: Number of bits of the hash values, at most 64.
+
+        :param algorithm_version: Version of the hashing algorithm of the hash
+                                  values, see constants.HASH_ALGORITHM_VERSION.
+
+        :return: The empty store.
+
+        :rtype: HashStore
+
+        :raises FileExistsError: If the file exists.
+
+        :raises ValueError: If bits_in_hash is larger than 64.
+        """
+        if not 0 < bits_in_hash <= 64:
+            raise ValueError("HashStore only supports hash values of up to 64 bits.")
+
+        header = struct.pack(
+            HEADER_FORMAT,
+            HASH_STORE_MAGIC,
+            HASH_STORE_VERSION,
+            bits_in_hash,
+            algorithm_version,
+        ).ljust(HEADER_SIZE, b"\0")
+
+        with open(path, "xb") as f:
+            f.write(header)
+
+        return cls(path, bits_in_hash, algorithm_version)
+
+    @classmethod
+    def open(
+        cls,
+        path: str,
+        mmap: bool = True,
+        algorithm_version: Optional[int] = HASH_ALGORITHM_VERSION,
+    ) -> "HashStore":
+        """
+        Open a hash store file.
+
+        :param path: Path of the file.
+
+        :param mmap: Memory-map the records instead of reading them, the
+                     file opens in constant time whatever its size.
+
+        :param algorithm_version: Expected version of the hashing algorithm,
+                                  None to accept any version. Hash values of
+                                  different versions are not comparable.
+
+        :return: The store.
+
+        :rtype: HashStore
+
+        :raises ValueError: If the file is not a hash store, is of an
+                            unsupported format version or its hash values
+                            are of another algorithm_version.
+        """
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+
+        if len(header) < HEADER_SIZE or not header.startswith(HASH_STORE_MAGIC):
+            raise ValueError(f"'{path}' is not a hash store file.")
+
+        _, version, bits_in_hash, stored_algorithm_version = struct.unpack_from(
+            HEADER_FORMAT, header
+        )
+        if version != HASH_STORE_VERSION:
+            raise ValueError(f"Unsupported hash store version {version} in '{path}'.")
+
+        if (
+            algorithm_version is not None
+            and stored_algorithm_version != algorithm_version
+        ):
+            raise ValueError(
+                f"The hash values in '{path}' were computed by version "
+                + f"{stored_algorithm_version} of the algorithm, not {algorithm_version}."
+            )
+
+        return cls(path, bits_in_hash, stored_algorithm_version, mmap=mmap)
+
+    def _load(self) -> None:
+        """Map or read the complete records of the file."""
+        count = (os.path.getsize(self.path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+
+        if count <= 0:
+            self._records = np.zeros(0, dtype=RECORD_DTYPE)
+        elif self.mmap:
+            self._records = np.memmap(
+                self.path,
+                dtype=RECORD_DTYPE,
+                mode="r",
+                offset=HEADER_SIZE,
+                shape=(count,),
+            )
+        else:
+            with open(self.path, "rb") as f:
+                f.seek(HEADER_SIZE)
+                self._records = np.fromfile(f, dtype=RECORD_DTYPE, count=count)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def records(self) -> np.ndarray:
+        """The records, a structured array with the hash, id and duration fields."""
+        return self._records
+
+    @property
+    def hashes(self) -> np.ndarray:
+        """The packed hash values, an uint64 view of the records."""
+        return self._records["hash"]
+
+    @property
+    def ids(self) -> np.ndarray:
+        """The ids of the hash values, an uint64 view of the records."""
+        return self._records["id"]
+
+    @property
+    def durations(self) -> np.ndarray:
+        """The durations of the videos in seconds, a float64 view of the records."""
+        return self._records["duration"]
+
+    def value(self, index: int) -> VideoHashValue:
+        """
+        The hash value of a record.
+
+        :param index: Index of the record.
+
+        :rtype: VideoHashValue
+        """
+        record = self._records[index]
+        duration = float(record["duration"])
+        return VideoHashValue(
+            int(record["hash"]),
+            video_duration=None if np.isnan(duration) else duration,
+            bits_in_hash=self.bits_in_hash,
+        )
+
+    def append(
+        self,
+        hashes: Union[np.ndarray, Iterable[Any]],
+        ids: Union[np.ndarray, Iterable[int]],
+        durations: Optional[Union[np.ndarray, Iterable[Optional[float]]]] = None,
+    ) -> None:
+        """
+        Append hash values at the end of the file, the store is mapped or read
+        again afterwards.
+
+        :param hashes: Packed hash values, hexadecimal/binary strings,
+                       VideoHash or VideoHashValue instances.
+
+        :param ids: The ids of the hash values, non-negative integers.
+
+        :param durations: The durations of the videos in seconds, None or NaN
+                          if unknown. Default is the video_duration of the
+                          VideoHash and VideoHashValue instances.
+
+        :return: None
+
+        :rtype: NoneType
+
+        :raises ValueError: If the lengths differ or a hash value has more
+                            than bits_in_hash bits.
+        """
+        values = hashes if isinstance(hashes, np.ndarray) else list(hashes)
+
+        if durations is None and isinstance(values, np.ndarray):
+            durations = np.full(len(values), np.nan)
+        elif durations is None:
+            durations = [getattr(value, "video_duration", None) for value in values]
+
+        records = np.zeros(len(values), dtype=RECORD_DTYPE)
+        records["hash"] = to_uint64_array(values)
+
+        id_array = np.asarray(ids if isinstance(ids, np.ndarray) else list(ids))
+        if isinstance(durations, np.ndarray):
+            duration_array = durations.astype(np.float64)
+        else:
+            duration_array = np.array(
+                [np.nan if duration is None else duration for duration in durations],
+                dtype=np.float64,
+            )
+        if not len(records) == len(id_array) == len(duration_array):
+            raise ValueError("hashes, ids and durations must have the same length.")
+
+        records["id"] = id_array
+        records["duration"] = duration_array
+
+        if self.bits_in_hash < 64 and np.any(
+            records["hash"] >> np.uint64(self.bits_in_hash)
+        ):
+            raise ValueError(f"A hash value has more than {self.bits_in_hash} bits.")
+
+        # release the mapping before writing to the file
+        self._records = np.zeros(0, dtype=RECORD_DTYPE)
+        with open(self.path, "r+b") as f:
+            # the records appended since the store was opened are kept, an
+            # incomplete record left by an interrupted append is overwritten
+            size = os.fstat(f.fileno()).st_size
+            complete = HEADER_SIZE + (
+                (size - HEADER_SIZE) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+            )
+            f.truncate(complete)
+            f.seek(complete)
+            f.write(records.tobytes())
+
+        self._load()
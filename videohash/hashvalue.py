@@ -0,0 +1,232 @@
+from typing import Any, List, Optional, Tuple
+
+from .hammingdistance import bitlist_to_int, hamming_distance, similarity_threshold
+
+# Module of the compact hash value of a video. A VideoHash instance keeps the
+# collage, the paths of its files and the bitlists it computed the hash value
+# from, a VideoHashValue only the packed bits and the duration. Millions of
+# them can be kept in memory and compared.
+
+# Percentage of the bits that may differ for two videos to be similar, same
+# as VideoHash.similar_percentage.
+SIMILAR_PERCENTAGE = 15
+
+
+class VideoHashValue:
+
+    """
+    Immutable hash value of a video, the packed bits and the duration.
+
+    Supports the same comparisons as VideoHash: '-' is the hamming distance,
+    matches means a hamming distance of zero, and is_similar. The values are
+    hashable, they can be dictionary keys and set members, and pickle to a
+    few dozen bytes. '==' is True only for a VideoHashValue of the same bits,
+    or a VideoHash through its own '=='.
+    """
+
+    __slots__ = ("hash_int", "video_duration", "bits_in_hash")
+
+    hash_int: int
+    video_duration: Optional[float]
+    bits_in_hash: int
+
+    def __init__(
+        self,
+        hash_int: int,
+        video_duration: Optional[float] = None,
+        bits_in_hash: int = 64,
+    ) -> None:
+        """
+        :param hash_int: The packed hash value, the first bit of the bitlist
+                         is the most significant bit.
+
+        :param video_duration: Duration of the video in seconds.
+
+        :param bits_in_hash: Number of bits of the hash value.
+
+        :return: None
+
+        :rtype: NoneType
+
+        :raises ValueError: If hash_int does not fit in bits_in_hash bits.
+        """
+        if hash_int < 0 or hash_int >> bits_in_hash:
+            raise ValueError(f"The hash value does not fit in {bits_in_hash} bits.")
+
+        object.__setattr__(self, "hash_int", int(hash_int))
+        object.__setattr__(self, "video_duration", video_duration)
+        object.__setattr__(self, "bits_in_hash", bits_in_hash)
+
+    @classmethod
+    def from_hex(
+        cls,
+        hash_hex: str,
+        video_duration: Optional[float] = None,
+        bits_in_hash: int = 64,
+    ) -> "VideoHashValue":
+        """
+        The hash value of a hexadecimal string prefixed with '0x', such as
+        VideoHash.hash_hex.
+
+        :rtype: VideoHashValue
+        """
+        return cls(int(hash_hex, 16), video_duration, bits_in_hash)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("VideoHashValue is immutable.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("VideoHashValue is immutable.")
+
+    def __reduce__(self) -> Tuple[Any, Tuple[int, Optional[float], int]]:
+        return (
+            self.__class__,
+            (self.hash_int, self.video_duration, self.bits_in_hash),
+        )
+
+    @property
+    def hash(self) -> str:
+        """The hash value as a bitstring prefixed with '0b', as VideoHash.hash."""
+        return "0b" + format(self.hash_int, f"0{self.bits_in_hash}b")
+
+    @property
+    def hash_hex(self) -> str:
+        """The hash value as a hexadecimal string, as VideoHash.hash_hex."""
+        return hex(self.hash_int)
+
+    @property
+    def bitlist(self) -> List[int]:
+        """The bits of the hash value, as VideoHash.bitlist."""
+        return [int(bit) for bit in self.hash[2:]]
+
+    def __str__(self) -> str:
+        return self.hash
+
+    def __repr__(self) -> str:
+        return (
+            f"VideoHashValue(hash_hex={self.hash_hex!r}, "
+            + f"video_duration={self.video_duration!r})"
+        )
+
+    def __len__(self) -> int:
+        return self.bits_in_hash
+
+    def __hash__(self) -> int:
+        return hash((self.hash_int, self.bits_in_hash))
+
+    def _other_int(self, other: object) -> Optional[int]:
+        """
+        Packed hash value of other, None if other is not a hash value.
+
+        :raises ValueError: If other does not have bits_in_hash bits.
+        """
+        mismatch = ValueError(
+            "Can not compare different bits hashes. You must supply a %d bits hash."
+            % self.bits_in_hash
+        )
+
+        if isinstance(other, str):
+            if other.lower().startswith("0x"):
+                other_int = int(other, 16)
+                if other_int >> self.bits_in_hash:
+                    raise mismatch
+                return other_int
+
+            if other.lower().startswith("0b"):
+                if len(other) != self.bits_in_hash + 2:
+                    raise mismatch
+                return int(other, 2)
+
+            raise TypeError(
+                "Hash string must start with either '0x' for hexadecimal or '0b' for binary."
+            )
+
+        if isinstance(other, list):
+            if len(other) != self.bits_in_hash:
+                raise mismatch
+            return bitlist_to_int(other)
+
+        # VideoHashValue and VideoHash
+        if hasattr(other, "hash_int") and hasattr(other, "bits_in_hash"):
+            if getattr(other, "bits_in_hash") != self.bits_in_hash:
+                raise mismatch
+            return getattr(other, "hash_int")
+
+        return None
+
+    def __sub__(self, other: object) -> int:
+        """
+        Hamming distance to other, a VideoHashValue, a VideoHash, a bitlist
+        or a string prefixed with '0x' or '0b'.
+
+        :rtype: int
+
+        :raises TypeError: If other is not a hash value.
+
+        :raises ValueError: If other does not have the same number of bits.
+        """
+        if other is None:
+            raise TypeError("Other hash is None. And it should not be None.")
+
+        other_int = self._other_int(other)
+        if other_int is None:
+            raise TypeError(
+                "To calculate difference both of the hashes must be either "
+                + "hexadecimal/binary strings or instances of VideoHashValue or "
+                + "VideoHash."
+            )
+
+        return hamming_distance(self.hash_int, other_int)
+
+    def __rsub__(self, other: object) -> int:
+        return self - other
+
+    def __eq__(self, other: object) -> bool:
+        """
+        Only a VideoHashValue is equal, so that the equal values have the same
+        hash. Use matches to compare to strings and bitlists.
+        """
+        if not isinstance(other, VideoHashValue):
+            return NotImplemented
+        return (
+            self.hash_int == other.hash_int and self.bits_in_hash == other.bits_in_hash
+        )
+
+    def __ne__(self, other: object) -> bool:
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return NotImplemented
+        return not equal
+
+    def matches(self, other: object) -> bool:
+        """
+        True if other is the same hash value, a VideoHashValue, a VideoHash, a
+        bitlist or a string prefixed with '0x' or '0b'. Same as '==' of
+        VideoHash.
+
+        :rtype: bool
+        """
+        try:
+            other_int = self._other_int(other)
+        except (TypeError, ValueError):
+            return False
+        return other_int is not None and other_int == self.hash_int
+
+    def is_similar(self, other: object) -> bool:
+        """
+        True if at most SIMILAR_PERCENTAGE percent of the bits differ, same
+        as VideoHash.is_similar.
+
+        :rtype: bool
+        """
+        return self - other <= similarity_threshold(
+            SIMILAR_PERCENTAGE, self.bits_in_hash
+        )
+
+    def is_diffrent(self, other: object) -> bool:
+        """
+        Refer to the is_similar, if not similar then diffrent.
+
+        :rtype: bool
+        """
+        return not self.is_similar(other)
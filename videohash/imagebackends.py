@@ -0,0 +1,239 @@
+from typing import Dict, List, Optional, Type
+
+import numpy as np
+import pywt
+from PIL import Image
+
+# Module of the image backends, the engines that do the resampling of the
+# hash: the resize of the frames of the collage and the gray conversion and
+# resize of the collage before its wavelet hash. The dominant colors of the
+# tiles are not part of it, they are computed by a NumPy port of the Lanczos
+# filter of Pillow, see tilemaker.dominant_colors_of_tiles.
+#
+# Pillow, or Pillow-SIMD which replaces it, is the reference. The OpenCV and
+# pyvips backends are experimental: they can be selected with
+# set_image_backend if their package is installed, but their Lanczos filters
+# are not Pillow's and the hash values they give are not known to be the
+# same. The parity tests of tests/test_imagebackends.py compare them with
+# Pillow, they run in the image backends job of the CI. Only use a backend if
+# they pass with it. The cached hash values are keyed by the backend.
+
+
+class ImageBackend:
+    """
+    Base class of the image backends. The images are uint8 NumPy arrays of
+    shape (height, width) or (height, width, 3).
+    """
+
+    name = ""
+
+    @classmethod
+    def available(cls) -> bool:
+        """
+        True if the package of the backend is installed.
+
+        :rtype: bool
+        """
+        return True
+
+    def to_gray(self, image: np.ndarray) -> np.ndarray:
+        """
+        Luma of an RGB image, as Pillow's convert('L').
+
+        :rtype: numpy.ndarray
+        """
+        raise NotImplementedError
+
+    def resize(self, image: np.ndarray, width: int, height: int) -> np.ndarray:
+        """
+        Resample the image to width x height pixels with a Lanczos filter.
+
+        :rtype: numpy.ndarray
+        """
+        raise NotImplementedError
+
+
+class PillowBackend(ImageBackend):
+    """
+    The reference backend, Pillow's Lanczos filter.
+    """
+
+    name = "pillow"
+
+    def to_gray(self, image: np.ndarray) -> np.ndarray:
+        with Image.fromarray(image) as rgb:
+            with rgb.convert("L") as gray:
+                return np.asarray(gray)
+
+    def resize(self, image: np.ndarray, width: int, height: int) -> np.ndarray:
+        with Image.fromarray(image) as original:
+            with original.resize((width, height), Image.LANCZOS) as resized:
+                return np.asarray(resized)
+
+
+class OpenCVBackend(ImageBackend):
+    """
+    OpenCV's cv2.resize with its Lanczos filter, INTER_LANCZOS4, of 8x8
+    pixels.
+    """
+
+    name = "opencv"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import cv2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def to_gray(self, image: np.ndarray) -> np.ndarray:
+        import cv2
+
+        return cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_RGB2GRAY)
+
+    def resize(self, image: np.ndarray, width: int, height: int) -> np.ndarray:
+        import cv2
+
+        return cv2.resize(
+            np.ascontiguousarray(image),
+            (width, height),
+            interpolation=cv2.INTER_LANCZOS4,
+        )
+
+
+class VipsBackend(ImageBackend):
+    """
+    libvips' resize with the lanczos3 kernel, through pyvips. The gray
+    conversion is Pillow's.
+    """
+
+    name = "pyvips"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import pyvips  # noqa: F401
+        except (ImportError, OSError):
+            return False
+        return True
+
+    def to_gray(self, image: np.ndarray) -> np.ndarray:
+        return PillowBackend().to_gray(image)
+
+    def resize(self, image: np.ndarray, width: int, height: int) -> np.ndarray:
+        import pyvips
+
+        bands = 1 if image.ndim == 2 else image.shape[2]
+        original = pyvips.Image.new_from_memory(
+            np.ascontiguousarray(image).tobytes(),
+            image.shape[1],
+            image.shape[0],
+            bands,
+            "uchar",
+        )
+        resized = original.resize(
+            width / image.shape[1], vscale=height / image.shape[0], kernel="lanczos3"
+        )
+        array = np.frombuffer(resized.write_to_memory(), dtype=np.uint8).reshape(
+            resized.height, resized.width, bands
+        )
+        # libvips rounds the size of the output
+        array = array[:height, :width]
+        return array[:, :, 0] if image.ndim == 2 else array
+
+
+IMAGE_BACKENDS: Dict[str, Type[ImageBackend]] = {
+    backend.name: backend for backend in (PillowBackend, OpenCVBackend, VipsBackend)
+}
+
+# The backend of the process.
+_image_backend: ImageBackend = PillowBackend()
+
+
+def available_image_backends() -> List[str]:
+    """
+    Names of the backends whose package is installed.
+
+    :rtype: List[str]
+    """
+    return [name for name, backend in IMAGE_BACKENDS.items() if backend.available()]
+
+
+def get_image_backend() -> ImageBackend:
+    """
+    The backend of the process, Pillow unless set_image_backend was called.
+
+    :rtype: ImageBackend
+    """
+    return _image_backend
+
+
+def set_image_backend(name: str) -> None:
+    """
+    Use a backend for every hash value computed by the process. The OpenCV
+    and pyvips backends are experimental, their hash values may differ from
+    those of Pillow, see the module comment.
+
+    :param name: 'pillow', 'opencv' or 'pyvips'.
+
+    :return: None
+
+    :rtype: NoneType
+
+    :raises ValueError: If there is no backend of that name.
+
+    :raises ImportError: If the package of the backend is not installed.
+    """
+    global _image_backend
+
+    if name not in IMAGE_BACKENDS:
+        raise ValueError(
+            f"Unknown image backend '{name}', use one of {', '.join(IMAGE_BACKENDS)}."
+        )
+
+    backend = IMAGE_BACKENDS[name]
+    if not backend.available():
+        raise ImportError(
+            f"The package of the image backend '{name}' is not installed."
+        )
+
+    _image_backend = backend()
+
+
+def wavelet_hash(
+    image: np.ndarray, hash_size: int = 8, backend: Optional[ImageBackend] = None
+) -> np.ndarray:
+    """
+    Wavelet hash of an RGB image, same as imagehash.whash with its default
+    parameters but the gray conversion and the resize are done by the
+    backend.
+
+    :param image: The image, an uint8 array of shape (height, width, 3).
+
+    :param hash_size: Number of rows and columns of the hash, a power of 2.
+
+    :param backend: Default is the backend of the process.
+
+    :return: The bits of the hash, a boolean array of shape
+             (hash_size, hash_size).
+
+    :rtype: numpy.ndarray
+    """
+    if backend is None:
+        backend = _image_backend
+
+    image_scale = max(2 ** int(np.log2(min(image.shape[:2]))), hash_size)
+    ll_max_level = int(np.log2(image_scale))
+    dwt_level = ll_max_level - int(np.log2(hash_size))
+
+    gray = backend.to_gray(image) if image.ndim == 3 else image
+    pixels = backend.resize(gray, image_scale, image_scale) / 255.0
+
+    # remove the lowest frequency, the mean brightness
+    coefficients = list(pywt.wavedec2(pixels, "haar", level=ll_max_level))
+    coefficients[0] *= 0
+    pixels = pywt.waverec2(coefficients, "haar")
+
+    low = pywt.wavedec2(pixels, "haar", level=dwt_level)[0]
+    return low > np.median(low)
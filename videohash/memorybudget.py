@@ -0,0 +1,197 @@
+import tracemalloc
+from math import ceil
+from threading import Lock
+from typing import Any, Iterable, List, Optional, Union
+
+import numpy as np
+
+from .framesextractor import FRAME_SIZE
+
+# Module of the memory budget of VideoHash, see the max_memory parameter.
+#
+# The memory of a hash value is about a fixed part, the collage and its
+# wavelet hash, plus a part per frame, the frames and their copies in the
+# collage. The frames the budget can hold are computed before the frames
+# are extracted: if a video has more frames than that at the frame_interval,
+# fewer frames are sampled evenly over the video, or, for a stream whose
+# length is unknown, every other frame is dropped whenever the budget is
+# full. The frames only depend on the budget and the video, the hash value
+# of a video is the same for the same budget.
+
+# Bytes of a decoded frame.
+FRAME_BYTES = FRAME_SIZE * FRAME_SIZE * 3
+
+# Memory of a hash value that does not depend on the number of frames.
+BASE_MEMORY = 48 * 1024 * 1024
+
+# Memory per frame, the frame and its copies in the collage.
+MEMORY_PER_FRAME = 4 * FRAME_BYTES
+
+# Smallest number of frames of a hash value, a budget that can not hold them
+# is refused.
+MINIMUM_FRAMES = 4
+
+
+def frames_within_budget(max_memory: int) -> int:
+    """
+    Number of frames a hash value can take within a memory budget.
+
+    :param max_memory: The budget in bytes.
+
+    :rtype: int
+
+    :raises ValueError: If the budget can not hold MINIMUM_FRAMES frames.
+    """
+    frames = (max_memory - BASE_MEMORY) // MEMORY_PER_FRAME
+    if frames < MINIMUM_FRAMES:
+        raise ValueError(
+            f"max_memory must be at least {BASE_MEMORY + MINIMUM_FRAMES * MEMORY_PER_FRAME}"
+            + " bytes."
+        )
+    return int(frames)
+
+
+def budget_frame_count(
+    max_memory: Optional[int],
+    video_duration: float,
+    frame_interval: Union[int, float],
+    frame_count: Optional[int] = None,
+) -> Optional[int]:
+    """
+    The number of frames to sample evenly over a video so that the hash value
+    stays within the budget, see VideoHash.
+
+    :param max_memory: The budget in bytes, None for no budget.
+
+    :param video_duration: Duration of the video in seconds.
+
+    :param frame_interval: Number of frames extracted per unit time.
+
+    :param frame_count: The frame_count asked for, if any.
+
+    :return: frame_count if the frames fit, else the frames within the
+             budget. None if the frames at the frame_interval fit.
+
+    :rtype: Optional[int]
+    """
+    if max_memory is None:
+        return frame_count
+
+    within_budget = frames_within_budget(max_memory)
+    if frame_count:
+        return min(frame_count, within_budget)
+
+    # the fps filter of FFmpeg may output a frame more
+    if ceil(video_duration * frame_interval) + 1 <= within_budget:
+        return None
+    return within_budget
+
+
+class FrameDecimator:
+
+    """
+    Keeps at most max_frames of a sequence of frames of unknown length. When
+    max_frames are kept every other frame is dropped and from then on only
+    one frame of two is kept, so the kept frames are evenly spaced, every
+    stride-th frame of the sequence.
+    """
+
+    def __init__(self, max_frames: Optional[int] = None) -> None:
+        """
+        :param max_frames: Maximum number of frames kept, None for no limit.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self.max_frames = max_frames
+        self.frames: List[np.ndarray] = []
+        self.stride = 1
+        self.count = 0
+
+    def add(self, frame: np.ndarray) -> None:
+        """
+        Add the next frame of the sequence.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        if self.count % self.stride == 0:
+            self.frames.append(frame)
+            if self.max_frames is not None and len(self.frames) > self.max_frames:
+                self.frames = self.frames[::2]
+                self.stride *= 2
+        self.count += 1
+
+    def add_frames(self, frames: Iterable[np.ndarray]) -> List[np.ndarray]:
+        """
+        Add the frames and return the frames kept.
+
+        :rtype: List[numpy.ndarray]
+        """
+        for frame in frames:
+            self.add(frame)
+        return self.frames
+
+
+class MemoryTracker:
+
+    """
+    Context manager that measures the peak of the memory allocated by Python
+    and NumPy meanwhile, in bytes, with tracemalloc. The memory of FFmpeg
+    and the buffers of Pillow are not counted.
+
+    The trackers of the process share tracemalloc: it is started by the first
+    tracker entered and stopped by the last tracker exited, and its peak is
+    never reset. The peak is that of the process, if other hash values are
+    computed by other threads or tasks at the same time their memory is
+    counted too, as for the stage timings. If tracemalloc was started by
+    someone else, the peak since then is counted.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        """
+        :param enabled: If False nothing is measured and peak stays None.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self.enabled = enabled
+        self.peak: Optional[int] = None
+
+    def __enter__(self) -> "MemoryTracker":
+        global _active_trackers, _started_tracing
+
+        if not self.enabled:
+            return self
+
+        with _trackers_lock:
+            if _active_trackers == 0:
+                _started_tracing = not tracemalloc.is_tracing()
+                if _started_tracing:
+                    tracemalloc.start()
+            _active_trackers += 1
+            self._base = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        global _active_trackers, _started_tracing
+
+        if not self.enabled:
+            return
+
+        with _trackers_lock:
+            self.peak = max(0, tracemalloc.get_traced_memory()[1] - self._base)
+            _active_trackers -= 1
+            if _active_trackers == 0 and _started_tracing:
+                tracemalloc.stop()
+                _started_tracing = False
+
+
+# Number of the trackers entered and not exited, and whether tracemalloc was
+# started by them, see MemoryTracker.
+_trackers_lock = Lock()
+_active_trackers = 0
+_started_tracing = False
@@ -0,0 +1,231 @@
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .exceptions import CollageOfZeroFramesError
+from .framesextractor import FRAME_SIZE
+from .videohash import VideoHash
+
+# Module to hash a video while it is still growing, e.g. a live stream being
+# recorded. The frames are added as they arrive and a provisional hash value
+# of the frames so far can be computed at any time.
+#
+# The layout of the collage and the tiles of the frames depend on the total
+# number of frames, every frame contributes to the final hash value and thus
+# the frames are kept. They are kept stitched horizontally in one buffer that
+# grows by doubling, the buffer is the strip the dominant colors of the tiles
+# are computed from and the collage frames are views of it, nothing is copied
+# when a hash value is computed.
+
+# Number of frames the buffer has room for initially.
+INITIAL_CAPACITY = 64
+
+
+class RollingVideoHash:
+
+    """
+    Incremental video hash. Add the frames, or the raw rgb24 bytes FFmpeg
+    writes, as they are decoded and call provisional_hash for the hash value
+    of the video so far, then finalize once the video is complete.
+
+    The final hash value is the same as that of VideoHash(path,
+    in_memory=True) if the frames are the ones stream_frames decodes from the
+    complete video. A provisional hash value is the hash value of the video
+    cut at the last added frame.
+
+    The frames are kept, 62 KB per frame of 144x144 pixels, e.g. 220 MB per
+    hour of video at the default frame_interval of 1.
+    """
+
+    def __init__(
+        self,
+        frame_interval: Union[int, float] = 1,
+        storage_path: Optional[str] = None,
+        frame_shape: Tuple[int, int] = (FRAME_SIZE, FRAME_SIZE),
+    ) -> None:
+        """
+        :param frame_interval: The frame_interval the frames are taken at,
+                               used for the duration of the video.
+
+        :param storage_path: Storage path of the collages, see VideoHash.
+
+        :param frame_shape: Height and width of the frames.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self.frame_interval = frame_interval
+        self.storage_path = storage_path
+        self.frame_height, self.frame_width = frame_shape
+
+        self.frame_count = 0
+        self.finalized = False
+
+        self._strip = np.zeros(
+            (self.frame_height, INITIAL_CAPACITY * self.frame_width, 3),
+            dtype=np.uint8,
+        )
+        self._pending = bytearray()
+        self._provisional: Optional[VideoHash] = None
+        self._provisional_count = 0
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    @property
+    def duration(self) -> float:
+        """
+        Duration in seconds of the video so far, the number of frames divided
+        by the frame_interval.
+        """
+        return self.frame_count / self.frame_interval
+
+    @property
+    def frame_bytes(self) -> int:
+        """Size of one frame in rgb24 bytes."""
+        return self.frame_height * self.frame_width * 3
+
+    def _check_not_finalized(self) -> None:
+        if self.finalized:
+            raise ValueError("The hash is finalized, no frame can be added.")
+
+    def add_frame(self, frame: np.ndarray) -> None:
+        """
+        Add the next frame of the video.
+
+        :param frame: RGB frame of shape (height, width, 3) and dtype uint8,
+                      as yielded by stream_frames and FramePipe.
+
+        :return: None
+
+        :rtype: NoneType
+
+        :raises ValueError: If the frame does not have the frame_shape or the
+                            hash is finalized.
+        """
+        self._check_not_finalized()
+
+        if frame.shape != (self.frame_height, self.frame_width, 3):
+            raise ValueError(
+                f"Expected a frame of shape {(self.frame_height, self.frame_width, 3)},"
+                + f" got {frame.shape}."
+            )
+
+        capacity = self._strip.shape[1] // self.frame_width
+        if self.frame_count == capacity:
+            strip = np.zeros(
+                (self.frame_height, 2 * capacity * self.frame_width, 3),
+                dtype=np.uint8,
+            )
+            strip[:, : self._strip.shape[1]] = self._strip
+            self._strip = strip
+
+        x = self.frame_count * self.frame_width
+        self._strip[:, x : x + self.frame_width] = frame
+        self.frame_count += 1
+
+    def add_frames(self, frames: Iterable[np.ndarray]) -> None:
+        """
+        Add the next frames of the video, see add_frame.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        for frame in frames:
+            self.add_frame(frame)
+
+    def add_chunk(self, chunk: bytes) -> None:
+        """
+        Add the next raw rgb24 bytes of the video, as written by FFmpeg with
+        '-f rawvideo -pix_fmt rgb24'. The chunk does not have to end on a
+        frame boundary, the rest is kept until the next chunk completes it.
+
+        :param chunk: The bytes.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self._check_not_finalized()
+
+        self._pending.extend(chunk)
+        complete = len(self._pending) - len(self._pending) % self.frame_bytes
+
+        frames = np.frombuffer(bytes(self._pending[:complete]), dtype=np.uint8)
+        for frame in frames.reshape(-1, self.frame_height, self.frame_width, 3):
+            self.add_frame(frame)
+
+        del self._pending[:complete]
+
+    def _frames(self) -> List[np.ndarray]:
+        return [
+            self._strip[:, x : x + self.frame_width]
+            for x in range(0, self.frame_count * self.frame_width, self.frame_width)
+        ]
+
+    def _hash(self, video_duration: Optional[float] = None) -> VideoHash:
+        if self.frame_count == 0:
+            raise CollageOfZeroFramesError("Can not hash a video of zero frames.")
+
+        return VideoHash.from_frames(
+            self._frames(),
+            frame_interval=self.frame_interval,
+            video_duration=video_duration,
+            storage_path=self.storage_path,
+            strip=self._strip[:, : self.frame_count * self.frame_width],
+        )
+
+    def provisional_hash(self) -> VideoHash:
+        """
+        Hash value of the frames added so far. Computing it costs about as
+        much as hashing a video of that many frames from decoded frames, it
+        is computed again only if frames were added since the last call.
+
+        The files of the provisional instance are deleted, its image, the
+        collage, is kept in memory.
+
+        :return: The hash value of the video so far.
+
+        :rtype: VideoHash
+
+        :raises CollageOfZeroFramesError: If no frame was added.
+        """
+        if self.finalized:
+            raise ValueError("The hash is finalized, use the result of finalize.")
+
+        if self._provisional is None or self._provisional_count != self.frame_count:
+            videohash = self._hash()
+            videohash.delete_storage_path()
+            self._provisional = videohash
+            self._provisional_count = self.frame_count
+
+        return self._provisional
+
+    def finalize(self, video_duration: Optional[float] = None) -> VideoHash:
+        """
+        Hash value of the complete video, no frame can be added afterwards
+        and the frames are released.
+
+        :param video_duration: Duration of the video in seconds, default is
+                               the number of frames divided by the
+                               frame_interval.
+
+        :return: The hash value, same as VideoHash would compute from the
+                 same frames.
+
+        :rtype: VideoHash
+
+        :raises CollageOfZeroFramesError: If no frame was added.
+        """
+        self._check_not_finalized()
+
+        videohash = self._hash(video_duration)
+
+        self.finalized = True
+        self._strip = np.zeros((self.frame_height, 0, 3), dtype=np.uint8)
+        self._pending = bytearray()
+        self._provisional = None
+
+        return videohash
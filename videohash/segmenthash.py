@@ -0,0 +1,261 @@
+from collections import deque
+from typing import Any, Deque, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from .framesextractor import stream_frames
+from .hammingdistance import hamming_distances, similarity_threshold, to_uint64_array
+from .videohash import VideoHash
+
+# Module to hash a video window by window. The hash value of a window is
+# computed like the hash value of a whole video, from the collage and the
+# tiles of the frames of the window, so a clip cut out of a video has about
+# the same hash values as the windows of the video it was cut from.
+#
+# The frames are decoded once for all the windows and only the frames of the
+# current window are kept. The sequences of hash values are aligned by
+# match_segments.
+
+
+class SegmentHash(NamedTuple):
+
+    """
+    Hash value of a window of a video, start and end are in seconds.
+    """
+
+    start: float
+    end: float
+    hash_int: int
+    hash_hex: str
+
+
+class SegmentMatch(NamedTuple):
+
+    """
+    Run of consecutive query segments that are similar to reference segments,
+    see match_segments. The query segment query_start + i is aligned with the
+    reference segment reference_start + i * stride. distance is the mean
+    hamming distance of the aligned segments.
+    """
+
+    query_start: int
+    reference_start: int
+    length: int
+    distance: float
+
+
+def segment_hashes_of_frames(
+    frames: Iterable[np.ndarray],
+    frame_interval: Union[int, float] = 1,
+    window: float = 30,
+    step: Optional[float] = None,
+    storage_path: Optional[str] = None,
+) -> List[SegmentHash]:
+    """
+    Hash values of the windows of decoded frames, see segment_hashes.
+
+    :param frames: The RGB frames, as yielded by stream_frames.
+
+    :param frame_interval: The frame_interval the frames were taken at.
+
+    :param window: Length of the windows in seconds.
+
+    :param step: Seconds between the starts of consecutive windows, default
+                 is the window, windows that do not overlap.
+
+    :param storage_path: Storage path of the collages, see VideoHash.
+
+    :return: The hash values of the windows in the order of their start. A
+             video shorter than one window has a single, shorter, window.
+
+    :rtype: List[SegmentHash]
+
+    :raises ValueError: If the window or the step is shorter than a frame.
+    """
+    if step is None:
+        step = window
+
+    window_frames = int(round(window * frame_interval))
+    step_frames = int(round(step * frame_interval))
+    if window_frames < 1 or step_frames < 1:
+        raise ValueError("The window and the step must be at least one frame long.")
+
+    def segment(start_frame: int, window_list: Sequence[np.ndarray]) -> SegmentHash:
+        videohash = VideoHash.from_frames(
+            window_list, frame_interval=frame_interval, storage_path=storage_path
+        )
+        if videohash.image is not None:
+            videohash.image.close()
+        videohash.delete_storage_path()
+
+        return SegmentHash(
+            start=start_frame / frame_interval,
+            end=(start_frame + len(window_list)) / frame_interval,
+            hash_int=videohash.hash_int,
+            hash_hex=videohash.hash_hex,
+        )
+
+    segments = []
+    current: Deque[np.ndarray] = deque(maxlen=window_frames)
+    start_frame = 0
+    frame_index = -1
+
+    for frame_index, frame in enumerate(frames):
+        current.append(frame)
+
+        if frame_index + 1 - start_frame == window_frames:
+            segments.append(segment(start_frame, list(current)))
+            start_frame += step_frames
+
+    if not segments and frame_index >= 0:
+        segments.append(segment(0, list(current)))
+
+    return segments
+
+
+def segment_hashes(
+    video_path: str,
+    window: float = 30,
+    step: Optional[float] = None,
+    frame_interval: Union[int, float] = 1,
+    ffmpeg_path: Optional[str] = None,
+    storage_path: Optional[str] = None,
+) -> List[SegmentHash]:
+    """
+    Hash values of the windows of a video, with a single run of FFmpeg. The
+    frames are taken like VideoHash(path, in_memory=True) takes them.
+
+    Pass a step shorter than the window for the reference videos, e.g. one
+    second, so that a clip starting anywhere has windows starting within
+    half a step of its windows.
+
+    :param video_path: Path of the video file.
+
+    :param window: Length of the windows in seconds.
+
+    :param step: Seconds between the starts of consecutive windows, default
+                 is the window.
+
+    :param frame_interval: Number of frames extracted per unit time, see
+                           VideoHash.
+
+    :param ffmpeg_path: Path of the FFmpeg software if not in path.
+
+    :param storage_path: Storage path of the collages, see VideoHash.
+
+    :return: The hash values of the windows in the order of their start.
+
+    :rtype: List[SegmentHash]
+
+    :raises FFmpegFailedToExtractFrames: If FFmpeg could not extract any frame.
+    """
+    return segment_hashes_of_frames(
+        stream_frames(video_path, interval=frame_interval, ffmpeg_path=ffmpeg_path),
+        frame_interval=frame_interval,
+        window=window,
+        step=step,
+        storage_path=storage_path,
+    )
+
+
+def match_segments(
+    query: Union[np.ndarray, Iterable[Any]],
+    reference: Union[np.ndarray, Iterable[Any]],
+    stride: int = 1,
+    max_distance: Optional[int] = None,
+    min_length: int = 1,
+) -> List[SegmentMatch]:
+    """
+    Find where the query sequence of hash values, e.g. of a clip, matches the
+    reference sequence, e.g. of a long video. All the alignments are tried at
+    once, the aligned segments are runs of similar hash values along the
+    diagonals of the matrix of the hamming distances.
+
+    :param query: Hash values of the query segments, SegmentHash, VideoHash
+                  or packed hash values.
+
+    :param reference: Hash values of the reference segments.
+
+    :param stride: Number of reference segments per query segment, the step
+                   of the query divided by the step of the reference. E.g. 30
+                   for query windows of 30 seconds without overlap and
+                   reference windows every second.
+
+    :param max_distance: Maximum hamming distance of two similar segments,
+                         default is the threshold of VideoHash.is_similar.
+
+    :param min_length: Minimum number of consecutive similar segments.
+
+    :return: The matches, the longest first and then by mean distance.
+
+    :rtype: List[SegmentMatch]
+    """
+    if stride < 1:
+        raise ValueError("stride must be a positive integer.")
+
+    if max_distance is None:
+        max_distance = similarity_threshold()
+
+    queries = to_uint64_array(query)
+    references = to_uint64_array(reference)
+    if len(queries) == 0 or len(references) == 0:
+        return []
+
+    distances = hamming_distances(queries, references)
+
+    # Row a of the alignments aligns the query segment i with the reference
+    # segment offsets[a] + i * stride, the offsets are negative if the query
+    # starts before the reference.
+    offsets = np.arange(-(len(queries) - 1) * stride, len(references))
+    query_indices = np.arange(len(queries))
+    reference_indices = offsets[:, np.newaxis] + query_indices[np.newaxis, :] * stride
+    valid = (reference_indices >= 0) & (reference_indices < len(references))
+
+    aligned = distances[
+        query_indices[np.newaxis, :],
+        np.clip(reference_indices, 0, len(references) - 1),
+    ]
+    similar = valid & (aligned <= max_distance)
+
+    # the runs of similar segments, from the changes of the padded rows
+    padded = np.zeros((len(offsets), len(queries) + 2), dtype=np.int8)
+    padded[:, 1:-1] = similar
+    changes = np.diff(padded, axis=1)
+    run_rows, run_starts = np.nonzero(changes == 1)
+    _, run_ends = np.nonzero(changes == -1)
+
+    lengths = run_ends - run_starts
+    keep = lengths >= min_length
+    run_rows, run_starts, run_ends, lengths = (
+        run_rows[keep],
+        run_starts[keep],
+        run_ends[keep],
+        lengths[keep],
+    )
+
+    sums = np.zeros((len(offsets), len(queries) + 1), dtype=np.int64)
+    np.cumsum(np.where(similar, aligned, 0), axis=1, out=sums[:, 1:])
+    mean_distances = (
+        sums[run_rows, run_ends] - sums[run_rows, run_starts]
+    ) / np.maximum(lengths, 1)
+
+    matches = [
+        SegmentMatch(
+            query_start=int(start),
+            reference_start=int(offsets[row] + start * stride),
+            length=int(length),
+            distance=float(distance),
+        )
+        for row, start, length, distance in zip(
+            run_rows, run_starts, lengths, mean_distances
+        )
+    ]
+    matches.sort(
+        key=lambda match: (
+            -match.length,
+            match.distance,
+            match.query_start,
+            match.reference_start,
+        )
+    )
+    return matches
@@ -0,0 +1,184 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .utils import subprocess_count
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+# Module to measure the stages of the computation of a hash value, such as
+# the download, the crop detection, the frame extraction and the collage.
+#
+# The CPU time, the bytes read and written and the number of subprocesses are
+# counters of the whole process, if other hash values are computed at the
+# same time by other threads their work is counted too.
+
+logger = logging.getLogger(__name__)
+
+# Callbacks called with the StageTiming of every stage of every hash value.
+_timing_hooks: List[Callable[["StageTiming"], Any]] = []
+
+
+class StageTiming(NamedTuple):
+
+    """
+    Measurements of a stage of the computation of a hash value.
+
+    start is the time the stage started at, in seconds since the epoch, and
+    wall_time its duration in seconds. cpu_time is the CPU time of the
+    process and children_cpu_time the CPU time of the subprocesses that
+    exited during the stage, such as FFmpeg. bytes_read and bytes_written are
+    the bytes the process read and wrote, pipes included, and the bytes the
+    subprocesses read from and wrote to the disk. The measurements the
+    operating system does not provide are None.
+    """
+
+    stage: str
+    start: float
+    wall_time: float
+    cpu_time: float
+    children_cpu_time: Optional[float]
+    bytes_read: Optional[int]
+    bytes_written: Optional[int]
+    subprocesses: int
+
+
+def add_timing_hook(hook: Callable[[StageTiming], Any]) -> None:
+    """
+    Call hook with the StageTiming of every stage of every hash value
+    computed by the process, e.g. to export them to a metrics system. The
+    start and the wall_time of a StageTiming are those of a span.
+
+    :param hook: The callback, its exceptions are logged and ignored.
+
+    :return: None
+
+    :rtype: NoneType
+    """
+    _timing_hooks.append(hook)
+
+
+def remove_timing_hook(hook: Callable[[StageTiming], Any]) -> None:
+    """
+    Stop calling a hook added by add_timing_hook.
+
+    :return: None
+
+    :rtype: NoneType
+    """
+    _timing_hooks.remove(hook)
+
+
+def _io_counters() -> Tuple[Optional[int], Optional[int]]:
+    """
+    Bytes read and written by the process and the disk bytes of its exited
+    subprocesses, None if the operating system does not count them.
+    """
+    bytes_read: Optional[int] = None
+    bytes_written: Optional[int] = None
+
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        bytes_read = int(counters["rchar"])
+        bytes_written = int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        if resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            bytes_read = usage.ru_inblock * 512
+            bytes_written = usage.ru_oublock * 512
+
+    if resource is not None and bytes_read is not None and bytes_written is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        bytes_read += usage.ru_inblock * 512
+        bytes_written += usage.ru_oublock * 512
+
+    return bytes_read, bytes_written
+
+
+def _children_cpu_time() -> Optional[float]:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _difference(end: Optional[float], start: Optional[float]) -> Optional[Any]:
+    if end is None or start is None:
+        return None
+    return end - start
+
+
+class StageTimer:
+
+    """
+    Context manager that measures a stage and records its StageTiming in
+    timings, then calls the hook and the hooks added by add_timing_hook.
+    The stage is recorded even if it raises.
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        timings: Dict[str, StageTiming],
+        hook: Optional[Callable[[StageTiming], Any]] = None,
+    ) -> None:
+        """
+        :param stage: Name of the stage.
+
+        :param timings: Timings of the stages of the hash value, by name.
+
+        :param hook: Callback of the hash value, called before the hooks of
+                     the process.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self.stage = stage
+        self.timings = timings
+        self.hook = hook
+
+    def __enter__(self) -> "StageTimer":
+        self._start = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._children_cpu = _children_cpu_time()
+        self._io = _io_counters()
+        self._subprocesses = subprocess_count()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        wall_time = time.perf_counter() - self._wall
+        cpu_time = time.process_time() - self._cpu
+        bytes_read, bytes_written = _io_counters()
+
+        timing = StageTiming(
+            stage=self.stage,
+            start=self._start,
+            wall_time=wall_time,
+            cpu_time=cpu_time,
+            children_cpu_time=_difference(_children_cpu_time(), self._children_cpu),
+            bytes_read=_difference(bytes_read, self._io[0]),
+            bytes_written=_difference(bytes_written, self._io[1]),
+            subprocesses=subprocess_count() - self._subprocesses,
+        )
+        self.timings[self.stage] = timing
+
+        logger.debug(
+            "%s took %.3f s, %.3f s of CPU, %d subprocesses",
+            self.stage,
+            timing.wall_time,
+            timing.cpu_time,
+            timing.subprocesses,
+        )
+
+        hooks = ([self.hook] if self.hook else []) + _timing_hooks
+        for hook in hooks:
+            try:
+                hook(timing)
+            except Exception:
+                logger.exception("timing hook %r failed", hook)
@@ -20,50 +20,28 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-import os
-from math import ceil, floor, sqrt
+from math import ceil, pi, sin, sqrt
+from typing import List, Sequence, Union
 
+import numpy as np
 from PIL import Image
 
 from .utils import get_list_of_all_files_in_dir
 
+# The dominant color of a tile is computed exactly like the DominantColor class
+# of the imagedominantcolor package does it for an image file: the tile is
+# resized to 16x16 pixels with the Lanczos filter of Pillow and the pixels are
+# counted by their dominant channel.
+DOMINANT_COLOR_RESIZE_VALUE = 16
+MINIMUM_PERCENT_DIFFERENCE_OF_RGB = 10
 
-class Tile:
-    """Represents a single tile."""
-
-    def __init__(self, image, number, position, coords, filename=None):
-        self.image = image
-        self.number = number
-        self.position = position
-        self.coords = coords
-        self.filename = filename
-
-    @property
-    def row(self):
-        return self.position[0]
-
-    @property
-    def column(self):
-        return self.position[1]
-
-    def generate_filename(
-        self, directory=os.getcwd(), prefix="tile", file_format="png", path=True
-    ):
-        """Construct and return a filename for this tile."""
-        filename = prefix + "_{col:02d}_{row:02d}.{ext}".format(
-            col=self.column,
-            row=self.row,
-            ext=file_format.lower().replace("jpeg", "jpg"),
-        )
-        if not path:
-            return filename
-        return os.path.join(directory, filename)
+# Pillow resamples 8 bit images with fixed point coefficients, 22 bits of
+# which are the fractional part.
+PRECISION_BITS = 32 - 8 - 2
 
-    def save(self, filename=None, file_format="png"):
-        if not filename:
-            filename = self.generate_filename(file_format=file_format)
-        self.image.save(filename, file_format)
-        self.filename = filename
+# Width of the blocks of tile columns resampled at once, bounds the size of
+# the temporary float64 copy of the frames.
+HORIZONTAL_PASS_BLOCK_WIDTH = 512
 
 
 def calc_columns_rows(n):
@@ -87,102 +65,282 @@ def validate_image(number_tiles):
         raise ValueError("number_tiles could not be cast to integer.")
 
     if number_tiles > TILE_LIMIT or number_tiles < 2:
-        raise ValueError(
-            "Number of tiles must be between 2 and {} (you \
-                          asked for {}).".format(
-                TILE_LIMIT, number_tiles
+        raise ValueError("Number of tiles must be between 2 and {} (you \
+                          asked for {}).".format(TILE_LIMIT, number_tiles))
+
+
+def concatenate_frames_horizontally(
+    frames: Union[str, Sequence[np.ndarray]],
+) -> np.ndarray:
+    """
+    Stitch the frames horizontally to each other, the result is an array of
+    shape (height, width * number of frames, 3).
+
+    frames is either the directory of the extracted frame files or a list of
+    the decoded RGB frames as NumPy arrays.
+    """
+    if not isinstance(frames, str):
+        return np.concatenate(frames, axis=1)
+
+    image_file_names = get_list_of_all_files_in_dir(frames)
+    with Image.open(image_file_names[0]) as first_frame_image_in_list:
+        width, height = first_frame_image_in_list.size
+
+    strip = np.zeros((height, width * len(image_file_names), 3), dtype=np.uint8)
+
+    x_offset = 0
+    for image_filename in image_file_names:
+        with Image.open(image_filename) as img:
+            strip[:, x_offset : x_offset + width] = np.asarray(img.convert("RGB"))
+        x_offset += width
+
+    return strip
+
+
+def _lanczos_filter(x: float) -> float:
+    """Lanczos filter of Pillow, truncated sinc with a support of 3."""
+    if -3.0 <= x < 3.0:
+        return _sinc_filter(x) * _sinc_filter(x / 3)
+    return 0.0
+
+
+def _sinc_filter(x: float) -> float:
+    if x == 0.0:
+        return 1.0
+    x = x * pi
+    return sin(x) / x
+
+
+def _lanczos_coefficients(in_size: int, out_size: int) -> np.ndarray:
+    """
+    Coefficients of Pillow's Lanczos resampling of in_size pixels to out_size
+    pixels, as a (in_size, out_size) matrix. Mirrors precompute_coeffs and
+    normalize_coeffs_8bpc of Pillow's Resample.c, including the order of the
+    floating point operations, so that the result is bit exact.
+    """
+    scale = in_size / out_size
+    filterscale = max(scale, 1.0)
+    support = 3.0 * filterscale
+    ss = 1.0 / filterscale
+
+    coefficients = np.zeros((in_size, out_size), dtype=np.int32)
+    for xx in range(out_size):
+        center = (xx + 0.5) * scale
+        xmin = max(int(center - support + 0.5), 0)
+        xmax = min(int(center + support + 0.5), in_size)
+
+        weights = [_lanczos_filter((x - center + 0.5) * ss) for x in range(xmin, xmax)]
+        total = sum(weights)
+        if total != 0.0:
+            weights = [weight / total for weight in weights]
+
+        coefficients[xmin:xmax, xx] = [
+            (
+                int(-0.5 + weight * (1 << PRECISION_BITS))
+                if weight < 0
+                else int(0.5 + weight * (1 << PRECISION_BITS))
             )
-        )
+            for weight in weights
+        ]
+
+    return coefficients
+
 
+def _clip8(accumulator: np.ndarray) -> np.ndarray:
+    """Convert the fixed point sums of a resampling pass back to 8 bits."""
+    return np.right_shift(
+        np.clip(accumulator, 0, (1 << PRECISION_BITS << 8) - 1).astype(np.int64),
+        PRECISION_BITS,
+    ).astype(np.uint8)
 
-def save_tiles(tiles, prefix="", directory=os.getcwd(), file_format="png"):
+
+class _TileColors:
     """
-    Write image files to disk. Create specified folder(s) if they
-       don't exist. Return list of :class:`Tile` instance.
-    Args:
-       tiles (list):  List, tuple or set of :class:`Tile` objects to save.
-       prefix (str):  Filename prefix of saved tiles.
-    Kwargs:
-       directory (str):  Directory to save tiles. Created if non-existant.
-    Returns:
-        Tuple of :class:`Tile` instances.
+    Dominant colors of the tiles of a strip of frames, computed from the
+    frames one at a time. The horizontal pass of the resize of the tiles is
+    a sum over the columns of the strip, every frame adds the products of
+    its columns to the sums of the tiles it covers, so the strip is never
+    built and only the sums of the horizontal pass are kept.
     """
-    for tile in tiles:
-        tile.save(
-            filename=tile.generate_filename(
-                prefix=prefix, directory=directory, file_format=file_format
-            ),
-            file_format=file_format,
-        )
-    return tuple(tiles)
 
+    def __init__(self, width: int, height: int, number_tiles: int = 64) -> None:
+        """
+        :param width: Width of the strip, the width of the frames times their
+                      number.
 
-def slicer(
-    filename,
-    number_tiles=None,
-    col=None,
-    row=None,
-):
+        :param height: Height of the strip, the height of the frames.
 
-    Image.MAX_IMAGE_PIXELS = None
+        :param number_tiles: Number of tiles.
 
-    im = Image.open(filename)
-    im_w, im_h = im.size
+        :return: None
 
-    columns = 0
-    rows = 0
-    if number_tiles:
+        :rtype: NoneType
+        """
         validate_image(number_tiles)
-        columns, rows = calc_columns_rows(number_tiles)
-
-    tile_w, tile_h = int(floor(im_w / columns)), int(floor(im_h / rows))
-
-    tiles = []
-    number = 1
-    for pos_y in range(0, im_h - rows, tile_h):  # -rows for rounding error.
-        for pos_x in range(0, im_w - columns, tile_w):  # as above.
-            area = (pos_x, pos_y, pos_x + tile_w, pos_y + tile_h)
-            image = im.crop(area)
-            position = (int(floor(pos_x / tile_w)) + 1, int(floor(pos_y / tile_h)) + 1)
-            coords = (pos_x, pos_y)
-            tile = Tile(image, number, position, coords)
-            tiles.append(tile)
-            number += 1
-    im.close()
-    return tuple(tiles)
-
-
-def concatenate_video_frames_horizontally(
-    frames_dir, horizontally_concatenated_image_path
-) -> None:
-    image_file_names = get_list_of_all_files_in_dir(frames_dir)
-    total_images = len(image_file_names)
-    first_image_filename = image_file_names[0]
-    with Image.open(first_image_filename) as first_frame_image_in_list:
-        width, height = first_frame_image_in_list.size
+        self.columns, self.rows = calc_columns_rows(number_tiles)
+        self.tile_w, self.tile_h = width // self.columns, height // self.rows
 
-    base_image = Image.new("RGB", (width * total_images, height))
+        self.horizontal_coefficients = _lanczos_coefficients(
+            self.tile_w, DOMINANT_COLOR_RESIZE_VALUE
+        )
+        # the sums of the fixed point products are integers far below 2**53
+        # and thus exact in float64, whatever the order of the additions.
+        self.accumulator = np.full(
+            (self.rows * self.tile_h, self.columns, 3, DOMINANT_COLOR_RESIZE_VALUE),
+            1 << (PRECISION_BITS - 1),
+            dtype=np.float64,
+        )
 
-    x_offset = 0
-    for image_filename in image_file_names:
-        img = Image.open(image_filename)
-        base_image.paste(img, (x_offset, 0))
-        img.close()
-        x_offset += width
+    def add(self, pixels: np.ndarray, x_offset: int) -> None:
+        """
+        Add the columns of the strip from x_offset to x_offset plus the width
+        of pixels, the columns past the last tile are ignored.
+
+        :param pixels: An array of shape (height, width, 3), e.g. a frame.
+
+        :param x_offset: Column of the strip of the first column of pixels.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        end = x_offset + pixels.shape[1]
+        first_column = x_offset // self.tile_w
+        last_column = min(self.columns, -(-end // self.tile_w))
+
+        for column in range(first_column, last_column):
+            tile_x = column * self.tile_w
+            start = max(x_offset, tile_x)
+            stop = min(end, tile_x + self.tile_w)
+
+            for x in range(start, stop, HORIZONTAL_PASS_BLOCK_WIDTH):
+                block_stop = min(stop, x + HORIZONTAL_PASS_BLOCK_WIDTH)
+                block = pixels[
+                    : self.rows * self.tile_h, x - x_offset : block_stop - x_offset
+                ]
+                self.accumulator[:, column] += np.matmul(
+                    block.transpose(0, 2, 1).astype(np.float64),
+                    self.horizontal_coefficients[x - tile_x : block_stop - tile_x],
+                )
+
+    def dominant_colors(self) -> List[str]:
+        """
+        The dominant colors of the tiles row by row, see
+        dominant_colors_of_tiles.
+
+        :rtype: List[str]
+        """
+        rows, columns, size = self.rows, self.columns, DOMINANT_COLOR_RESIZE_VALUE
+        horizontal = _clip8(self.accumulator).reshape(
+            rows, self.tile_h, columns, 3, size
+        )
+
+        # Vertical pass on the 8 bit output of the horizontal pass, like Pillow.
+        vertical_coefficients = _lanczos_coefficients(self.tile_h, size).astype(
+            np.float64
+        )
+        resized = _clip8(
+            np.einsum(
+                "ryckx,yo->rcoxk", horizontal.astype(np.float64), vertical_coefficients
+            )
+            + (1 << (PRECISION_BITS - 1))
+        ).astype(np.int16)
 
-    base_image.save(horizontally_concatenated_image_path)
+        r, g, b = resized[..., 0], resized[..., 1], resized[..., 2]
+        is_r = (r > g) & (r > b)
+        is_g = (g > b) & (g > r)
+        is_b = (b > r) & (b > g)
+        is_l = ~(is_r | is_g | is_b)
 
+        count_r, count_g, count_b, count_l = (
+            pixels.sum(axis=(2, 3)) for pixels in (is_r, is_g, is_b, is_l)
+        )
 
-def make_tile(frames_dir, horizontally_concatenated_image_path, tiles_dir) -> None:
-    concatenate_video_frames_horizontally(
-        frames_dir, horizontally_concatenated_image_path
-    )
-    tiles = list(
-        slicer(
-            horizontally_concatenated_image_path,
-            number_tiles=64,
-            col=8,
-            row=8,
+        mpd = int(size * size * (MINIMUM_PERCENT_DIFFERENCE_OF_RGB / 100))
+
+        # DominantColor picks 'l' if it is the most common dominant channel of
+        # the pixels, if it ties with another channel the choice of
+        # DominantColor depends on the order of a set of strings. 'l' wins the
+        # ties here.
+        dominant_colors = np.select(
+            [
+                count_l >= np.maximum(np.maximum(count_r, count_g), count_b),
+                ((count_r - mpd) > count_g) & ((count_r - mpd) > count_b),
+                ((count_g - mpd) > count_b) & ((count_g - mpd) > count_r),
+                ((count_b - mpd) > count_r) & ((count_b - mpd) > count_g),
+            ],
+            ["l", "r", "g", "b"],
+            default="n",
         )
-    )
-    save_tiles(tiles, prefix="tile", directory=tiles_dir, file_format="png")
+
+        return [str(color) for color in dominant_colors.ravel()]
+
+
+def dominant_colors_of_tiles(strip: np.ndarray, number_tiles: int = 64) -> List[str]:
+    """
+    Divide the horizontally concatenated frames in number_tiles tiles, the
+    same tiles that image_slicer crops, and find the dominant color of every
+    tile.
+
+    The tiles are views of the strip, they are resized and their pixels are
+    counted all at once, no tile image is created. The result is the same as
+    that of DominantColor on every tile saved as an image.
+
+    :param strip: The frames stitched horizontally, an array of shape
+                  (height, width, 3) such as the one returned by
+                  concatenate_frames_horizontally.
+
+    :param number_tiles: Number of tiles.
+
+    :return: The dominant color, one of 'r', 'g', 'b', 'l' and 'n', of the tiles
+             row by row.
+
+    :rtype: List[str]
+    """
+    height, width = strip.shape[:2]
+    tile_colors = _TileColors(width, height, number_tiles)
+    tile_colors.add(strip, 0)
+    return tile_colors.dominant_colors()
+
+
+def dominant_colors_of_frames(
+    frames: Union[str, Sequence[np.ndarray]], number_tiles: int = 64
+) -> List[str]:
+    """
+    Dominant colors of the tiles of the frames stitched horizontally, same as
+    dominant_colors_of_tiles(concatenate_frames_horizontally(frames)) but the
+    strip is never built. Every tile is computed from the slices of the
+    frames it covers, the frames files are read one at a time, and the memory
+    does not grow with the number of frames but for the coefficients of the
+    resize, 64 bytes per column of a tile.
+
+    :param frames: The directory of the extracted frame files or a list of
+                   the decoded RGB frames as NumPy arrays.
+
+    :param number_tiles: Number of tiles.
+
+    :return: The dominant colors of the tiles row by row.
+
+    :rtype: List[str]
+    """
+    if isinstance(frames, str):
+        image_file_names = get_list_of_all_files_in_dir(frames)
+        with Image.open(image_file_names[0]) as first_frame_image_in_list:
+            width, height = first_frame_image_in_list.size
+        count = len(image_file_names)
+    else:
+        height, width = frames[0].shape[:2]
+        count = len(frames)
+
+    tile_colors = _TileColors(width * count, height, number_tiles)
+
+    for index in range(count):
+        if isinstance(frames, str):
+            with Image.open(image_file_names[index]) as img:
+                frame = np.asarray(img.convert("RGB"))
+        else:
+            frame = frames[index]
+
+        tile_colors.add(frame, index * width)
+
+    return tile_colors.dominant_colors()
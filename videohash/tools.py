@@ -0,0 +1,278 @@
+import os
+from shutil import which
+from subprocess import DEVNULL, CalledProcessError, check_output
+from threading import Lock
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from .exceptions import FFmpegError, FFmpegNotFound
+from .utils import count_subprocess
+
+# Module of the external programs, FFmpeg, ffprobe and yt-dlp. A program is
+# looked up and checked once per process and every module shares the result:
+# the lookups in the system path are cached per value of PATH, and a program
+# is run with its version option once per path. The capabilities of FFmpeg,
+# the filters and the hardware accelerations, are read on first use.
+#
+# refresh_tools forgets the results, e.g. after a program is installed or
+# upgraded, and set_tool_path overrides the path of a program for the whole
+# process.
+
+# Option that prints the version of a program and the text its output must
+# contain, None if the output is not checked.
+VERSION_OPTIONS: Dict[str, Tuple[str, Optional[str]]] = {
+    "ffmpeg": ("-version", "ffmpeg version"),
+    "ffprobe": ("-version", "ffprobe version"),
+    "yt-dlp": ("--version", None),
+}
+
+
+class ToolInfo:
+
+    """
+    A checked external program. version is the first line of the output of
+    its version option. The filters and the hwaccels of FFmpeg and ffprobe
+    are read the first time they are used, they are empty for yt-dlp.
+    """
+
+    def __init__(self, name: str, path: str, version: str) -> None:
+        """
+        :param name: Name of the program, e.g. 'ffmpeg'.
+
+        :param path: Path of the executable.
+
+        :param version: First line of the output of the version option.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self.name = name
+        self.path = path
+        self.version = version
+        self._filters: Optional[FrozenSet[str]] = None
+        self._hwaccels: Optional[Tuple[str, ...]] = None
+
+    def _list(self, option: str) -> str:
+        if self.name not in ("ffmpeg", "ffprobe"):
+            return ""
+
+        try:
+            output = check_output(
+                [self.path, "-hide_banner", option], stderr=DEVNULL
+            ).decode()
+            count_subprocess()
+        except (OSError, CalledProcessError):
+            return ""
+        return output
+
+    @property
+    def filters(self) -> FrozenSet[str]:
+        """Names of the filters FFmpeg was built with."""
+        if self._filters is None:
+            # ' TSC cropdetect         V->V       Auto-detect crop size.', the
+            # legend lines have no '->'.
+            self._filters = frozenset(
+                parts[1]
+                for parts in map(str.split, self._list("-filters").splitlines())
+                if len(parts) > 2 and "->" in parts[2]
+            )
+        return self._filters
+
+    @property
+    def hwaccels(self) -> Tuple[str, ...]:
+        """Hardware acceleration methods FFmpeg supports, e.g. 'vaapi'."""
+        if self._hwaccels is None:
+            lines = self._list("-hwaccels").splitlines()
+            self._hwaccels = tuple(
+                line.strip()
+                for line in lines
+                if line.strip() and not line.rstrip().endswith(":")
+            )
+        return self._hwaccels
+
+    def has_filter(self, name: str) -> bool:
+        """
+        True if FFmpeg was built with the filter, e.g. 'cropdetect'.
+
+        :rtype: bool
+        """
+        return name in self.filters
+
+    def __repr__(self) -> str:
+        return f"ToolInfo(name={self.name!r}, path={self.path!r}, version={self.version!r})"
+
+
+class ToolRegistry:
+
+    """
+    Paths and checks of the external programs, see the module comment. The
+    registry of the process is shared by the functions of this module.
+    """
+
+    def __init__(self) -> None:
+        """
+        :return: None
+
+        :rtype: NoneType
+        """
+        self._lock = Lock()
+        self._overrides: Dict[str, str] = {}
+        # (name, PATH) -> path found in the system path
+        self._located: Dict[Tuple[str, Optional[str]], Optional[str]] = {}
+        # (name, path) -> checked program
+        self._checked: Dict[Tuple[str, str], ToolInfo] = {}
+
+    def set_path(self, name: str, path: Optional[str]) -> None:
+        """
+        Use path for the program whenever no path is passed, instead of the
+        program found in the system path. None removes the override.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        with self._lock:
+            if path is None:
+                self._overrides.pop(name, None)
+            else:
+                self._overrides[name] = path
+
+    def refresh(self, name: Optional[str] = None) -> None:
+        """
+        Forget the lookups and the checks of a program, of all the programs
+        if name is None. The overrides of set_path are kept.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        with self._lock:
+            self._located = {
+                key: value
+                for key, value in self._located.items()
+                if name is not None and key[0] != name
+            }
+            self._checked = {
+                key: value
+                for key, value in self._checked.items()
+                if name is not None and key[0] != name
+            }
+
+    def locate(self, name: str, path: Optional[str] = None) -> str:
+        """
+        Path of a program, from the path argument, the path set by set_path
+        or the system path. Does not run the program.
+
+        :param name: Name of the program, e.g. 'ffmpeg'.
+
+        :param path: Path of the program if not in path.
+
+        :return: The path of the program.
+
+        :rtype: str
+
+        :raises FFmpegNotFound: If the program is not found.
+        """
+        if path:
+            return path
+
+        with self._lock:
+            if name in self._overrides:
+                return self._overrides[name]
+
+            key = (name, os.environ.get("PATH"))
+            if key not in self._located:
+                self._located[key] = which(name)
+            found = self._located[key]
+
+        if not found:
+            raise FFmpegNotFound(
+                f"{name} is not on the system path. Install it and add it to the path."
+            )
+        return found
+
+    def get(self, name: str, path: Optional[str] = None) -> ToolInfo:
+        """
+        The checked program, see locate. The program is run with its version
+        option the first time.
+
+        :param name: Name of the program, 'ffmpeg', 'ffprobe' or 'yt-dlp'.
+
+        :param path: Path of the program if not in path.
+
+        :rtype: ToolInfo
+
+        :raises FFmpegNotFound: If the program is not found.
+
+        :raises FFmpegError: If the program is not the expected program.
+        """
+        path = self.locate(name, path)
+
+        with self._lock:
+            info = self._checked.get((name, path))
+        if info is not None:
+            return info
+
+        option, expected = VERSION_OPTIONS.get(name, ("--version", None))
+        try:
+            output = check_output([path, option], stderr=DEVNULL).decode()
+            count_subprocess()
+        except OSError:
+            raise FFmpegNotFound(f"{name} not found at '{path}'.")
+        except CalledProcessError as error:
+            raise FFmpegError(f"'{path} {option}' failed with {error.returncode}.")
+
+        if expected and expected not in output:
+            raise FFmpegError(
+                f"{name} at '{path}' is not really {name}. Output of {name} "
+                + f"{option} is \n'{output}'."
+            )
+
+        info = ToolInfo(name, path, output.strip().split("\n")[0])
+        with self._lock:
+            return self._checked.setdefault((name, path), info)
+
+
+# The registry of the process.
+tools = ToolRegistry()
+
+
+def get_tool(name: str, path: Optional[str] = None) -> ToolInfo:
+    """
+    The checked program of the process, see ToolRegistry.get.
+
+    :rtype: ToolInfo
+    """
+    return tools.get(name, path)
+
+
+def tool_path(name: str, path: Optional[str] = None) -> str:
+    """
+    Path of a program, see ToolRegistry.locate.
+
+    :rtype: str
+    """
+    return tools.locate(name, path)
+
+
+def set_tool_path(name: str, path: Optional[str]) -> None:
+    """
+    Override the path of a program for the whole process, see
+    ToolRegistry.set_path.
+
+    :return: None
+
+    :rtype: NoneType
+    """
+    tools.set_path(name, path)
+
+
+def refresh_tools(name: Optional[str] = None) -> None:
+    """
+    Look up and check the programs again, see ToolRegistry.refresh.
+
+    :return: None
+
+    :rtype: NoneType
+    """
+    tools.refresh(name)
@@ -1,7 +1,28 @@
 import os
+import shutil
 import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List
+from threading import Lock
+from typing import Any, Iterator, List
+
+# Semaphore limiting the number of FFmpeg processes that may run at the same
+# time, shared by all the worker processes of VideoHash.hash_many. None means
+# that there is no limit.
+_ffmpeg_semaphore: Any = None
+
+# Number of subprocesses (FFmpeg, ffprobe and yt-dlp) started by the process,
+# see count_subprocess.
+_subprocess_count = 0
+_subprocess_count_lock = Lock()
+
+# ioctl request of Linux that makes a file share the extents of another file
+# (reflink), supported by copy-on-write file systems such as Btrfs and XFS.
+FICLONE = 0x40049409
+
+# How the input video is placed in the storage directory of the instance, see
+# place_video.
+INPUT_MODES = ("copy", "link", "in_place")
 
 
 def get_list_of_all_files_in_dir(directory: str) -> List[str]:
@@ -50,3 +71,135 @@ def create_and_return_temporary_directory() -> str:
     path = os.path.join(tempfile.mkdtemp(), ("temp_storage_dir" + os.path.sep))
     Path(path).mkdir(parents=True, exist_ok=True)
     return path
+
+
+def set_ffmpeg_semaphore(semaphore: Any) -> None:
+    """
+    Set the semaphore that limits the number of FFmpeg processes running at
+    the same time. Pass None to remove the limit.
+
+    :return: None
+
+    :rtype: NoneType
+    """
+    global _ffmpeg_semaphore
+    _ffmpeg_semaphore = semaphore
+
+
+def count_subprocess(number: int = 1) -> None:
+    """
+    Count the subprocesses just started, call it after every subprocess
+    started by the package. The count is part of the stage timings.
+
+    :param number: Number of subprocesses started.
+
+    :return: None
+
+    :rtype: NoneType
+    """
+    global _subprocess_count
+    with _subprocess_count_lock:
+        _subprocess_count += number
+
+
+def subprocess_count() -> int:
+    """
+    Number of subprocesses started by the package in this process.
+
+    :rtype: int
+    """
+    return _subprocess_count
+
+
+@contextmanager
+def ffmpeg_slot() -> Iterator[None]:
+    """
+    Context manager that must wrap every FFmpeg subprocess, waits for a free
+    slot if the number of FFmpeg processes is limited.
+
+    :return: Context manager holding the slot.
+
+    :rtype: Iterator[None]
+    """
+    if _ffmpeg_semaphore is None:
+        yield
+        return
+
+    with _ffmpeg_semaphore:
+        yield
+
+
+def reflink_or_copy(source: str, destination: str) -> None:
+    """
+    Copy a file. If the file system supports it the copy is a reflink, the
+    copy shares the blocks of the source until either file is modified and no
+    data is read or written.
+
+    :param source: Path of the file to copy.
+
+    :param destination: Path of the copy.
+
+    :return: None
+
+    :rtype: NoneType
+    """
+    try:
+        import fcntl
+    except ImportError:  # not posix
+        shutil.copyfile(source, destination)
+        return
+
+    with open(source, "rb") as source_file, open(destination, "wb") as dest_file:
+        try:
+            fcntl.ioctl(dest_file.fileno(), FICLONE, source_file.fileno())
+            return
+        except OSError:
+            pass
+
+    shutil.copyfile(source, destination)
+
+
+def place_video(source: str, destination: str, input_mode: str = "copy") -> str:
+    """
+    Place the input video in the storage directory of an instance.
+
+    "copy" copies the video, as a reflink if possible. "link" hard links the
+    video if the storage directory is on the same file system, else copies
+    it. A hard link survives the deletion of the source but shares its
+    modifications. "in_place" does nothing, the source is read in place.
+
+    :param source: Path of the input video.
+
+    :param destination: Path of the video in the storage directory.
+
+    :param input_mode: One of "copy", "link" and "in_place".
+
+    :return: The path of the video to read.
+
+    :rtype: str
+
+    :raises ValueError: If input_mode is not supported.
+
+    :raises FileNotFoundError: If the source does not exist.
+    """
+    if input_mode not in INPUT_MODES:
+        raise ValueError(
+            f"input_mode must be one of {', '.join(INPUT_MODES)}, not '{input_mode}'."
+        )
+
+    if input_mode == "in_place":
+        if not os.path.isfile(source):
+            raise FileNotFoundError(f"No such file: '{source}'")
+        return os.path.abspath(source)
+
+    if input_mode == "link":
+        try:
+            os.link(source, destination)
+            return destination
+        except FileNotFoundError:
+            raise
+        except OSError:  # e.g. another file system or no hard link support
+            pass
+
+    reflink_or_copy(source, destination)
+    return destination
@@ -1,42 +1,24 @@
-import re
-from shutil import which
-from subprocess import PIPE, Popen
 from typing import Optional
 
+from .videoprobe import probe_video
+
 # Module to determine the length of video.
-# The length is found by the FFmpeg, the output of video_duration is in seconds.
+# The length is read by ffprobe, the output of video_duration is in seconds.
 
 
 def video_duration(video_path: str, ffmpeg_path: Optional[str] = None) -> float:
     """
-    Retrieve the exact video duration as echoed by the FFmpeg and return
-    the duration in seconds. Maximum duration supported is 999 hours, above
-    which the regex is doomed to fail(no match).
+    Retrieve the exact video duration as reported by ffprobe and return
+    the duration in seconds. The metadata of the video are cached, see
+    videoprobe.probe_video.
 
     :param video_path: Absolute path of the video file.
 
-    :param ffmpeg_path: Path of the FFmpeg software if not in path.
+    :param ffmpeg_path: Path of the FFmpeg software if not in path, ffprobe
+                        is looked for next to it if it is not in path.
 
     :return: Video length(duration) in seconds.
 
     :rtype: float
     """
-
-    if not ffmpeg_path:
-        ffmpeg_path = str(which("ffmpeg"))
-
-    command = f'"{ffmpeg_path}" -i "{video_path}"'
-    process = Popen(command, shell=True, stdout=PIPE, stderr=PIPE)
-    output, error = process.communicate()
-
-    match = re.search(
-        r"Duration\:(\s\d?\d\d\:\d\d\:\d\d\.\d\d)\,",
-        (output.decode() + error.decode()),
-    )
-
-    if match:
-        duration_string = match.group(1)
-
-    hours, minutes, seconds = duration_string.strip().split(":")
-
-    return float(hours) * 60.00 * 60.00 + float(minutes) * 60.00 + float(seconds)
+    return probe_video(video_path, ffmpeg_path=ffmpeg_path).duration
@@ -1,27 +1,105 @@
+import asyncio
+import multiprocessing
 import os
 import random
 import re
 import shutil
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
 from pathlib import Path
-from math import ceil
-from typing import List, Optional, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+)
 
-import imagehash
 import numpy as np
-from imagedominantcolor import DominantColor
 from PIL import Image
 
+from .asyncprocesses import (
+    download_async,
+    extract_frames_async,
+    probe_video_async,
+    sample_frames_async,
+    stream_frames_async,
+    stream_url_frames_async,
+)
 from .collagemaker import MakeCollage
-from .downloader import Download
+from .constants import HASH_ALGORITHM_VERSION
+from .downloader import Download, find_yt_dlp, streaming_download_command
 from .exceptions import DidNotSupplyPathOrUrl, StoragePathDoesNotExist
-from .framesextractor import FramesExtractor
-from .tilemaker import make_tile
+from .framesextractor import (
+    FramePipe,
+    FramesExtractor,
+    sample_frames,
+    stream_frames,
+)
+from .hashcache import HashCache
+from .hashvalue import VideoHashValue
+from .hammingdistance import bitlist_to_int, hamming_distance, similarity_threshold
+from .imagebackends import get_image_backend, wavelet_hash
+from .memorybudget import (
+    FrameDecimator,
+    MemoryTracker,
+    budget_frame_count,
+    frames_within_budget,
+)
+from .stagetimings import StageTimer, StageTiming
+from .tilemaker import dominant_colors_of_frames, dominant_colors_of_tiles
 from .utils import (
     create_and_return_temporary_directory,
     does_path_exists,
     get_list_of_all_files_in_dir,
+    place_video,
+    set_ffmpeg_semaphore,
 )
-from .videoduration import video_duration
+from .videoprobe import VideoMetadata, probe_video
+
+# Width of the collage, the wavelet hash of the collage is part of the hash.
+COLLAGE_IMAGE_WIDTH = 1024
+
+
+class VideoHashResult(NamedTuple):
+
+    """
+    Result of hashing one of the videos of a batch, see VideoHash.hash_many.
+    position is the index of the source in the sources of the batch.
+
+    Only the hash values, the duration and the timings of the stages are
+    kept, the collage and the other files of the instance are deleted once
+    the hash is computed.
+    If the video could not be hashed, error is the raised exception and
+    the hash values are None.
+    """
+
+    position: int
+    source: str
+    hash: Optional[str] = None
+    hash_hex: Optional[str] = None
+    video_duration: Optional[float] = None
+    error: Optional[BaseException] = None
+    timings: Optional[Dict[str, StageTiming]] = None
+
+    @property
+    def value(self) -> Optional[VideoHashValue]:
+        """The compact hash value, None if the video could not be hashed."""
+        if self.hash_hex is None:
+            return None
+        return VideoHashValue.from_hex(self.hash_hex, self.video_duration)
 
 
 class VideoHash:
@@ -38,6 +116,15 @@ class VideoHash:
         storage_path: Optional[str] = None,
         download_worst: bool = False,
         frame_interval: Union[int, float] = 1,
+        in_memory: bool = False,
+        cache: Optional[Union[str, HashCache]] = None,
+        input_mode: str = "copy",
+        frame_count: Optional[int] = None,
+        keyframes_only: bool = False,
+        streaming: bool = False,
+        timing_hook: Optional[Callable[[StageTiming], Any]] = None,
+        save_collage: bool = False,
+        max_memory: Optional[int] = None,
     ) -> None:
         """
         :param path: Absolute path of the input video file.
@@ -61,6 +148,127 @@ class VideoHash:
                                Smaller frame_interval implies fewer frames and
                                vice-versa.
 
+        :param in_memory: If set to True, FFmpeg pipes the raw frames to the
+                          instance and the frames are never saved as JPEG files
+                          in the frames directory. Faster, but as the frames
+                          skip the lossy JPEG compression the hash value may
+                          differ by a few bits from the default mode.
+
+        :param cache: Cache of the hash values, a HashCache or the path of its
+                      database file. If a file with the same content was
+                      already hashed with the same parameters, the stored hash
+                      value is used and FFmpeg is not started. In that case
+                      there is no collage and the image and the metadata are
+                      None.
+                      Only used for paths, not for URLs.
+
+        :param input_mode: How the video of the path is placed in the storage
+                           directory. "copy" copies it, as a reflink on
+                           copy-on-write file systems. "link" hard links it if
+                           the storage directory is on the same file system,
+                           else copies it. "in_place" reads the video at the
+                           path, nothing is copied.
+                           Downloaded videos are always moved, never copied.
+
+        :param frame_count: If set, frame_count frames spread evenly over the
+                            video are taken by seeking, instead of decoding
+                            the whole video at the frame_interval. The cost
+                            does not depend on the length of the video.
+                            The frames are not saved in the frames directory.
+                            Only compare hash values computed with the same
+                            frame_count, or the same frame_interval.
+
+        :param keyframes_only: With frame_count, only decode the keyframes and
+                               take the first keyframe at or after every
+                               timestamp.
+
+        :param streaming: With an url, yt-dlp writes the video to the stdin of
+                          FFmpeg and the frames are decoded while the video
+                          downloads, nothing is written to the disk. A pipe
+                          can not be seeked, so the black bars are not cropped
+                          and the hash value may differ from the default mode
+                          for videos with black bars. Can not be used with
+                          frame_count.
+
+        :param timing_hook: Called with the StageTiming of every stage, such
+                            as the download, the crop detection, the frame
+                            extraction and the collage, as soon as the stage
+                            ends. The timings are also kept in the timings
+                            attribute, see stagetimings.add_timing_hook to
+                            collect the timings of every instance.
+
+        :param save_collage: If set to True, the collage is also saved as
+                             collage.jpg in the collage directory and its
+                             path is the collage_path attribute, e.g. to
+                             inspect it. The hash value is computed from the
+                             collage in memory either way.
+
+        :param max_memory: Memory budget of the hash value in bytes. If the
+                           frames at the frame_interval would not fit, fewer
+                           frames are sampled evenly over the video, as with
+                           frame_count, and a streamed video keeps every
+                           other frame whenever the budget is full. The hash
+                           value of a video is the same for the same budget,
+                           but may differ from that without a budget. The
+                           peak of the memory used is kept in the peak_memory
+                           attribute, see memorybudget.MemoryTracker. The
+                           budget is that of this instance, the peak includes
+                           the memory of the hash values computed at the
+                           same time by other threads or tasks.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self._set_up(
+            path=path,
+            url=url,
+            storage_path=storage_path,
+            download_worst=download_worst,
+            frame_interval=frame_interval,
+            in_memory=in_memory,
+            input_mode=input_mode,
+            frame_count=frame_count,
+            keyframes_only=keyframes_only,
+            streaming=streaming,
+            timing_hook=timing_hook,
+            save_collage=save_collage,
+            max_memory=max_memory,
+        )
+
+        try:
+            if cache is not None and self.path:
+                self._hash_with_cache(cache)
+            else:
+                self._hash()
+        except BaseException:
+            # the copied video and the frames of a failed instance
+            self.delete_storage_path()
+            raise
+
+    def _set_up(
+        self,
+        path: Optional[str],
+        url: Optional[str],
+        storage_path: Optional[str],
+        download_worst: bool,
+        frame_interval: Union[int, float],
+        in_memory: bool,
+        input_mode: str,
+        frame_count: Optional[int] = None,
+        keyframes_only: bool = False,
+        streaming: bool = False,
+        source_required: bool = True,
+        timing_hook: Optional[Callable[[StageTiming], Any]] = None,
+        save_collage: bool = False,
+        max_memory: Optional[int] = None,
+    ) -> None:
+        """
+        Set the attributes of the instance and create its directories, before
+        the hash value is computed. See __init__ for the parameters.
+
+        :param source_required: If False the instance may have neither a path
+                                nor an url, see from_frames.
 
         :return: None
 
@@ -76,38 +284,506 @@ class VideoHash:
         self._storage_path = self.storage_path
         self.download_worst = download_worst
         self.frame_interval = frame_interval
+        self.in_memory = in_memory
+        self.input_mode = input_mode
+        self.frame_count = frame_count
+        self.keyframes_only = keyframes_only
+        self.streaming = streaming
+        self.timing_hook = timing_hook
+        self.save_collage = save_collage
+        self.max_memory = max_memory
+        self.peak_memory: Optional[int] = None
+        self.timings: Dict[str, StageTiming] = {}
+
+        if self.streaming and self.frame_count:
+            raise ValueError("A streamed video can not be seeked, pass no frame_count.")
+
+        if self.max_memory is not None:
+            frames_within_budget(self.max_memory)
 
         self.task_uid = VideoHash._get_task_uid()
 
-        self._create_required_dirs_and_check_for_errors()
+        self._create_required_dirs_and_check_for_errors(source_required)
 
+        self.bits_in_hash = 64
+        self.similar_percentage = 15
+        self.image: Optional[Image.Image] = None
+        self.collage_path: Optional[str] = None
+        self.metadata: Optional[VideoMetadata] = None
+        self.video_path: str = ""
+
+    def _hash(self) -> None:
+        """
+        Compute the hash value of the video, with FFmpeg.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        with MemoryTracker(self.max_memory is not None) as memory:
+            if self.url and self.streaming:
+                with self._stage("extraction"):
+                    pipe = FramePipe(
+                        streaming_download_command(
+                            find_yt_dlp(), self.url, worst=self.download_worst
+                        ),
+                        interval=self.frame_interval,
+                    )
+                    streamed_frames = FrameDecimator(self._max_frames()).add_frames(
+                        pipe
+                    )
+                    self.video_duration = float(pipe.duration or 0)
+                self._hash_frames(streamed_frames)
+            else:
+                self._hash_video()
+
+        self.peak_memory = memory.peak
+
+    def _max_frames(self) -> Optional[int]:
+        """
+        Number of frames within the memory budget, None if there is no budget.
+
+        :rtype: Optional[int]
+        """
+        if self.max_memory is None:
+            return None
+        return frames_within_budget(self.max_memory)
+
+    def _hash_video(self) -> None:
+        """
+        Compute the hash value of the video file, see _hash.
+
+        :return: None
+
+        :rtype: NoneType
+        """
         self._copy_video_to_video_dir()
 
-        FramesExtractor(self.video_path, self.frames_dir, interval=self.frame_interval)
+        with self._stage("probe"):
+            self.metadata = probe_video(self.video_path)
+            self.video_duration = self.metadata.duration
+
+        frame_count = budget_frame_count(
+            self.max_memory, self.video_duration, self.frame_interval, self.frame_count
+        )
+
+        with self._stage("crop_detection"):
+            crop = FramesExtractor.detect_crop(
+                video_path=self.video_path, frames=3, duration=self.video_duration
+            )
+
+        frames: Union[str, List[np.ndarray]] = self.frames_dir
+        with self._stage("extraction"):
+            if frame_count:
+                frames = sample_frames(
+                    self.video_path,
+                    frame_count=frame_count,
+                    duration=self.video_duration,
+                    keyframes_only=self.keyframes_only,
+                    crop=crop,
+                )
+            elif self.in_memory:
+                frames = list(
+                    stream_frames(
+                        self.video_path,
+                        interval=self.frame_interval,
+                        duration=self.video_duration,
+                        crop=crop,
+                    )
+                )
+            else:
+                FramesExtractor(
+                    self.video_path,
+                    self.frames_dir,
+                    interval=self.frame_interval,
+                    duration=self.video_duration,
+                    crop=crop,
+                )
+
+        self._hash_frames(frames)
+
+    def _stage(self, stage: str) -> StageTimer:
+        """
+        Context manager measuring a stage of the computation of the hash
+        value, the measurements are kept in the timings attribute.
+
+        :param stage: Name of the stage.
+
+        :rtype: StageTimer
+        """
+        return StageTimer(stage, self.timings, self.timing_hook)
+
+    def _hash_frames(
+        self,
+        frames: Union[str, Sequence[np.ndarray]],
+        strip: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Compute the hash value from the extracted frames, makes the collage
+        and the tiles. Only uses Pillow and NumPy, no FFmpeg.
+
+        :param frames: The frames directory or the frames.
+
+        :param strip: The frames stitched horizontally if already available,
+                      else the tiles are computed from the frames one at a
+                      time, see tilemaker.dominant_colors_of_frames.
 
-        self.collage_path = os.path.join(self.collage_dir, "collage.jpg")
+        :return: None
 
-        self.horizontally_concatenated_image_path = os.path.join(
-            self.horizontally_concatenated_image_dir,
-            "horizontally_concatenated_image.png",
+        :rtype: NoneType
+        """
+        if self.save_collage:
+            self.collage_path = os.path.join(self.collage_dir, "collage.jpg")
+
+        with self._stage("collage"):
+            collage = MakeCollage(
+                (
+                    get_list_of_all_files_in_dir(frames)
+                    if isinstance(frames, str)
+                    else frames
+                ),
+                self.collage_path,
+                collage_image_width=COLLAGE_IMAGE_WIDTH,
+            )
+
+        with self._stage("dominant_colors"):
+            if strip is None:
+                dominant_color_list = dominant_colors_of_frames(frames)
+            else:
+                dominant_color_list = dominant_colors_of_tiles(strip)
+
+        with self._stage("hash"):
+            self.image = collage.image
+
+            self._calc_hash(self.image, dominant_color_list)
+
+    def _hash_parameters(self) -> Dict[str, Any]:
+        """
+        Parameters that change the hash value, the key of the cached hash
+        values along with the content digest of the video.
+
+        :rtype: Dict[str, Any]
+        """
+        parameters: Dict[str, Any] = {
+            "algorithm_version": HASH_ALGORITHM_VERSION,
+            "bits_in_hash": self.bits_in_hash,
+            "collage_image_width": COLLAGE_IMAGE_WIDTH,
+            "frame_interval": float(self.frame_interval),
+            "in_memory": self.in_memory,
+            "frame_count": self.frame_count,
+            "keyframes_only": self.keyframes_only,
+        }
+        if self.max_memory is not None:
+            parameters["max_memory"] = self.max_memory
+        # the other backends resample differently, Pillow is the reference
+        image_backend = get_image_backend().name
+        if image_backend != "pillow":
+            parameters["image_backend"] = image_backend
+        return parameters
+
+    def _hash_with_cache(self, cache: Union[str, HashCache]) -> None:
+        """
+        Use the cached hash value of the video if there is one, else compute
+        the hash value and store it in the cache.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        hash_cache = HashCache(cache) if isinstance(cache, str) else cache
+        try:
+            with self._stage("cache_lookup"):
+                digest = self._use_cached_hash(hash_cache)
+            if digest is None:
+                return
+
+            self._hash()
+
+            with self._stage("cache_store"):
+                self._store_cached_hash(hash_cache, digest)
+        finally:
+            if hash_cache is not cache:
+                hash_cache.close()
+
+    def _use_cached_hash(self, hash_cache: HashCache) -> Optional[str]:
+        """
+        Set the hash value and the duration from the cache, if the video was
+        already hashed with the same parameters.
+
+        :return: None if the cached hash value was used, else the content
+                 digest of the video.
+
+        :rtype: Optional[str]
+        """
+        digest = hash_cache.digest(str(self.path))
+
+        cached = hash_cache.get(digest, self._hash_parameters())
+        if cached is None:
+            return digest
+
+        self.video_duration = cached.video_duration
+        self._set_hash(cached.bitlist)
+        return None
+
+    def _store_cached_hash(self, hash_cache: HashCache, digest: str) -> None:
+        """
+        Store the hash value and the duration in the cache.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        hash_cache.put(
+            digest,
+            self._hash_parameters(),
+            self.hash,
+            self.hash_hex,
+            self.video_duration,
         )
 
-        MakeCollage(
-            get_list_of_all_files_in_dir(self.frames_dir),
-            self.collage_path,
-            collage_image_width=1024,
+    @classmethod
+    def from_frames(
+        cls,
+        frames: Sequence[np.ndarray],
+        frame_interval: Union[int, float] = 1,
+        video_duration: Optional[float] = None,
+        storage_path: Optional[str] = None,
+        strip: Optional[np.ndarray] = None,
+    ) -> "VideoHash":
+        """
+        Compute the hash value of frames that were already decoded, e.g. by
+        stream_frames or FramePipe. The hash value is the same as that of
+        VideoHash(path, in_memory=True) if the frames are the ones it decodes.
+
+        The instance has neither a path nor an url and its metadata is None.
+
+        :param frames: The RGB frames as NumPy arrays of shape (144, 144, 3),
+                       in the order of their timestamp.
+
+        :param frame_interval: The frame_interval the frames were taken at.
+
+        :param video_duration: Duration of the video in seconds, default is
+                               the number of frames divided by frame_interval.
+
+        :param storage_path: See __init__.
+
+        :param strip: The frames stitched horizontally if already available,
+                      the dominant colors of the tiles are computed from it.
+
+        :return: The instance.
+
+        :rtype: VideoHash
+
+        :raises CollageOfZeroFramesError: If there are no frames.
+        """
+        videohash = cls.__new__(cls)
+        videohash._set_up(
+            path=None,
+            url=None,
+            storage_path=storage_path,
+            download_worst=False,
+            frame_interval=frame_interval,
+            in_memory=True,
+            input_mode="copy",
+            source_required=False,
         )
 
-        make_tile(
-            self.frames_dir, self.horizontally_concatenated_image_path, self.tiles_dir
+        if video_duration is None:
+            video_duration = len(frames) / frame_interval
+        videohash.video_duration = float(video_duration)
+
+        videohash._hash_frames(frames, strip=strip)
+        return videohash
+
+    @classmethod
+    async def create_async(
+        cls,
+        path: Optional[str] = None,
+        url: Optional[str] = None,
+        storage_path: Optional[str] = None,
+        download_worst: bool = False,
+        frame_interval: Union[int, float] = 1,
+        in_memory: bool = False,
+        cache: Optional[Union[str, HashCache]] = None,
+        input_mode: str = "copy",
+        frame_count: Optional[int] = None,
+        keyframes_only: bool = False,
+        streaming: bool = False,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        executor: Optional[Executor] = None,
+        timing_hook: Optional[Callable[[StageTiming], Any]] = None,
+        save_collage: bool = False,
+        max_memory: Optional[int] = None,
+    ) -> "VideoHash":
+        """
+        Compute the video hash value without blocking the event loop. FFmpeg,
+        ffprobe and yt-dlp run as asyncio subprocesses, the Pillow and NumPy
+        work and the file copies run in the executor.
+
+        If the task is cancelled the child processes are killed.
+
+        :param semaphore: Limits the number of child processes running at the
+                          same time, share one semaphore between all the
+                          hashes of the process. Default is at most 4
+                          FFmpeg processes per hash at the same time.
+
+        :param executor: Executor of the Pillow and NumPy work, default is the
+                         default executor of the event loop. Must be a
+                         ThreadPoolExecutor, the work updates the instance.
+
+        See __init__ for the other parameters. The crop detection is part of
+        the extraction stage of the timings. The CPU times and the bytes of
+        the timings include the work of the other tasks running meanwhile.
+
+        :return: The instance, same as VideoHash(...).
+
+        :rtype: VideoHash
+
+        :raises TypeError: If the executor is not a ThreadPoolExecutor.
+        """
+        if executor is not None and not isinstance(executor, ThreadPoolExecutor):
+            raise TypeError(
+                "The executor of create_async must be a ThreadPoolExecutor, not "
+                + f"{type(executor).__name__}."
+            )
+
+        loop = asyncio.get_running_loop()
+
+        videohash = cls.__new__(cls)
+        videohash._set_up(
+            path=path,
+            url=url,
+            storage_path=storage_path,
+            download_worst=download_worst,
+            frame_interval=frame_interval,
+            in_memory=in_memory,
+            input_mode=input_mode,
+            frame_count=frame_count,
+            keyframes_only=keyframes_only,
+            streaming=streaming,
+            timing_hook=timing_hook,
+            save_collage=save_collage,
+            max_memory=max_memory,
         )
 
-        self.image = Image.open(self.collage_path)
-        self.bits_in_hash = 64
-        self.similar_percentage = 15
-        self.video_duration = video_duration(self.video_path)
+        try:
+            if cache is not None and videohash.path:
+                # a new connection, sqlite connections can not move across threads
+                def cache_copy() -> HashCache:
+                    if isinstance(cache, HashCache):
+                        return HashCache(
+                            cache.path,
+                            cache.max_entries,
+                            cache.max_age,
+                            cache.max_bytes,
+                        )
+                    return HashCache(str(cache))
+
+                def use_cached_hash() -> Optional[str]:
+                    with cache_copy() as hash_cache:
+                        return videohash._use_cached_hash(hash_cache)
+
+                with videohash._stage("cache_lookup"):
+                    digest = await loop.run_in_executor(executor, use_cached_hash)
+                if digest is None:
+                    return videohash
+
+            frames: Union[str, List[np.ndarray]]
+            with MemoryTracker(videohash.max_memory is not None) as memory:
+                if videohash.url and videohash.streaming:
+                    with videohash._stage("extraction"):
+                        frames, duration = await stream_url_frames_async(
+                            videohash.url,
+                            interval=videohash.frame_interval,
+                            worst=videohash.download_worst,
+                            semaphore=semaphore,
+                            max_frames=videohash._max_frames(),
+                        )
+                        videohash.video_duration = duration
+                else:
+                    frames = await videohash._extract_async(loop, executor, semaphore)
+
+                await loop.run_in_executor(executor, videohash._hash_frames, frames)
+
+            videohash.peak_memory = memory.peak
+
+            if cache is not None and videohash.path:
+
+                def store_cached_hash() -> None:
+                    with cache_copy() as hash_cache:
+                        videohash._store_cached_hash(hash_cache, str(digest))
+
+                with videohash._stage("cache_store"):
+                    await loop.run_in_executor(executor, store_cached_hash)
+
+            return videohash
+        except BaseException:
+            videohash.delete_storage_path()
+            raise
+
+    async def _extract_async(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        executor: Optional[Executor],
+        semaphore: Optional[asyncio.Semaphore],
+    ) -> Union[str, List[np.ndarray]]:
+        """
+        Place or download the video and extract its frames, see create_async.
+
+        :return: The frames directory or the frames.
+
+        :rtype: Union[str, List[numpy.ndarray]]
+        """
+        if self.path:
+            with self._stage("copy"):
+                await loop.run_in_executor(executor, self._place_video)
+        else:
+            with self._stage("download"):
+                await download_async(
+                    str(self.url),
+                    self.video_download_dir,
+                    worst=self.download_worst,
+                    semaphore=semaphore,
+                )
+                self._move_downloaded_video()
 
-        self._calc_hash()
+        with self._stage("probe"):
+            self.metadata = await probe_video_async(
+                self.video_path, semaphore=semaphore
+            )
+            self.video_duration = self.metadata.duration
+
+        frame_count = budget_frame_count(
+            self.max_memory, self.video_duration, self.frame_interval, self.frame_count
+        )
+
+        frames: Union[str, List[np.ndarray]] = self.frames_dir
+        with self._stage("extraction"):
+            if frame_count:
+                frames = await sample_frames_async(
+                    self.video_path,
+                    frame_count=frame_count,
+                    duration=self.video_duration,
+                    keyframes_only=self.keyframes_only,
+                    semaphore=semaphore,
+                )
+            elif self.in_memory:
+                frames = await stream_frames_async(
+                    self.video_path,
+                    interval=self.frame_interval,
+                    duration=self.video_duration,
+                    semaphore=semaphore,
+                )
+            else:
+                await extract_frames_async(
+                    self.video_path,
+                    self.frames_dir,
+                    interval=self.frame_interval,
+                    duration=self.video_duration,
+                    semaphore=semaphore,
+                )
+
+        return frames
 
     def __str__(self) -> str:
         """
@@ -189,8 +865,8 @@ class VideoHash:
         """
         Definition of the '-' operator on VideoHash objects.
 
-        Instance of the VideoHash class, lists(bitlist) and string prefixed with
-         '0x' and '0b' are accepted other types.
+        Instance of the VideoHash and VideoHashValue classes, lists(bitlist) and
+        string prefixed with '0x' and '0b' are accepted other types.
 
         The method checks that the binary strings are prefixed with '0b',
         hexadecimal strings prefixed with '0x' and if the string is not
@@ -213,14 +889,28 @@ class VideoHash:
         if other is None:
             raise TypeError("Other hash is None. And it should not be None.")
 
+        if isinstance(other, (VideoHash, VideoHashValue)):
+
+            if other.bits_in_hash != self.bits_in_hash:
+                raise ValueError(
+                    "Can not compare different bits hashes. You must supply a %d bits hash."
+                    % self.bits_in_hash
+                )
+
+            return hamming_distance(self.hash_int, other.hash_int)
+
         if isinstance(other, str):
 
             if other.lower().startswith("0x"):
 
-                return self.hamming_distance(
-                    string_a=self.hash,
-                    string_b=VideoHash.hex2bin(other.lower(), self.bits_in_hash),
-                )
+                other_int = int(other, 16)
+
+                if other_int >> self.bits_in_hash:
+                    raise ValueError(
+                        "Can not compare different bits hashes. You must supply a %d bits hash."
+                        % self.bits_in_hash
+                    )
+                return hamming_distance(self.hash_int, other_int)
 
             elif other.lower().startswith("0b"):
 
@@ -229,7 +919,7 @@ class VideoHash:
                         "Can not compare different bits hashes. You must supply a %d bits hash."
                         % self.bits_in_hash
                     )
-                return self.hamming_distance(string_a=self.hash, string_b=other.lower())
+                return hamming_distance(self.hash_int, int(other, 2))
 
             else:
 
@@ -244,12 +934,7 @@ class VideoHash:
                     f"The list does not have {self.bits_in_hash} bits. Can not calculate hamming distance."
                 )
 
-            return self.hamming_distance(bitlist_a=self.bitlist, bitlist_b=other)
-
-        if isinstance(other, VideoHash):
-            return self.hamming_distance(
-                bitlist_a=self.bitlist, bitlist_b=other.bitlist
-            )
+            return hamming_distance(self.hash_int, bitlist_to_int(other))
 
         raise TypeError(
             "To calculate difference both of the hashes must be either "
@@ -258,14 +943,15 @@ class VideoHash:
 
     def _copy_video_to_video_dir(self) -> None:
         """
-        Copy the video from the path to the video directory.
+        Copy the video from the path to the video directory, or link it or
+        read it in place depending on the input_mode.
 
         Copying avoids issues such as the user or some other
         process deleting the instance files while we are still
         processing.
 
         If instead of the path the uploader specified an url,
-        then download the video and copy the file to video
+        then download the video and move the file to video
         directory.
 
 
@@ -276,43 +962,73 @@ class VideoHash:
         :raises ValueError: If the path supplied by the end user
                             lacks an extension. E.g. webm, mkv and mp4.
         """
-        self.video_path: str = ""
+        self.video_path = ""
 
         if self.path:
-            # create a copy of the video at self.storage_path
-            match = re.search(r"\.([^.]+$)", self.path)
+            with self._stage("copy"):
+                self._place_video()
 
-            if match:
-                extension = match.group(1)
+        if self.url:
 
-            else:
-                raise ValueError("File name (path) does not have an extension.")
+            with self._stage("download"):
+                Download(
+                    self.url,
+                    self.video_download_dir,
+                    worst=self.download_worst,
+                )
 
-            self.video_path = os.path.join(self.video_dir, (f"video.{extension}"))
+                self._move_downloaded_video()
 
-            shutil.copyfile(self.path, self.video_path)
+    def _place_video(self) -> None:
+        """
+        Copy, link or read in place the video of the path, see
+        utils.place_video.
 
-        if self.url:
+        :return: None
 
-            Download(
-                self.url,
-                self.video_download_dir,
-                worst=self.download_worst,
-            )
+        :rtype: NoneType
 
-            downloaded_file = get_list_of_all_files_in_dir(self.video_download_dir)[0]
-            match = re.search(r"\.(.*?)$", downloaded_file)
+        :raises ValueError: If the path lacks an extension.
+        """
+        # create a copy of the video at self.storage_path
+        match = re.search(r"\.([^.]+$)", str(self.path))
 
-            extension = "mkv"
+        if match:
+            extension = match.group(1)
 
-            if match:
-                extension = match.group(1)
+        else:
+            raise ValueError("File name (path) does not have an extension.")
 
-            self.video_path = f"{self.video_dir}video.{extension}"
+        self.video_path = place_video(
+            str(self.path),
+            os.path.join(self.video_dir, (f"video.{extension}")),
+            input_mode=self.input_mode,
+        )
 
-            shutil.copyfile(downloaded_file, self.video_path)
+    def _move_downloaded_video(self) -> None:
+        """
+        Move the downloaded video to the video directory.
 
-    def _create_required_dirs_and_check_for_errors(self) -> None:
+        :return: None
+
+        :rtype: NoneType
+        """
+        downloaded_file = get_list_of_all_files_in_dir(self.video_download_dir)[0]
+        match = re.search(r"\.(.*?)$", downloaded_file)
+
+        extension = "mkv"
+
+        if match:
+            extension = match.group(1)
+
+        self.video_path = f"{self.video_dir}video.{extension}"
+
+        # the download directory is in the storage directory too.
+        os.replace(downloaded_file, self.video_path)
+
+    def _create_required_dirs_and_check_for_errors(
+        self, source_required: bool = True
+    ) -> None:
         """
         Creates important directories before the main processing starts.
 
@@ -320,6 +1036,7 @@ class VideoHash:
         about the end user or some other processes interfering with the instance
         generated files.
 
+        :param source_required: If False do not raise DidNotSupplyPathOrUrl.
 
         :raises DidNotSupplyPathOrUrl: If the user forgot to specify both the
                                        path and the url. One of them must be
@@ -336,7 +1053,7 @@ class VideoHash:
 
         :rtype: NoneType
         """
-        if not self.path and not self.url:
+        if source_required and not self.path and not self.url:
             raise DidNotSupplyPathOrUrl(
                 "You must specify either a path or an URL of the video."
             )
@@ -368,25 +1085,52 @@ class VideoHash:
         self.frames_dir = os.path.join(self.storage_path, (f"frames{os_path_sep}"))
         Path(self.frames_dir).mkdir(parents=True, exist_ok=True)
 
-        self.tiles_dir = os.path.join(self.storage_path, (f"tiles{os_path_sep}"))
-        Path(self.tiles_dir).mkdir(parents=True, exist_ok=True)
-
         self.collage_dir = os.path.join(self.storage_path, (f"collage{os_path_sep}"))
         Path(self.collage_dir).mkdir(parents=True, exist_ok=True)
 
-        self.horizontally_concatenated_image_dir = os.path.join(
-            self.storage_path, (f"horizontally_concatenated_image{os_path_sep}")
-        )
-        Path(self.horizontally_concatenated_image_dir).mkdir(
-            parents=True, exist_ok=True
+    def to_value(self) -> VideoHashValue:
+        """
+        The compact hash value of the instance, the packed bits and the
+        duration, see hashvalue.VideoHashValue.
+
+        :rtype: VideoHashValue
+        """
+        return VideoHashValue(
+            self.hash_int,
+            video_duration=getattr(self, "video_duration", None),
+            bits_in_hash=self.bits_in_hash,
         )
 
+    @classmethod
+    def hash_value(cls, *args: Any, **kwargs: Any) -> VideoHashValue:
+        """
+        Compute the hash value of a video and return only the compact hash
+        value. The collage is closed and the files of the instance are
+        deleted, nothing else is kept. Use it to hash many videos whose hash
+        values are kept in memory.
+
+        Takes the same parameters as __init__.
+
+        :return: The hash value.
+
+        :rtype: VideoHashValue
+        """
+        videohash = cls(*args, **kwargs)
+        try:
+            return videohash.to_value()
+        finally:
+            if videohash.image is not None:
+                videohash.image.close()
+            videohash.delete_storage_path()
+
     def is_similar(self, other: object) -> bool:
         """
         If 'similar_percentage' of bits are similar
         the similar else not.
         """
-        if self - other <= ceil((self.similar_percentage / 100) * self.bits_in_hash):
+        if self - other <= similarity_threshold(
+            self.similar_percentage, self.bits_in_hash
+        ):
             return True
         else:
             return False
@@ -402,6 +1146,92 @@ class VideoHash:
         else:
             return False
 
+    @staticmethod
+    def hash_many(
+        sources: Iterable[str],
+        workers: Optional[int] = None,
+        ffmpeg_workers: Optional[int] = None,
+        ordered: bool = True,
+        **kwargs: Any,
+    ) -> Iterator[VideoHashResult]:
+        """
+        Compute the video hash values of many videos in parallel, using a pool
+        of worker processes.
+
+        A source that starts with a scheme such as 'https://' is treated as an
+        URL, any other source as a path. Any exception raised while hashing a
+        video is captured in the error of its result and the rest of the batch
+        continues.
+
+        :param sources: Paths and URLs of the videos, consumed as the workers
+                        become free, e.g. a stream of lines.
+
+        :param workers: Number of worker processes computing the hash values.
+                        Default is the number of CPUs.
+
+        :param ffmpeg_workers: Maximum number of FFmpeg processes running at
+                               the same time across all the workers. Default is
+                               no limit other than the number of workers.
+
+        :param ordered: If True the results are yielded in the order of the
+                        sources, else as soon as they are computed.
+
+        :param kwargs: Passed to VideoHash for every video, e.g. frame_interval.
+
+        :return: Generator of the results, one per source.
+
+        :rtype: Iterator[VideoHashResult]
+        """
+        semaphore = None
+        if ffmpeg_workers:
+            semaphore = multiprocessing.BoundedSemaphore(ffmpeg_workers)
+
+        # the sources are submitted lazily, at most window videos are
+        # submitted and not yet yielded
+        window = 2 * (workers or os.cpu_count() or 1)
+        indexed_sources = enumerate(sources)
+
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=set_ffmpeg_semaphore,
+            initargs=(semaphore,),
+        )
+        # the submitted futures in the order of the sources
+        futures: Dict[Future, VideoHashResult] = {}
+
+        def submit() -> None:
+            for index, source in islice(indexed_sources, window - len(futures)):
+                future = executor.submit(_hash_worker, index, source, kwargs)
+                futures[future] = VideoHashResult(position=index, source=source)
+
+        try:
+            submit()
+            while futures:
+                if ordered:
+                    done = [next(iter(futures))]
+                    wait(done)
+                else:
+                    done = list(wait(futures, return_when=FIRST_COMPLETED).done)
+
+                results = []
+                for future in done:
+                    pending_result = futures.pop(future)
+                    try:
+                        results.append(future.result())
+                    except Exception as error:
+                        # e.g. the worker died or the exception could not be
+                        # pickled
+                        results.append(pending_result._replace(error=error))
+
+                submit()
+                yield from results
+        finally:
+            # the generator was closed early, e.g. by a break or Ctrl-C, the
+            # videos not started yet are not hashed
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
     def delete_storage_path(self) -> None:
         """
         Delete the storage_path directory tree.
@@ -468,6 +1298,9 @@ class VideoHash:
         bitlist_a and bitlist_b must be python strings containing only the
         bits and not the prefix "0b".
 
+        The inputs are packed in integers and the distance is the popcount
+        of their XOR, see the hammingdistance module.
+
         :return: Hamming distance of the input bitstrings or bitlists.
 
         :rtype: int
@@ -484,8 +1317,9 @@ class VideoHash:
                     + " Can not compute hamming distance. Hamming distance is undefined."
                 )
 
-            _bitlist_a = bitlist_a
-            _bitlist_b = bitlist_b
+            return hamming_distance(
+                bitlist_to_int(bitlist_a), bitlist_to_int(bitlist_b)
+            )
 
         if string_a and string_b:
 
@@ -494,23 +1328,10 @@ class VideoHash:
                     "Strings are of unequal length. Can not compute hamming distance. Hamming distance is undefined."
                 )
 
-            if string_a == self.hash:
-                _bitlist_a = self.bitlist
-
-            else:
-                _bitlist_a = list(map(int, string_a.replace("0b", "")))
-
-            if string_b == self.hash:
-                _bitlist_b = self.bitlist
+            return hamming_distance(int(string_a, 2), int(string_b, 2))
 
-            else:
-                _bitlist_b = list(map(int, string_b.replace("0b", "")))
-
-        return len(
-            np.bitwise_xor(
-                _bitlist_a,
-                _bitlist_b,
-            ).nonzero()[0]
+        raise ValueError(
+            "Pass either both the bitstrings or both the bitlists. Can not compute hamming distance."
         )
 
     @staticmethod
@@ -550,16 +1371,22 @@ class VideoHash:
 
         return str(hex(int(binstr, 2)))
 
-    def _calc_hash(self) -> None:
+    def _calc_hash(self, image: Image.Image, dominant_color_list: List[str]) -> None:
         """
-        Calculates the hash value by calling the whash(wavelet hash) method of
-        imagehash package. The wavelet hash of the collage is the videohash for
-        the original input video.
+        Calculates the hash value from the wavelet hash of the collage, same
+        as the whash method of imagehash package, with the image backend of
+        the process, see imagebackends. The wavelet hash of the collage is the
+        videohash for the original input video.
 
         End-user is not provided any access to the imagehash instance but
         instead the binary and hexadecimal equivalent of the result of
         wavelet-hash.
 
+        :param image: The collage.
+
+        :param dominant_color_list: Dominant colors of the 64 tiles of the
+                                    horizontally concatenated frames.
+
         :return: None
 
         :rtype: NoneType
@@ -571,14 +1398,9 @@ class VideoHash:
 
         self.dominant_color_bitlist: List = []
 
-        for row in imagehash.whash(self.image).hash.astype(int).tolist():
+        for row in wavelet_hash(np.asarray(image)).astype(int).tolist():
             self.whash_bitlist.extend(row)
 
-        dominant_color_list = []
-        for file_path in get_list_of_all_files_in_dir(self.tiles_dir):
-            dominantcolor = DominantColor(file_path)
-            dominant_color_list.append(dominantcolor.dominant_color)
-
         pixels = [
             "r",
             "r",
@@ -664,6 +1486,20 @@ class VideoHash:
             else:
                 self.bitlist.append(1)
 
+        self._set_hash(self.bitlist)
+
+    def _set_hash(self, bitlist: List[int]) -> None:
+        """
+        Set the bitlist and the binary, hexadecimal and packed hash values.
+
+        :param bitlist: The bits of the hash value.
+
+        :return: None
+
+        :rtype: NoneType
+        """
+        self.bitlist = bitlist
+
         self.hash: str = ""
 
         for bit in self.bitlist:
@@ -675,4 +1511,39 @@ class VideoHash:
 
         # the binary value is prefixed with 0b.
         self.hash = f"0b{self.hash}"
+
+        # the packed hash value, used for computing the hamming distances.
+        self.hash_int: int = bitlist_to_int(self.bitlist)
         self.hash_hex: str = VideoHash.bin2hex(self.hash)
+
+
+def _hash_worker(index: int, source: str, kwargs: Dict[str, Any]) -> VideoHashResult:
+    """
+    Compute the hash value of one video in a worker process of
+    VideoHash.hash_many, and delete the files of the instance.
+
+    :return: The result for the source.
+
+    :rtype: VideoHashResult
+    """
+    try:
+        if re.match(r"^[a-zA-Z][a-zA-Z0-9+.-]*://", source):
+            videohash = VideoHash(url=source, **kwargs)
+        else:
+            videohash = VideoHash(path=source, **kwargs)
+
+    except Exception as error:
+        return VideoHashResult(position=index, source=source, error=error)
+
+    if videohash.image is not None:
+        videohash.image.close()
+    videohash.delete_storage_path()
+
+    return VideoHashResult(
+        position=index,
+        source=source,
+        hash=videohash.hash,
+        hash_hex=videohash.hash_hex,
+        video_duration=videohash.video_duration,
+        timings=videohash.timings,
+    )
@@ -0,0 +1,248 @@
+import json
+import os
+from fractions import Fraction
+from functools import lru_cache
+from subprocess import PIPE, Popen
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .exceptions import FFmpegError, FFmpegNotFound
+from .tools import tool_path
+from .utils import count_subprocess, ffmpeg_slot
+
+# Module to read the metadata of a video, with one run of ffprobe.
+# ffprobe prints the format and the first video stream of the file as JSON,
+# the metadata are cached per file and are probed again only if the file is
+# modified.
+
+# Maximum number of files whose metadata are cached.
+PROBE_CACHE_SIZE = 256
+
+
+class VideoMetadata(NamedTuple):
+
+    """
+    Metadata of a video file, see probe_video.
+
+    duration is in seconds and fps in frames per second. rotation is the
+    clockwise rotation in degrees the players apply when displaying the video.
+    frame_count is the number of frames stored by the container or, if the
+    container does not store it, estimated from the duration and the fps.
+
+    The hash only uses the duration, to place the crop detection offsets and
+    the sampled timestamps. The other fields are informational: the frames
+    are taken at the frame_interval or frame_count asked for whatever the
+    fps, and FFmpeg applies the rotation itself when it decodes the frames.
+    """
+
+    duration: float
+    fps: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    codec: Optional[str] = None
+    rotation: int = 0
+    frame_count: Optional[int] = None
+
+
+def check_ffprobe(
+    ffprobe_path: Optional[str] = None, ffmpeg_path: Optional[str] = None
+) -> str:
+    """
+    Resolves the ffprobe path. If ffprobe is not on the system path, the
+    ffprobe next to the ffmpeg executable is used.
+
+    :param ffprobe_path: Path of the ffprobe software if not in path.
+
+    :param ffmpeg_path: Path of the ffmpeg software if not in path.
+
+    :return: Path of the ffprobe executable.
+
+    :rtype: str
+
+    :raises FFmpegNotFound: If ffprobe is not found.
+    """
+    if ffprobe_path:
+        return ffprobe_path
+
+    try:
+        return tool_path("ffprobe")
+    except FFmpegNotFound:
+        pass
+
+    if ffmpeg_path:
+        directory, name = os.path.split(ffmpeg_path.strip("'\""))
+        candidate = os.path.join(directory, name.replace("ffmpeg", "ffprobe"))
+        if candidate != ffmpeg_path and os.path.isfile(candidate):
+            return candidate
+
+    raise FFmpegNotFound(
+        "ffprobe is not on the system path. Install FFmpeg and add it to the path."
+        + " Or you can also pass the path via the 'ffprobe_path' parameter."
+    )
+
+
+def _parse_rate(rate: Optional[str]) -> Optional[float]:
+    """
+    Frames per second of an ffprobe frame rate such as '30000/1001', None if
+    the frame rate is unknown('0/0').
+    """
+    if not rate:
+        return None
+    try:
+        value = Fraction(rate)
+    except (ValueError, ZeroDivisionError):
+        return None
+    if value <= 0:
+        return None
+    return float(value)
+
+
+def _parse_rotation(stream: Dict[str, Any]) -> int:
+    """
+    Clockwise rotation of the stream in degrees, from the rotate tag of the
+    older versions of FFmpeg or the display matrix side data of the newer.
+    """
+    rotate = stream.get("tags", {}).get("rotate")
+    if rotate is not None:
+        return int(float(rotate)) % 360
+
+    for side_data in stream.get("side_data_list", []):
+        if "rotation" in side_data:
+            # the display matrix rotation is counterclockwise
+            return -int(float(side_data["rotation"])) % 360
+
+    return 0
+
+
+def parse_ffprobe_output(output: str) -> VideoMetadata:
+    """
+    Metadata of a video from the JSON output of
+    'ffprobe -print_format json -show_format -show_streams'.
+
+    :param output: The output of ffprobe.
+
+    :return: The metadata of the video.
+
+    :rtype: VideoMetadata
+
+    :raises FFmpegError: If the output has no duration, e.g. the file is not
+                         a video.
+    """
+    probe = json.loads(output or "{}")
+    video_format = probe.get("format", {})
+    streams = [
+        stream
+        for stream in probe.get("streams", [])
+        if stream.get("codec_type") == "video"
+    ]
+    stream = streams[0] if streams else {}
+
+    duration = None
+    for value in (video_format.get("duration"), stream.get("duration")):
+        if value not in (None, "N/A"):
+            duration = float(value)
+            break
+
+    if duration is None:
+        raise FFmpegError(f"ffprobe found no duration in its output:\n{output}")
+
+    fps = _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(
+        stream.get("r_frame_rate")
+    )
+
+    frame_count: Optional[int] = None
+    if str(stream.get("nb_frames", "")).isdigit():
+        frame_count = int(stream["nb_frames"])
+    elif fps:
+        frame_count = round(duration * fps)
+
+    return VideoMetadata(
+        duration=duration,
+        fps=fps,
+        width=stream.get("width"),
+        height=stream.get("height"),
+        codec=stream.get("codec_name"),
+        rotation=_parse_rotation(stream),
+        frame_count=frame_count,
+    )
+
+
+def ffprobe_command(video_path: str, ffprobe_path: str) -> List[str]:
+    """
+    ffprobe command that prints the format and the first video stream of the
+    video as JSON.
+
+    :rtype: List[str]
+    """
+    return [
+        ffprobe_path,
+        "-v",
+        "error",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        "-select_streams",
+        "v:0",
+        video_path,
+    ]
+
+
+@lru_cache(maxsize=PROBE_CACHE_SIZE)
+def _probe(
+    video_path: str, size: int, mtime_ns: int, ffprobe_path: str
+) -> VideoMetadata:
+    """
+    Run ffprobe, cached by the path, size and mtime of the file.
+    """
+    command = ffprobe_command(video_path, ffprobe_path)
+
+    with ffmpeg_slot():
+        try:
+            process = Popen(command, stdout=PIPE, stderr=PIPE)
+            count_subprocess()
+        except FileNotFoundError:
+            raise FFmpegNotFound(f"ffprobe not found at '{ffprobe_path}'.")
+        output, error = process.communicate()
+
+    if process.returncode != 0:
+        raise FFmpegError(
+            f"ffprobe failed to read '{video_path}'.\n{error.decode(errors='replace')}"
+        )
+
+    return parse_ffprobe_output(output.decode(errors="replace"))
+
+
+def probe_video(
+    video_path: str,
+    ffprobe_path: Optional[str] = None,
+    ffmpeg_path: Optional[str] = None,
+) -> VideoMetadata:
+    """
+    Read the metadata of a video with ffprobe. The metadata are cached, they
+    are read again only if the size or the modification time of the file
+    changes.
+
+    :param video_path: Path of the video file.
+
+    :param ffprobe_path: Path of the ffprobe software if not in path.
+
+    :param ffmpeg_path: Path of the ffmpeg software if not in path, ffprobe
+                        is looked for next to it.
+
+    :return: The metadata of the video.
+
+    :rtype: VideoMetadata
+
+    :raises FileNotFoundError: If no file is found at video_path.
+
+    :raises FFmpegError: If ffprobe could not read the video.
+    """
+    video_path = os.path.abspath(video_path)
+    stat = os.stat(video_path)
+
+    return _probe(
+        video_path,
+        stat.st_size,
+        stat.st_mtime_ns,
+        check_ffprobe(ffprobe_path, ffmpeg_path),
+    )